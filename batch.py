@@ -0,0 +1,171 @@
+"""Headless batch mode: run the full generation pipeline for every lesson in a JSONL file.
+
+Each line is a lesson record with "title", "info" and optional "resources" (and an
+optional "id" used for the output folder name). Completed stages are checkpointed per
+lesson, so rerunning the same command after a crash resumes where it stopped.
+
+    python batch.py lessons.jsonl --workers 4 --output-dir batch_output
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from utils.documents import DOCUMENT_FILENAMES, ZIP_FILENAME, create_word_doc, reports_content, write_zip
+from utils.generation import (
+    GEMINI_BACKEND, STAGE_OUTPUTS, GenerationRun, build_generation_pipeline, configure_gemini, stage_output_text,
+)
+from utils.pipeline import SUCCEEDED
+from utils.telemetry import telemetry
+
+CHECKPOINT_FILENAME = "checkpoint.json"
+
+
+def read_lessons(path):
+    lessons = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not str(record.get('title', '')).strip() or not str(record.get('info', '')).strip():
+                raise ValueError(f"{path}:{line_number}: lesson records need a title and info")
+            lessons.append(record)
+    return lessons
+
+def lesson_folder_name(index, record):
+    name = str(record.get('id') or f"{index:04d}-{record['title']}")
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_')[:80]
+
+def lesson_inputs(record):
+    return {
+        'lesson_title': str(record['title']),
+        'lesson_info': str(record['info']),
+        'additional_resources': str(record.get('resources', '')),
+    }
+
+def inputs_hash(inputs):
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class Checkpoint:
+    """Stage outputs of one lesson, saved to disk as each stage succeeds."""
+
+    def __init__(self, path, inputs):
+        self.path = path
+        self.inputs_hash = inputs_hash(inputs)
+        self.stages = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            # A checkpoint for different lesson inputs is stale
+            if data.get('inputs_hash') == self.inputs_hash:
+                self.stages = data.get('stages', {})
+        except (OSError, ValueError):
+            pass
+
+    def save_stage(self, name, value):
+        with self._lock:
+            self.stages[name] = value
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'inputs_hash': self.inputs_hash, 'stages': self.stages}, file)
+            os.replace(tmp_path, self.path)
+
+
+def write_outputs(lesson_dir, outputs, run_id=None):
+    blueprint_doc = create_word_doc("Lesson Blueprint", outputs['blueprint'], run_id)
+    assessment_doc = create_word_doc("Assessment Items", outputs['assessment'], run_id)
+    media_doc = create_word_doc("Media Suggestions", outputs['media'], run_id)
+    reports_doc = create_word_doc(
+        "DEI and Fact-check Reports", reports_content(outputs['fact_check'], outputs['dei_check']), run_id
+    )
+    documents = {'blueprint': blueprint_doc, 'assessment': assessment_doc, 'media': media_doc, 'reports': reports_doc}
+    paths = {}
+    for key, buffer in documents.items():
+        path = paths[DOCUMENT_FILENAMES[key]] = os.path.join(lesson_dir, DOCUMENT_FILENAMES[key])
+        with open(path, 'wb') as file:
+            file.write(buffer.getvalue())
+    # The archive is streamed from the files just written instead of being assembled in memory
+    with telemetry.span('render.zip', run_id=run_id):
+        write_zip(os.path.join(lesson_dir, ZIP_FILENAME), paths)
+
+def run_lesson(index, record, output_dir, bypass_cache=False, deadline_seconds=None):
+    # Returns (folder name, number of stages resumed from the checkpoint, error message or None)
+    folder = lesson_folder_name(index, record)
+    lesson_dir = os.path.join(output_dir, folder)
+    os.makedirs(lesson_dir, exist_ok=True)
+    inputs = lesson_inputs(record)
+    checkpoint = Checkpoint(os.path.join(lesson_dir, CHECKPOINT_FILENAME), inputs)
+    resumed = len(checkpoint.stages)
+
+    run = GenerationRun(bypass_cache=bypass_cache, deadline_seconds=deadline_seconds)
+    results = build_generation_pipeline(run).run(
+        inputs, completed=checkpoint.stages, on_stage_succeeded=checkpoint.save_stage
+    )
+    run.record_stage_spans(results)
+    failures = [stage_output_text(result) for result in results.values() if result.status != SUCCEEDED]
+    if failures:
+        return folder, resumed, failures[0]
+
+    write_outputs(lesson_dir, {stage: result.value for stage, result in results.items()}, run.run_id)
+    return folder, resumed, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate lesson materials for every lesson in a JSONL file.")
+    parser.add_argument('lessons', help="JSONL file with one lesson record (title, info, resources) per line")
+    parser.add_argument('--output-dir', default='batch_output', help="folder for per-lesson outputs and checkpoints")
+    parser.add_argument('--workers', type=int, default=4, help="number of lessons generated concurrently")
+    parser.add_argument('--force', action='store_true', help="skip the LLM response cache")
+    parser.add_argument('--deadline', type=float, default=None,
+                        help="seconds each lesson may take, including rate-limit waits and retries")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    genai_api_key = os.getenv("GEMINI_API_KEY")
+    # The offline stub backend needs no key
+    if not genai_api_key and GEMINI_BACKEND != "stub":
+        print("GEMINI_API_KEY not found. Please check your .env file.", file=sys.stderr)
+        return 2
+    configure_gemini(genai_api_key)
+
+    lessons = read_lessons(args.lessons)
+    os.makedirs(args.output_dir, exist_ok=True)
+    print(f"Generating {len(lessons)} lesson(s) with {args.workers} worker(s) into {args.output_dir}")
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as executor:
+        # Future -> lesson folder name, to report a lesson whose run raised
+        futures = {
+            executor.submit(run_lesson, index, record, args.output_dir, args.force, args.deadline):
+                lesson_folder_name(index, record)
+            for index, record in enumerate(lessons, 1)
+        }
+        for done_count, future in enumerate(as_completed(futures), 1):
+            try:
+                folder, resumed, error = future.result()
+            except Exception as e:
+                # e.g. the disk filling up or a document failing to render; only this lesson fails
+                folder, resumed, error = futures[future], 0, f"{type(e).__name__}: {e}"
+            resumed_note = f" (resumed {resumed}/{len(STAGE_OUTPUTS)} stages)" if resumed else ""
+            if error:
+                failed += 1
+                print(f"[{done_count}/{len(lessons)}] FAILED {folder}{resumed_note}: {error}")
+            else:
+                print(f"[{done_count}/{len(lessons)}] done {folder}{resumed_note}")
+
+    telemetry.write_prometheus()
+    print(f"{len(lessons) - failed} succeeded, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+from benchmarks.common import FakeClock, summarize, timed
+from utils.context_cache import ContextCacheManager, FakeContextCacheBackend
+
+MODEL_NAME = 'models/gemini-stub'
+PREFIX = "Reference materials. " * 2000
+TTL_SECONDS = 3600
+REFRESH_MARGIN_SECONDS = 300
+RETRY_AFTER_SECONDS = 600
+
+
+def expect(actual, expected, step):
+    if actual != expected:
+        raise AssertionError(f"Context cache {step}: expected {expected!r}, got {actual!r}")
+
+def manager_for(backend, clock):
+    return ContextCacheManager(
+        backend, ttl_seconds=TTL_SECONDS, refresh_margin_seconds=REFRESH_MARGIN_SECONDS,
+        retry_after_seconds=RETRY_AFTER_SECONDS, clock=clock,
+    )
+
+def check_lifecycle():
+    # Create, reuse, refresh before expiry and expiry of one handle, against the in-memory backend.
+    # Returns the manager's counts at the end.
+    clock = FakeClock()
+    backend = FakeContextCacheBackend(clock=clock)
+    manager = manager_for(backend, clock)
+
+    model = manager.model_for(MODEL_NAME, PREFIX)
+    expect(backend.calls['create'], 1, "create")
+    model.generate_content("suffix")
+
+    clock.now = 60
+    expect(manager.model_for(MODEL_NAME, PREFIX).name, model.name, "reuse")
+    expect(manager.stats()['reused'], 1, "reuse count")
+
+    # Inside the refresh margin: the same handle, with its TTL extended from now
+    clock.now = TTL_SECONDS - REFRESH_MARGIN_SECONDS / 2
+    expect(manager.model_for(MODEL_NAME, PREFIX).name, model.name, "refresh")
+    expect(backend.calls['refresh'], 1, "refresh call")
+    expect(backend.entries[model.name]['expires_at'], clock.now + TTL_SECONDS, "refreshed expiry")
+
+    # Past the refreshed expiry: the old handle is dropped and a new one created
+    clock.now += TTL_SECONDS + 1
+    try:
+        model.generate_content("suffix")
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("Context cache expiry: the expired handle still answered")
+    replacement = manager.model_for(MODEL_NAME, PREFIX)
+    expect(replacement.name != model.name, True, "replacement handle")
+    expect(backend.calls['create'], 2, "create after expiry")
+    replacement.generate_content("suffix")
+
+    manager.expire()
+    expect(replacement.name in backend.entries, False, "expire all")
+    expect(manager.stats()['live'], 0, "live handles after expire all")
+    return manager.stats()
+
+def check_backoff():
+    # A failed create (prefix below the backend's minimum) isn't retried until RETRY_AFTER_SECONDS
+    # have passed. Returns the manager's counts at the end.
+    clock = FakeClock()
+    backend = FakeContextCacheBackend(clock=clock, min_prefix_chars=len(PREFIX) + 1)
+    manager = manager_for(backend, clock)
+
+    expect(manager.model_for(MODEL_NAME, PREFIX), None, "failed create")
+    clock.now = RETRY_AFTER_SECONDS - 1
+    expect(manager.model_for(MODEL_NAME, PREFIX), None, "during backoff")
+    expect(backend.calls['create'], 1, "no create during backoff")
+
+    clock.now = RETRY_AFTER_SECONDS
+    backend.min_prefix_chars = 0
+    expect(manager.model_for(MODEL_NAME, PREFIX) is not None, True, "create after backoff")
+    expect(backend.calls['create'], 2, "create calls after backoff")
+    return manager.stats()
+
+def run(repeats=5, lookups=10000):
+    # Checks the cache lifecycle offline, then times reusing a live handle (hashing the prefix
+    # for its key each time), the cost every stage call pays when context caching is on
+    results = {
+        'config': {'repeats': repeats, 'lookups': lookups, 'prefix_chars': len(PREFIX)},
+        'lifecycle': check_lifecycle(),
+        'backoff': check_backoff(),
+    }
+    clock = FakeClock()
+    manager = manager_for(FakeContextCacheBackend(clock=clock), clock)
+    manager.get(MODEL_NAME, PREFIX)
+    samples = []
+    for _ in range(repeats):
+        _, seconds = timed(lambda: [manager.get(MODEL_NAME, PREFIX) for _ in range(lookups)])
+        samples.append(seconds)
+    stats = summarize(samples)
+    results['reuse_lookup'] = dict(stats, lookups_per_second=lookups / stats['median'])
+    return results
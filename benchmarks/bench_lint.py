@@ -0,0 +1,82 @@
+from benchmarks.common import summarize, timed
+from benchmarks.fixtures import assessment_markdown
+from utils.assessment_items import AssessmentItem, items_from_markdown
+from utils.readability import estimate_lexiles
+from utils.style_lint import lint_item, lint_items
+
+# Stems that must (True) or must not (False) be flagged for a missing Oxford comma
+OXFORD_COMMA_CASES = (
+    ("They grew corn, cotton and peanuts.", True),
+    ("Settlers came from Georgia, Tennessee or the Carolinas.", True),
+    ("They grew corn, cotton, and peanuts.", False),
+    ("In 1830, Congress and the president agreed.", False),
+    ("The river, which flows south and east, is long.", False),
+    ("Many people, including farmers and traders, came.", False),
+    ("The soil is rich, so farmers and traders came.", False),
+    ("The Indian Removal Act, passed in 1830 and signed by Jackson, forced tribes west.", False),
+    ("John Ross, the Cherokee chief and a lawyer, fought removal.", False),
+    ("Worcester v. Georgia, decided in 1832 and ignored by Jackson, mattered.", False),
+)
+# Item headers that must (True) or must not (False) be accepted as beginning with a gerund
+GERUND_HEADER_CASES = (
+    ("Identifying Key Ideas", True),
+    ("Comparing Nations", True),
+    ("Building a Nation", True),
+    ("Thing to Know", False),
+    ("Bring the Map", False),
+    ("During the War", False),
+    ("Key Ideas", False),
+)
+
+
+def check_rules():
+    # The style rules flag what they should and nothing else; raises on the first wrong verdict
+    def rules(header, stem):
+        item = AssessmentItem(1, 1, 'Low', 'multiple_choice', header, stem, ['a', 'b', 'c', 'd'], ['A'])
+        return {violation.rule for violation in lint_item(item)}
+
+    for stem, flagged in OXFORD_COMMA_CASES:
+        if ('oxford_comma' in rules("Identifying Key Ideas", stem)) != flagged:
+            raise AssertionError(f"Oxford comma rule {'missed' if flagged else 'wrongly flagged'}: {stem!r}")
+    for header, gerund in GERUND_HEADER_CASES:
+        if ('gerund_header' not in rules(header, "Which statement is true?")) != gerund:
+            raise AssertionError(f"Gerund header rule {'rejected' if gerund else 'accepted'}: {header!r}")
+    return len(OXFORD_COMMA_CASES) + len(GERUND_HEADER_CASES)
+
+def run(repeats=10, lessons=50):
+    # Style linting and readability scoring of every item in a batch of lessons. Linting starts from the
+    # merged assessment markdown (as for a stored output) and from already-parsed records (as inside the
+    # assessment stage); readability is scored for the whole batch at once and, for comparison, per item.
+    markdown = [assessment_markdown() + f"\n\nLesson {lesson}" for lesson in range(lessons)]
+    records = [items_from_markdown(text) for text in markdown]
+    item_count = sum(len(items) for items in records)
+
+    def from_markdown():
+        return [lint_items(items_from_markdown(text)) for text in markdown]
+
+    def from_records():
+        return [lint_items(items) for items in records]
+
+    item_texts = [[item.stem, *item.choices, item.feedback] for items in records for item in items.values()]
+
+    def readability_batch():
+        return estimate_lexiles(item_texts)
+
+    def readability_per_item():
+        return [estimate_lexiles([texts]) for texts in item_texts]
+
+    results = {'config': {'repeats': repeats, 'lessons': lessons, 'items': item_count}, 'rule_checks': check_rules()}
+    for name, func in (('from_markdown', from_markdown), ('from_records', from_records)):
+        samples = []
+        for _ in range(repeats):
+            reports, seconds = timed(func)
+            samples.append(seconds)
+        stats = summarize(samples)
+        results[name] = dict(
+            stats, items_per_second=item_count / stats['median'],
+            flagged_items=sum(len(report) for report in reports),
+        )
+    for name, func in (('readability_batch', readability_batch), ('readability_per_item', readability_per_item)):
+        stats = summarize([timed(func)[1] for _ in range(repeats)])
+        results[name] = dict(stats, items_per_second=item_count / stats['median'])
+    return results
@@ -0,0 +1,146 @@
+import tempfile
+import threading
+import time
+
+from benchmarks.common import summarize
+from benchmarks.fixtures import LESSON_INPUTS
+import utils.generation as generation
+from utils.gemini_stub import StubGenerativeModel
+from utils.pipeline import SUCCEEDED
+from utils.response_cache import CachedModel, ResponseCache
+from utils.streaming import StreamBuffer
+from utils.token_budget import TRIM_ORDER
+
+# Module attributes the stage functions look up at call time
+MODEL_ATTRIBUTES = ('blueprint_model', 'assessment_model', 'media_model', 'fact_check_model', 'dei_check_model')
+
+
+class ConcurrencyProbe:
+    """Wraps a model and tracks how many of its calls are in flight at once."""
+
+    def __init__(self, model):
+        self.model = model
+        self.model_name = model.model_name
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = self.model.generate_content(contents, stream=stream, **kwargs)
+            # Streamed stubs are lists already, so the call is over once the iterator exists
+            return response
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def install_stub_models(latency, output_words, cache):
+    # Every stage shares one probed stub, so peak_in_flight counts calls across stages
+    probe = ConcurrencyProbe(StubGenerativeModel(generation.MODEL_NAME, latency=latency, output_words=output_words))
+    for attribute in MODEL_ATTRIBUTES:
+        setattr(generation, attribute, CachedModel(generation.rate_limited(probe), cache))
+    return probe
+
+def peak_overlap(intervals):
+    # Largest number of (start, end) intervals open at the same moment
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    open_count = peak = 0
+    for _, change in events:
+        open_count += change
+        peak = max(peak, open_count)
+    return peak
+
+def run_once(probe, max_workers):
+    run = generation.GenerationRun(
+        bypass_cache=True, stream_buffers={stage: StreamBuffer() for stage in generation.STAGE_OUTPUTS}
+    )
+    calls_before = probe.calls
+    start = time.perf_counter()
+    results = generation.build_generation_pipeline(run, max_workers=max_workers).run(dict(LESSON_INPUTS))
+    end_to_end = time.perf_counter() - start
+    failed = [name for name, result in results.items() if result.status != SUCCEEDED]
+    if failed:
+        raise RuntimeError(f"Stages failed in benchmark run: {failed}")
+
+    stage_time = sum(result.duration for result in results.values())
+    return {
+        'end_to_end': end_to_end,
+        'stages': {
+            name: {
+                'duration': result.duration,
+                'queue_wait': result.queue_wait,
+                'first_token': run.stream_buffers[name].time_since(result.started_at),
+            }
+            for name, result in results.items()
+        },
+        # Sum of stage durations over wall time: 1.0 means fully serial
+        'stage_parallelism': stage_time / end_to_end,
+        'peak_concurrent_stages': peak_overlap([(r.started_at, r.finished_at) for r in results.values()]),
+        'llm_calls': probe.calls - calls_before,
+        'input_tokens': sum(usage.input for usage in run.token_usage.values()),
+        'output_tokens': sum(usage.output for usage in run.token_usage.values()),
+    }
+
+def check_trim_order(probe, max_workers):
+    # The sections the stage prompts actually build (the fact and DEI checks' included) are exactly
+    # the ones TRIM_ORDER can trim; a renamed section would otherwise silently never be trimmed
+    built = set()
+    fit_sections = generation.fit_sections
+
+    def recording_fit_sections(sections, fixed_tokens, budget):
+        built.update(sections)
+        return fit_sections(sections, fixed_tokens, budget)
+
+    generation.fit_sections = recording_fit_sections
+    try:
+        run_once(probe, max_workers)
+    finally:
+        generation.fit_sections = fit_sections
+    if built != set(TRIM_ORDER):
+        raise AssertionError(
+            f"TRIM_ORDER doesn't match the prompt sections: never built {sorted(set(TRIM_ORDER) - built)}, "
+            f"not trimmable {sorted(built - set(TRIM_ORDER))}"
+        )
+    return sorted(built)
+
+def run(latency=0.05, output_words=400, repeats=5, max_workers=generation.PIPELINE_MAX_WORKERS):
+    # End-to-end pipeline latency and concurrency against a stub model with fixed per-call latency
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(db_path=f"{cache_dir}/responses.sqlite3")
+        originals = {attribute: getattr(generation, attribute) for attribute in MODEL_ATTRIBUTES}
+        probe = install_stub_models(latency, output_words, cache)
+        try:
+            trim_sections = check_trim_order(probe, max_workers)
+            runs = [run_once(probe, max_workers) for _ in range(repeats)]
+        finally:
+            for attribute, model in originals.items():
+                setattr(generation, attribute, model)
+
+    last = runs[-1]
+    return {
+        'config': {
+            'latency': latency, 'output_words': output_words, 'repeats': repeats, 'max_workers': max_workers,
+            'assessment_shard_workers': generation.ASSESSMENT_SHARD_WORKERS,
+        },
+        'trim_sections': trim_sections,
+        'end_to_end': summarize([r['end_to_end'] for r in runs]),
+        'stage_duration_median': {
+            name: summarize([r['stages'][name]['duration'] for r in runs])['median'] for name in last['stages']
+        },
+        'first_token_median': {
+            name: summarize([r['stages'][name]['first_token'] or 0.0 for r in runs])['median']
+            for name in last['stages']
+        },
+        'stage_parallelism': summarize([r['stage_parallelism'] for r in runs])['median'],
+        'peak_concurrent_stages': max(r['peak_concurrent_stages'] for r in runs),
+        'peak_concurrent_llm_calls': probe.peak_in_flight,
+        'llm_calls_per_run': last['llm_calls'],
+        'input_tokens_per_run': last['input_tokens'],
+        'output_tokens_per_run': last['output_tokens'],
+    }
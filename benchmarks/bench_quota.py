@@ -0,0 +1,104 @@
+from google.api_core import exceptions as api_exceptions
+
+from benchmarks.common import FakeClock, timed
+from utils.gemini_stub import StubGenerativeModel, StubQuota
+from utils.rate_limit import Deadline, DeadlineExceeded, RateLimitedModel, RateLimiter, RetryBudget
+
+PROMPT = "Summarize the lesson. " * 50
+# Limits well above anything these runs use, for when only the quota should reject calls
+UNLIMITED_RPM = 1e9
+UNLIMITED_TPM = 1e12
+
+
+def expect(actual, expected, step):
+    if actual != expected:
+        raise AssertionError(f"Quota {step}: expected {expected!r}, got {actual!r}")
+
+def limited_model(quota, clock, requests_per_minute=UNLIMITED_RPM, retry_budget=None, **kwargs):
+    # The app's wrapper around a stub model whose API enforces `quota`; all waiting is on `clock`
+    limiter = RateLimiter(requests_per_minute, UNLIMITED_TPM, clock=clock, sleep=clock.sleep)
+    return RateLimitedModel(
+        StubGenerativeModel(quota=quota), limiter, retry_budget or RetryBudget(capacity=100),
+        sleep=clock.sleep, **kwargs
+    )
+
+def call_failure(model, deadline=None, stats=None):
+    # The exception type a call fails with, or None when it succeeds
+    try:
+        model.generate_content(PROMPT, deadline=deadline, stats=stats)
+    except (api_exceptions.ResourceExhausted, DeadlineExceeded) as e:
+        return type(e).__name__
+    return None
+
+def check_retries():
+    # Quota errors are retried until a call gets through
+    clock = FakeClock()
+    quota = StubQuota(fail_first=2, clock=clock)
+    stats = {}
+    expect(call_failure(limited_model(quota, clock, max_attempts=5), stats=stats), None, "retried call")
+    expect((stats['retries'], quota.rejected, quota.accepted), (2, 2, 1), "retries, rejected, accepted")
+    return {'retries': stats['retries'], 'backoff_wait': stats['backoff_wait']}
+
+def check_attempts_exhausted():
+    # After max_attempts the quota error reaches the caller
+    clock = FakeClock()
+    quota = StubQuota(fail_first=10, clock=clock)
+    failure = call_failure(limited_model(quota, clock, max_attempts=3))
+    expect((failure, quota.rejected), ('ResourceExhausted', 3), "attempts exhausted")
+    return {'attempts': quota.rejected}
+
+def check_retry_budget():
+    # An empty retry budget stops retries before max_attempts
+    clock = FakeClock()
+    quota = StubQuota(fail_first=10, clock=clock)
+    model = limited_model(quota, clock, retry_budget=RetryBudget(capacity=2), max_attempts=10)
+    expect((call_failure(model), quota.rejected), ('ResourceExhausted', 3), "retry budget exhausted")
+    expect((call_failure(model), quota.rejected), ('ResourceExhausted', 4), "no retries left in the budget")
+    return {'attempts': quota.rejected}
+
+def check_deadline():
+    # Backoff never sleeps past the caller's deadline
+    clock = FakeClock()
+    quota = StubQuota(fail_first=100, clock=clock)
+    model = limited_model(quota, clock, max_attempts=100, base_delay=1.0, max_delay=30.0)
+    deadline = Deadline(5.0, clock=clock)
+    expect(call_failure(model, deadline=deadline), 'DeadlineExceeded', "deadline")
+    expect(clock.now <= 5.0, True, "time spent within the deadline")
+    return {'attempts': quota.rejected, 'waited': clock.now}
+
+def run_against_quota(calls, quota_rpm, limiter_rpm):
+    # `calls` back-to-back calls against an API allowing quota_rpm, with the app's limiter set to limiter_rpm
+    clock = FakeClock()
+    quota = StubQuota(requests_per_minute=quota_rpm, clock=clock)
+    model = limited_model(quota, clock, requests_per_minute=limiter_rpm, retry_budget=RetryBudget(capacity=20))
+    stats = {}
+    failures = [call_failure(model, stats=stats) for _ in range(calls)]
+    return {
+        'calls': calls,
+        'failed': sum(failure is not None for failure in failures),
+        'rejected': quota.rejected,
+        'retries': stats.get('retries', 0),
+        'rate_limit_wait': stats.get('rate_limit_wait', 0.0),
+        'backoff_wait': stats.get('backoff_wait', 0.0),
+        'simulated_seconds': clock.now,
+    }
+
+def run(calls=60, quota_rpm=20):
+    # Checks retry, retry-budget and deadline handling of RateLimitedModel against StubQuota, then
+    # runs a burst of calls against a requests-per-minute quota with the limiter set to the quota and
+    # with it effectively off. The limiter's bucket starts full, so in the first minute it lets through
+    # up to twice the quota and some calls still back off. Time is simulated, so the waits are what a
+    # real run would spend.
+    results = {
+        'config': {'calls': calls, 'quota_rpm': quota_rpm},
+        'retries': check_retries(),
+        'attempts_exhausted': check_attempts_exhausted(),
+        'retry_budget': check_retry_budget(),
+        'deadline': check_deadline(),
+    }
+    limited, seconds = timed(run_against_quota, calls, quota_rpm, quota_rpm)
+    results['with_limiter'] = dict(limited, seconds=seconds)
+    unlimited, seconds = timed(run_against_quota, calls, quota_rpm, UNLIMITED_RPM)
+    results['without_limiter'] = dict(unlimited, seconds=seconds)
+    expect(limited['rejected'] < unlimited['rejected'], True, "fewer rejections with the limiter")
+    return results
@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from benchmarks.common import summarize, timed
+from utils.reference_cache import ReferenceTextCache
+from utils.reference_corpus import SUPPORTED_EXTENSIONS, ReferenceCorpus, read_docx_text, read_pdf_text, read_plain_text
+
+REFERENCE_FOLDER = 'reference_materials'
+
+
+def reader_for(filename):
+    lower_name = filename.lower()
+    if lower_name.endswith('.pdf'):
+        return read_pdf_text
+    if lower_name.endswith('.docx'):
+        return read_docx_text
+    return read_plain_text
+
+def read_pdf_text_serial(pdf_path):
+    # The extraction used before utils/pdf_extraction.py, kept as the baseline: every page in turn,
+    # appended to one string
+    import fitz as pymupdf
+
+    doc = pymupdf.open(pdf_path)
+    text = ''
+    for page in doc:
+        text += page.get_text()
+    return text
+
+def run_pdf_extraction(paths, repeats, workers):
+    # Serial extraction against page-sharded extraction on a pool of `workers` processes, for each
+    # PDF and for all of them read at once (as ReferenceCorpus does). The pool is started and warmed
+    # before timing, as the app's pool is after its first large PDF.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        read_sharded = lambda path: read_pdf_text(path, pool=pool)
+        for path in paths:
+            if read_sharded(path) != read_pdf_text_serial(path):
+                raise AssertionError(f"Sharded extraction of {path} doesn't match the serial text")
+        files = {}
+        for path in paths:
+            serial = [timed(read_pdf_text_serial, path)[1] for _ in range(repeats)]
+            sharded = [timed(read_sharded, path)[1] for _ in range(repeats)]
+            files[os.path.basename(path)] = {'serial': summarize(serial), 'sharded': summarize(sharded)}
+        serial_all, sharded_all = [], []
+        for _ in range(repeats):
+            serial_all.append(timed(lambda: [read_pdf_text_serial(path) for path in paths])[1])
+            with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+                sharded_all.append(timed(lambda: list(executor.map(read_sharded, paths)))[1])
+    serial_all, sharded_all = summarize(serial_all), summarize(sharded_all)
+    return {
+        'workers': workers,
+        'cpus': os.cpu_count(),
+        'files': files,
+        'all_documents': {
+            'serial': serial_all,
+            'sharded': sharded_all,
+            'speedup': serial_all['median'] / sharded_all['median'],
+        },
+    }
+
+def run(folder=REFERENCE_FOLDER, repeats=3, workers=None):
+    # Raw extraction time per file (no cache), the cost of a warm reference-cache lookup, loading
+    # the whole folder from its digests (reference_digests/) instead, and serial against page-sharded
+    # PDF extraction
+    files = {}
+    for filename in sorted(os.listdir(folder)):
+        if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            continue
+        path = os.path.join(folder, filename)
+        reader = reader_for(filename)
+        samples = []
+        for _ in range(repeats):
+            text, seconds = timed(reader, path)
+            samples.append(seconds)
+        files[filename] = dict(summarize(samples), bytes=os.path.getsize(path), chars=len(text))
+
+    paths = [os.path.join(folder, filename) for filename in files]
+    warm_samples = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ReferenceTextCache(cache_dir=cache_dir)
+        for path in paths:
+            cache.get_text(path, reader_for(path))
+        for _ in range(repeats):
+            _, seconds = timed(lambda: [cache.get_text(path, reader_for(path)) for path in paths])
+            warm_samples.append(seconds)
+
+    digest_samples = []
+    for _ in range(repeats):
+        documents, seconds = timed(lambda: ReferenceCorpus(folder).documents)
+        digest_samples.append(seconds)
+
+    pdf_paths = [path for path in paths if path.lower().endswith('.pdf')]
+    workers = workers or max(2, os.cpu_count() or 1)
+
+    return {
+        'config': {'folder': folder, 'repeats': repeats},
+        'files': files,
+        'cold_total_median': sum(stats['median'] for stats in files.values()),
+        'warm_cache_total': summarize(warm_samples),
+        'digest_load_total': dict(
+            summarize(digest_samples),
+            chars=sum(len(text) for text in documents.values()),
+            raw_chars=sum(stats['chars'] for stats in files.values()),
+        ),
+        'pdf_extraction': run_pdf_extraction(pdf_paths, repeats, workers) if pdf_paths else None,
+    }
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import time
+import zipfile
+from io import BytesIO
+
+from benchmarks.common import profile, summarize, timed
+from benchmarks.fixtures import assessment_markdown, blueprint_markdown
+from utils.documents import DOCUMENT_FILENAMES, create_word_doc, create_zip_with_all_docs, write_zip
+from utils.render_cache import render_cache
+
+DOCUMENT_TITLES = {
+    'blueprint': "Lesson Blueprint",
+    'assessment': "Assessment Items",
+    'media': "Media Suggestions",
+    'reports': "DEI and Fact-check Reports",
+}
+
+
+def throughput(title, content, repeats):
+    # Cold timings clear the render cache first so every call actually renders
+    samples = []
+    for _ in range(repeats):
+        render_cache.clear()
+        buffer, seconds = timed(create_word_doc, title, content)
+        samples.append(seconds)
+    stats = summarize(samples)
+    warm_samples = [timed(create_word_doc, title, content)[1] for _ in range(repeats)]
+    return dict(
+        stats, content_chars=len(content), output_bytes=buffer.getbuffer().nbytes,
+        docs_per_second=1.0 / stats['median'],
+        chars_per_second=len(content) / stats['median'],
+        cached_median=summarize(warm_samples)['median'],
+    )
+
+def batch(lessons):
+    # Every document of a batch export, with distinct content per lesson so nothing comes from the cache
+    render_cache.clear()
+    assessment = assessment_markdown()
+    blueprint = blueprint_markdown()
+    start = time.perf_counter()
+    for lesson in range(lessons):
+        suffix = f"\n\nLesson {lesson}"
+        docs = [create_word_doc(title, content + suffix) for title, content in (
+            ("Lesson Blueprint", blueprint), ("Assessment Items", assessment),
+            ("Media Suggestions", blueprint), ("DEI and Fact-check Reports", blueprint),
+        )]
+        create_zip_with_all_docs(*docs)
+    seconds = time.perf_counter() - start
+    render_cache.clear()
+    return {'lessons': lessons, 'seconds': seconds, 'lessons_per_second': lessons / seconds}
+
+def lesson_documents(lesson=0):
+    # The four rendered documents of one lesson, as buffers
+    assessment = assessment_markdown()
+    blueprint = blueprint_markdown()
+    suffix = f"\n\nLesson {lesson}"
+    return {
+        key: create_word_doc(title, (assessment if key == 'assessment' else blueprint) + suffix)
+        for key, title in DOCUMENT_TITLES.items()
+    }
+
+def deflated_zip(target, members):
+    # The previous archive format, for comparison: DEFLATE over already-compressed .docx bytes
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for filename, data in members.items():
+            zip_file.writestr(filename, data)
+
+def export(lessons):
+    # CPU and peak memory of building the download ZIP for one lesson (in memory, as the app does)
+    # and for a batch export (streamed from the .docx files on disk, as batch mode does)
+    docs = lesson_documents()
+    members = {DOCUMENT_FILENAMES[key]: buffer.getvalue() for key, buffer in docs.items()}
+
+    def single():
+        render_cache.clear()
+        create_zip_with_all_docs(*docs.values())
+
+    results = {
+        'single_lesson': profile(single),
+        'single_lesson_deflated': profile(lambda: deflated_zip(BytesIO(), members)),
+    }
+    with tempfile.TemporaryDirectory() as folder:
+        lesson_paths = []
+        for lesson in range(lessons):
+            paths = {}
+            for key, buffer in lesson_documents(lesson).items():
+                path = paths[DOCUMENT_FILENAMES[key]] = os.path.join(folder, f"{lesson}-{DOCUMENT_FILENAMES[key]}")
+                with open(path, 'wb') as file:
+                    file.write(buffer.getvalue())
+            lesson_paths.append(paths)
+        zip_path = os.path.join(folder, "export.zip")
+
+        def stored_batch():
+            for paths in lesson_paths:
+                write_zip(zip_path, paths)
+
+        def deflated_batch():
+            for paths in lesson_paths:
+                data = {}
+                for filename, path in paths.items():
+                    with open(path, 'rb') as file:
+                        data[filename] = file.read()
+                buffer = BytesIO()
+                deflated_zip(buffer, data)
+                with open(zip_path, 'wb') as file:
+                    file.write(buffer.getvalue())
+
+        results['batch'] = dict(profile(stored_batch), lessons=lessons)
+        results['batch_deflated'] = dict(profile(deflated_batch), lessons=lessons)
+    render_cache.clear()
+    return results
+
+def run(repeats=10, batch_lessons=50):
+    # create_word_doc on a realistic 56-item assessment and a blueprint, the download ZIP and a batch export
+    assessment = assessment_markdown()
+    blueprint = blueprint_markdown()
+    results = {
+        'config': {'repeats': repeats},
+        'assessment_56_items': throughput("Assessment Items", assessment, repeats),
+        'blueprint': throughput("Lesson Blueprint", blueprint, repeats),
+    }
+
+    docs = [create_word_doc(title, content) for title, content in (
+        ("Lesson Blueprint", blueprint), ("Assessment Items", assessment),
+        ("Media Suggestions", blueprint), ("DEI and Fact-check Reports", blueprint),
+    )]
+    samples = []
+    for _ in range(repeats):
+        render_cache.clear()
+        zip_buffer, seconds = timed(create_zip_with_all_docs, *docs)
+        samples.append(seconds)
+    results['zip_all_docs'] = dict(summarize(samples), output_bytes=zip_buffer.getbuffer().nbytes)
+    if batch_lessons:
+        results['batch_export'] = batch(batch_lessons)
+        results['zip_export'] = export(batch_lessons)
+    return results
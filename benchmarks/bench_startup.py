@@ -0,0 +1,95 @@
+"""Cold-start profile of the app: how long each startup phase takes in a fresh process.
+
+    python -m benchmarks.bench_startup --repeats 3
+
+Phases, in the order a new server process goes through them:
+  import_streamlit    importing streamlit itself
+  import_app_modules  importing the app's own modules (and whatever they import at module level)
+  first_script_run    the first run of streamlit_app.py, up to the first rendered page
+  reference_wait      time still spent waiting for the reference materials after that run
+  model_clients       building the five stage models (imports google.generativeai)
+  reference_build     loading the reference materials from scratch, for comparison
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import summarize
+
+PHASES = (
+    'import_streamlit', 'import_app_modules', 'first_script_run', 'reference_wait', 'model_clients', 'reference_build'
+)
+# Phases before the first page is on screen
+RENDER_PATH_PHASES = ('import_streamlit', 'import_app_modules', 'first_script_run')
+APP_MODULES = (
+    'utils.assessment_items', 'utils.documents', 'utils.generation', 'utils.jobs', 'utils.pipeline',
+    'utils.readability', 'utils.reference_cache', 'utils.render_cache', 'utils.response_cache',
+    'utils.style_lint', 'utils.telemetry',
+)
+
+# Runs in the child process; prints the phase timings as JSON
+CHILD_SCRIPT = """
+import importlib, json, sys, time
+phases = {}
+def phase(name, func):
+    start = time.perf_counter()
+    result = func()
+    phases[name] = time.perf_counter() - start
+    return result
+
+phase('import_streamlit', lambda: importlib.import_module('streamlit'))
+from streamlit.testing.v1 import AppTest
+phase('import_app_modules', lambda: [importlib.import_module(name) for name in %(modules)r])
+import utils.generation as generation
+app = phase('first_script_run', lambda: AppTest.from_file('streamlit_app.py', default_timeout=120).run())
+if app.exception:
+    sys.exit(f"streamlit_app.py raised: {app.exception}")
+phase('reference_wait', generation.get_references)
+phase('model_clients', lambda: [generation.stage_model(stage) for stage in generation.STAGE_OUTPUTS])
+from utils.reference_corpus import ReferenceCorpus
+phase('reference_build', lambda: generation.References(ReferenceCorpus(generation.reference_materials_folder)))
+print(json.dumps(phases))
+"""
+
+
+def run_child():
+    # Phase timings of one cold start. The real Gemini backend is used so the client library is
+    # imported, but nothing is sent (the key is a placeholder and context caching is off). The app
+    # gets a job database of its own, so the profile never touches the jobs of a running server.
+    with tempfile.TemporaryDirectory() as job_dir:
+        env = dict(os.environ, GEMINI_BACKEND='gemini', GEMINI_CONTEXT_CACHE='0', GEMINI_API_KEY='startup-profile',
+                   TELEMETRY_DIR='', GENERATION_JOBS_DB=os.path.join(job_dir, 'jobs.sqlite3'))
+        completed = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT % {'modules': APP_MODULES}],
+            capture_output=True, text=True, env=env, check=False,
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup profile failed: {completed.stderr.strip()[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run(repeats=3):
+    samples = [run_child() for _ in range(repeats)]
+    phases = {name: summarize([sample[name] for sample in samples]) for name in PHASES}
+    return {
+        'config': {'repeats': repeats},
+        'phases': phases,
+        'render_path_median': sum(phases[name]['median'] for name in RENDER_PATH_PHASES),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the app's cold start phase by phase.")
+    parser.add_argument('--repeats', type=int, default=3, help="cold starts to measure")
+    args = parser.parse_args(argv)
+    results = run(repeats=args.repeats)
+    for name in PHASES:
+        marker = "  (render path)" if name in RENDER_PATH_PHASES else ""
+        print(f"{name:<20} {results['phases'][name]['median'] * 1000:8.1f} ms{marker}")
+    print(f"{'first page after':<20} {results['render_path_median'] * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
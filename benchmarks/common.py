@@ -0,0 +1,105 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+# Benchmarks never touch the network, Gemini context caches or the app's telemetry files.
+# These must be set before utils.generation is imported.
+os.environ.setdefault("GEMINI_BACKEND", "stub")
+os.environ.setdefault("GEMINI_CONTEXT_CACHE", "0")
+os.environ.setdefault("TELEMETRY_DIR", "")
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class FakeClock:
+    """Settable clock, so lifetimes and backoff can be stepped through without waiting. Its sleep
+    only moves the clock forward."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # A real sleep always lets some time pass; without this, a wait rounded down to nothing
+        # (as a rate limiter's can be) would never end
+        seconds = max(seconds, 1e-6)
+        self.now += seconds
+        self.slept += seconds
+
+
+def timed(func, *args, **kwargs):
+    # (result, seconds) for one call
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def profile(func, *args, **kwargs):
+    # Wall time, CPU time and peak Python heap allocation of one call. Memory is traced on a
+    # separate call because tracemalloc slows everything down.
+    start, cpu_start = time.perf_counter(), time.process_time()
+    func(*args, **kwargs)
+    seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': seconds, 'cpu_seconds': cpu_seconds, 'peak_bytes': peak}
+
+def summarize(samples):
+    # Summary statistics for a list of timings in seconds
+    samples = sorted(samples)
+    return {
+        'runs': len(samples),
+        'min': samples[0],
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'max': samples[-1],
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    return {
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+def write_results(report, output_path=None):
+    # Writes the report to output_path (default results/latest.json) and appends it to
+    # results/history.jsonl so runs from different commits can be compared.
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output_path = output_path or os.path.join(RESULTS_DIR, "latest.json")
+    with open(output_path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    with open(os.path.join(RESULTS_DIR, "history.jsonl"), 'a', encoding='utf-8') as file:
+        file.write(json.dumps(report) + "\n")
+    return output_path
+
+def flatten(results, prefix=''):
+    # {'a': {'b': 1}} -> {'a.b': 1}, numeric leaves only
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
@@ -0,0 +1,67 @@
+from prompts.assessment_items_prompt import ASSESSMENT_ITEMS
+from utils.assessment_merge import merge_items
+
+LESSON_INPUTS = {
+    'lesson_title': "The Trail of Tears",
+    'lesson_info': (
+        "Grade 8 U.S. history lesson on the Indian Removal Act of 1830, the Cherokee Nation's legal "
+        "resistance in Worcester v. Georgia, and the forced removal of the Cherokee in 1838-1839."
+    ),
+    'additional_resources': "Primary sources: Cherokee Memorials (1829), Andrew Jackson's Second Annual Message.",
+}
+
+CHOICES = (
+    "The Cherokee Nation challenged removal in federal court.",
+    "Congress voted to protect Cherokee land claims in Georgia.",
+    "Many Cherokee families were forced to leave their homes, crops, and livestock.",
+    "The federal government paid the full value of the land that was taken.",
+)
+
+
+def assessment_item(number, name, needs_feedback):
+    # One item in the format the assessment prompt asks for
+    lines = [
+        f"**Item {number}: {name}**",
+        "- Analyzing Causes of Removal",
+        "",
+        f"Read the excerpt from a Cherokee memorial. What does the author most want Congress to understand "
+        f"about the effects of the Indian Removal Act on Cherokee families? (Item {number})",
+        "",
+    ]
+    lines += [f"{letter}. {choice}" for letter, choice in zip("ABCD", CHOICES)]
+    lines += ["", "**Correct Answer:** C"]
+    if needs_feedback:
+        lines += [
+            "",
+            "**Feedback:**",
+            "- A: Incorrect. The court case came later and does not describe effects on families.",
+            "- B: Incorrect. Congress passed the act that allowed removal.",
+            "- C: Correct. The memorial describes families losing their homes, crops, and livestock.",
+            "- D: Incorrect. The land was not paid for at its full value.",
+        ]
+    return "\n".join(lines)
+
+def assessment_markdown():
+    # Realistic merged output of the assessment stage: all 56 items under their section headings
+    items = {
+        number: assessment_item(number, name, needs_feedback)
+        for number, (name, needs_feedback) in enumerate(ASSESSMENT_ITEMS, 1)
+    }
+    return merge_items(items)
+
+def blueprint_markdown():
+    # Blueprint-shaped markdown with headings, bullets and a table
+    sections = ["# Lesson Blueprint: The Trail of Tears", "", "## Lesson Question", "",
+                "How did the Cherokee Nation respond to the Indian Removal Act?", ""]
+    for objective in range(1, 4):
+        sections += [
+            f"## Objective {objective}", "",
+            f"**Student-friendly objective:** I can explain cause {objective} of Cherokee removal.", "",
+            "| Segment | Content | DOK |",
+            "| --- | --- | --- |",
+        ]
+        sections += [f"| {segment} | Key idea {segment} about removal policy | {segment % 3 + 1} |" for segment in range(1, 5)]
+        sections += [""]
+        sections += [f"- Supporting point {point} with **vocabulary** terms" for point in range(1, 9)]
+        sections += [""]
+    return "\n".join(sections)
@@ -0,0 +1,95 @@
+"""Offline benchmarks for the generation pipeline, reference extraction, document rendering,
+assessment style linting, app cold start, the Gemini context cache lifecycle and quota error handling.
+
+Runs against the deterministic stub model (no API key or network needed) and writes the
+results as JSON to benchmarks/results/latest.json, appending them to results/history.jsonl.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --only pipeline --latency 0.2 --output-words 800
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.common import environment, flatten, write_results
+from benchmarks import (
+    bench_context_cache, bench_lint, bench_pipeline, bench_quota, bench_references, bench_rendering, bench_startup,
+)
+
+SUITES = ('pipeline', 'references', 'rendering', 'lint', 'startup', 'context_cache', 'quota')
+# Relative change in a timing that is reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.10
+
+
+def load_baseline(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return flatten(json.load(file)['results'])
+
+def compare(current, baseline):
+    # Print timing changes against earlier (flattened) results; returns the number of regressions
+    regressions = 0
+    for name, value in flatten(current).items():
+        previous = baseline.get(name)
+        timing = name.endswith(('.median', '.seconds')) or '_median.' in name
+        if not timing or not previous:
+            continue
+        change = (value - previous) / previous
+        marker = ""
+        if change > REGRESSION_THRESHOLD:
+            marker = "  <-- slower"
+            regressions += 1
+        print(f"{name}: {previous:.4f}s -> {value:.4f}s ({change:+.1%}){marker}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument('--only', choices=SUITES, action='append', help="run only this suite (repeatable)")
+    parser.add_argument('--latency', type=float, default=0.05, help="stub model latency per call, in seconds")
+    parser.add_argument('--output-words', type=int, default=400, help="words in each stub (non-assessment) response")
+    parser.add_argument('--repeats', type=int, default=5, help="runs per measurement")
+    parser.add_argument('--batch-lessons', type=int, default=50, help="lessons in the batch export benchmark (0 skips it)")
+    parser.add_argument('--output', default=None, help="results file (default benchmarks/results/latest.json)")
+    parser.add_argument('--compare', default=None, help="earlier results file to compare timings against")
+    args = parser.parse_args(argv)
+
+    # Read before running, since the baseline may be the results file about to be overwritten
+    baseline = load_baseline(args.compare) if args.compare else None
+    suites = args.only or SUITES
+    results = {}
+    if 'references' in suites:
+        print("Benchmarking reference extraction...")
+        results['references'] = bench_references.run(repeats=args.repeats)
+    if 'rendering' in suites:
+        print("Benchmarking document rendering...")
+        results['rendering'] = bench_rendering.run(repeats=args.repeats * 2, batch_lessons=args.batch_lessons)
+    if 'lint' in suites:
+        print("Benchmarking assessment style linting...")
+        results['lint'] = bench_lint.run(repeats=args.repeats * 2, lessons=args.batch_lessons or 1)
+    if 'startup' in suites:
+        print("Benchmarking app cold start...")
+        results['startup'] = bench_startup.run(repeats=args.repeats)
+    if 'context_cache' in suites:
+        print("Checking the context cache lifecycle...")
+        results['context_cache'] = bench_context_cache.run(repeats=args.repeats)
+    if 'quota' in suites:
+        print("Checking quota error handling...")
+        results['quota'] = bench_quota.run()
+    if 'pipeline' in suites:
+        print("Benchmarking generation pipeline...")
+        results['pipeline'] = bench_pipeline.run(
+            latency=args.latency, output_words=args.output_words, repeats=args.repeats
+        )
+
+    report = {'environment': environment(), 'results': results}
+    path = write_results(report, args.output)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {path}")
+
+    if baseline is not None:
+        return 1 if compare(results, baseline) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Offline build step: normalized digests of the PDF/DOCX reference materials.
+
+Each digest drops running headers, footers and page numbers, collapses whitespace and splits
+the text into sections at its headings. The digests and a manifest tying each one to the
+SHA-256 of its source file go to reference_digests/; the app loads them instead of
+extracting the raw files. Rerun after changing a reference file (or DIGEST_VERSION).
+
+    python build_digests.py
+    python build_digests.py --check   # exit 1 if any digest is missing or out of date
+"""
+import argparse
+import sys
+
+from utils.reference_digest import DIGEST_FOLDER, build_digests, stale_digests
+
+REFERENCE_FOLDER = 'reference_materials'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build normalized digests of the reference materials.")
+    parser.add_argument('--source', default=REFERENCE_FOLDER, help="folder with the reference materials")
+    parser.add_argument('--output', default=DIGEST_FOLDER, help="folder for the digests and their manifest")
+    parser.add_argument('--check', action='store_true', help="only report digests that need rebuilding")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        stale = stale_digests(args.source, args.output)
+        for filename in stale:
+            print(f"out of date: {filename}")
+        print(f"{len(stale)} digest(s) need rebuilding" if stale else "All digests are up to date")
+        return 1 if stale else 0
+
+    manifest = build_digests(args.source, args.output)
+    for filename, entry in manifest['documents'].items():
+        print(f"{filename}: {entry['sections']} sections, {entry['chars']} chars -> {entry['digest']}")
+    print(f"Wrote {len(manifest['documents'])} digest(s) and the manifest to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
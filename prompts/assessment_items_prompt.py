@@ -1,66 +1,130 @@
-def get_prompt(blueprint):
+# Required assessment items in canonical order as (identification, needs feedback); item numbers start at 1
+ASSESSMENT_ITEMS = [
+    ("Instructional Segment 1 Item 1 (Objective 1 DOK Low)", True),
+    ("Instructional Segment 1 Item 2 (Objective 1 DOK Low)", True),
+    ("Instructional Segment 2 Item 1 (Objective 2 DOK Low)", True),
+    ("Instructional Segment 2 Item 2 (Objective 2 DOK Low)", True),
+    ("Instructional Segment 3 Item 1 (Objective 3 DOK High)", True),
+    ("Instructional Segment 3 Item 2 (Objective 3 DOK High)", True),
+    ("Instructional Segment 4 Item 1 (Objective 3 DOK 3)", True),
+    ("Instructional Segment 4 Item 2 (Objective 3 DOK 3)", True),
+    ("Objective 1 DOK 1 SSA Item 1", True),
+    ("Objective 1 DOK 1 SSA Item 2", True),
+    ("Objective 1 DOK 2 SSA Item 1", True),
+    ("Objective 1 DOK 2 SSA Item 2", True),
+    ("Objective 2 DOK 1 SSA Item 1", True),
+    ("Objective 2 DOK 1 SSA Item 2", True),
+    ("Objective 2 DOK 2 SSA Item 1", True),
+    ("Objective 2 DOK 2 SSA Item 2", True),
+    ("Objective 3 DOK 1 SSA Item 1", True),
+    ("Objective 3 DOK 1 SSA Item 2", True),
+    ("Objective 3 DOK 2 SSA Item 1", True),
+    ("Objective 3 DOK 2 SSA Item 2", True),
+    ("Objective 3 DOK 3 SSA Item 1", True),
+    ("Objective 3 DOK 3 SSA Item 2", True),
+    ("Objective 1 DOK 1 Assessment Item 1", False),
+    ("Objective 1 DOK 1 Assessment Item 2", False),
+    ("Objective 1 DOK 1 Assessment Item 3", False),
+    ("Objective 1 DOK 1 Assessment Item 4", False),
+    ("Objective 1 DOK 2 Assessment Item 1", False),
+    ("Objective 1 DOK 2 Assessment Item 2", False),
+    ("Objective 1 DOK 2 Assessment Item 3", False),
+    ("Objective 1 DOK 2 Assessment Item 4", False),
+    ("Objective 1 DOK 2 Assessment Item 5", False),
+    ("Objective 1 DOK 2 Assessment Item 6", False),
+    ("Objective 2 DOK 1 Assessment Item 1", False),
+    ("Objective 2 DOK 1 Assessment Item 2", False),
+    ("Objective 2 DOK 1 Assessment Item 3", False),
+    ("Objective 2 DOK 1 Assessment Item 4", False),
+    ("Objective 2 DOK 2 Assessment Item 1", False),
+    ("Objective 2 DOK 2 Assessment Item 2", False),
+    ("Objective 2 DOK 2 Assessment Item 3", False),
+    ("Objective 2 DOK 2 Assessment Item 4", False),
+    ("Objective 2 DOK 2 Assessment Item 5", False),
+    ("Objective 2 DOK 2 Assessment Item 6", False),
+    ("Objective 3 DOK 1 Assessment Item 1", False),
+    ("Objective 3 DOK 1 Assessment Item 2", False),
+    ("Objective 3 DOK 1 Assessment Item 3", False),
+    ("Objective 3 DOK 1 Assessment Item 4", False),
+    ("Objective 3 DOK 2 Assessment Item 1", False),
+    ("Objective 3 DOK 2 Assessment Item 2", False),
+    ("Objective 3 DOK 2 Assessment Item 3", False),
+    ("Objective 3 DOK 2 Assessment Item 4", False),
+    ("Objective 3 DOK 2 Assessment Item 5", False),
+    ("Objective 3 DOK 2 Assessment Item 6", False),
+    ("Objective 3 DOK 3 Assessment Item 1", False),
+    ("Objective 3 DOK 3 Assessment Item 2", False),
+    ("Objective 3 DOK 3 Assessment Item 3", False),
+    ("Objective 3 DOK 3 Assessment Item 4", False),
+]
+
+# Sections of the assessment output and the item numbers that belong to each
+ASSESSMENT_SECTIONS = [
+    ("Instructional Segment Items", [n for n, (name, _) in enumerate(ASSESSMENT_ITEMS, 1) if name.startswith("Instructional Segment")]),
+    ("Self-Study Assignment Items", [n for n, (name, _) in enumerate(ASSESSMENT_ITEMS, 1) if " SSA Item " in name]),
+    ("Assessment Items", [n for n, (name, _) in enumerate(ASSESSMENT_ITEMS, 1) if " Assessment Item " in name]),
+]
+
+
+# Response schema for the items (Gemini JSON mode): an array with one object per requested item
+ITEM_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "item_number": {"type": "integer"},
+            "objective": {"type": "integer"},
+            "dok": {"type": "string"},
+            "item_type": {"type": "string", "enum": ["multiple_choice", "multiple_select"]},
+            "header": {"type": "string"},
+            "stem": {"type": "string"},
+            "choices": {"type": "array", "items": {"type": "string"}},
+            "correct_answers": {"type": "array", "items": {"type": "string"}},
+            "feedback": {"type": "string"},
+        },
+        "required": [
+            "item_number", "objective", "dok", "item_type", "header", "stem", "choices", "correct_answers", "feedback"
+        ],
+    },
+}
+
+
+def get_item_shards():
+    # Independent generation units: instructional segment items, SSA items per objective,
+    # and assessment items per objective/DOK. Returns lists of item numbers in canonical order.
+    shards = {}
+    for number, (name, _) in enumerate(ASSESSMENT_ITEMS, 1):
+        if name.startswith("Instructional Segment"):
+            key = "instructional"
+        elif " SSA Item " in name:
+            key = "ssa " + name.split(" DOK ")[0]
+        else:
+            key = "assessment " + name.split(" Assessment Item ")[0]
+        shards.setdefault(key, []).append(number)
+    return list(shards.values())
+
+
+def get_prompt(blueprint, item_numbers=None, corrections=None):
+    # item_numbers selects a subset (shard) of ASSESSMENT_ITEMS; by default all items are requested.
+    # corrections maps item number -> problems with a previous attempt at that item.
+    item_numbers = item_numbers or range(1, len(ASSESSMENT_ITEMS) + 1)
+    item_list = "\n".join(
+        f"    {number}. {ASSESSMENT_ITEMS[number - 1][0]}"
+        + (" - needs Feedback" if ASSESSMENT_ITEMS[number - 1][1] else "")
+        for number in item_numbers
+    )
+    correction_list = ""
+    if corrections:
+        correction_list = "\n      ### Corrections (a previous attempt at these items was rejected; fix these problems):\n\n" + "\n".join(
+            f"    - Item {number}: {'; '.join(problems)}" for number, problems in sorted(corrections.items())
+        ) + "\n"
     return f"""
     Using the following Lesson Blueprint, generate a comprehensive set of assessment items that align with the lesson's learning objectives. The assessment items must follow the exact structure and specifications provided below.
 
-      ### Required Assessment Items (Generate ALL of these):
+      ### Required Assessment Items (Generate ALL of these, and only these):
     
-    1. Instructional Segment 1 Item 1 (Objective 1 DOK Low) - needs Feedback
-    2. Instructional Segment 1 Item 2 (Objective 1 DOK Low) - needs Feedback
-    3. Instructional Segment 2 Item 1 (Objective 2 DOK Low) - needs Feedback
-    4. Instructional Segment 2 Item 2 (Objective 2 DOK Low) - needs Feedback
-    5. Instructional Segment 3 Item 1 (Objective 3 DOK High) - needs Feedback
-    6. Instructional Segment 3 Item 2 (Objective 3 DOK High) - needs Feedback
-    7. Instructional Segment 4 Item 1 (Objective 3 DOK 3) - needs Feedback
-    8. Instructional Segment 4 Item 2 (Objective 3 DOK 3) - needs Feedback
-    9. Objective 1 DOK 1 SSA Item 1 - needs Feedback
-    10. Objective 1 DOK 1 SSA Item 2 - needs Feedback
-    11. Objective 1 DOK 2 SSA Item 1 - needs Feedback
-    12. Objective 1 DOK 2 SSA Item 2 - needs Feedback
-    13. Objective 2 DOK 1 SSA Item 1 - needs Feedback
-    14. Objective 2 DOK 1 SSA Item 2 - needs Feedback
-    15. Objective 2 DOK 2 SSA Item 1 - needs Feedback
-    16. Objective 2 DOK 2 SSA Item 2 - needs Feedback
-    17. Objective 3 DOK 1 SSA Item 1 - needs Feedback
-    18. Objective 3 DOK 1 SSA Item 2 - needs Feedback
-    19. Objective 3 DOK 2 SSA Item 1 - needs Feedback
-    20. Objective 3 DOK 2 SSA Item 2 - needs Feedback
-    21. Objective 3 DOK 3 SSA Item 1 - needs Feedback
-    22. Objective 3 DOK 3 SSA Item 2 - needs Feedback
-    23. Objective 1 DOK 1 Assessment Item 1
-    24. Objective 1 DOK 1 Assessment Item 2
-    25. Objective 1 DOK 1 Assessment Item 3
-    26. Objective 1 DOK 1 Assessment Item 4
-    27. Objective 1 DOK 2 Assessment Item 1
-    28. Objective 1 DOK 2 Assessment Item 2
-    29. Objective 1 DOK 2 Assessment Item 3
-    30. Objective 1 DOK 2 Assessment Item 4
-    31. Objective 1 DOK 2 Assessment Item 5
-    32. Objective 1 DOK 2 Assessment Item 6
-    33. Objective 2 DOK 1 Assessment Item 1
-    34. Objective 2 DOK 1 Assessment Item 2
-    35. Objective 2 DOK 1 Assessment Item 3
-    36. Objective 2 DOK 1 Assessment Item 4
-    37. Objective 2 DOK 2 Assessment Item 1
-    38. Objective 2 DOK 2 Assessment Item 2
-    39. Objective 2 DOK 2 Assessment Item 3
-    40. Objective 2 DOK 2 Assessment Item 4
-    41. Objective 2 DOK 2 Assessment Item 5
-    42. Objective 2 DOK 2 Assessment Item 6
-    43. Objective 3 DOK 1 Assessment Item 1
-    44. Objective 3 DOK 1 Assessment Item 2
-    45. Objective 3 DOK 1 Assessment Item 3
-    46. Objective 3 DOK 1 Assessment Item 4
-    47. Objective 3 DOK 2 Assessment Item 1
-    48. Objective 3 DOK 2 Assessment Item 2
-    49. Objective 3 DOK 2 Assessment Item 3
-    50. Objective 3 DOK 2 Assessment Item 4
-    51. Objective 3 DOK 2 Assessment Item 5
-    52. Objective 3 DOK 2 Assessment Item 6
-    53. Objective 3 DOK 3 Assessment Item 1
-    54. Objective 3 DOK 3 Assessment Item 2
-    55. Objective 3 DOK 3 Assessment Item 3
-    56. Objective 3 DOK 3 Assessment Item 4
-
+{item_list}
+{correction_list}
     ### Social Studies DOK Level Guidelines:
     - DOK 1 (Recall of Information): Items ask students to recall facts, terms, concepts, trends, generalizations, and theories. May require students to recognize or identify specific information contained in maps, charts, tables, graphs, or other graphics. Items typically ask who, what, when, and where. Simple "describe" and "explain" tasks that require only recitation or reproduction of information are DOK 1.
     
@@ -105,35 +169,21 @@ def get_prompt(blueprint):
     >>>Lesson Blueprint:
     {blueprint}
 
-    Provide the assessment items in a structured format with clear sections for:
-    1. Instructional Segment Items (with feedback)
-    2. Self-Study Assignment Items (with feedback)
-    3. Assessment Items
-
-    For each item, include:
-    - Clear item number and identification (e.g., "Instructional Segment 1 Item 1")
-    - The gerund phrase header
-    - The question
-    - Answer choices (labeled A, B, C, D or A, B, C, D, E for multiple select)
-    - Correct answer(s) clearly indicated
-    - Feedback (for items that require it)
-    - Clear indication of which objective and DOK level each item addresses
-    
-    Example format for an item with feedback:
-    
-    **Instructional Segment 1 Item 1 (Objective 1, DOK Level 1)**
-    - Identifying Geographic Features
-    
-    
-    Which statement correctly describes a key characteristic of Alabama's Coastal Plain region?
-    
-    A. It's a mountainous region with diverse flora and fauna. 
-    B. It features rolling hills and fertile valleys. 
-    C. It's characterized by flat, low-lying land with sandy soil and swamps. 
-    D. It has high elevations and a cooler climate than other regions.
-    
-    Correct Answer: C
-    
-    Feedback: The Coastal Plain region is defined by its low elevation and flat terrain near the Gulf of Mexico.
-    ----
+    Return the items as a JSON array with one object per requested item, in the order listed above. Each object has:
+    - "item_number": the item's number from the list above
+    - "objective": the number of the objective the item addresses
+    - "dok": the item's DOK level exactly as written in its identification (e.g. "1", "2", "3", "Low" or "High")
+    - "item_type": "multiple_choice" (4 answer choices, 1 correct) or "multiple_select" (5 answer choices, 2-3 correct)
+    - "header": the gerund phrase header
+    - "stem": the question
+    - "choices": the answer choices in order, without "A." style labels
+    - "correct_answers": the letters of the correct choices (e.g. ["C"] or ["A", "D"])
+    - "feedback": the feedback for items that need it, otherwise an empty string
+
+    Example of an item with feedback:
+
+    {{"item_number": 1, "objective": 1, "dok": "Low", "item_type": "multiple_choice", "header": "Identifying Geographic Features", "stem": "Which statement correctly describes a key characteristic of Alabama's Coastal Plain region?", "choices": ["It's a mountainous region with diverse flora and fauna.", "It features rolling hills and fertile valleys.", "It's characterized by flat, low-lying land with sandy soil and swamps.", "It has high elevations and a cooler climate than other regions."], "correct_answers": ["C"], "feedback": "The Coastal Plain region is defined by its low elevation and flat terrain near the Gulf of Mexico."}}
+
+    ### Additional DEI Considerations
+    Please ensure your assessment items follow the DEI guidelines provided in the reference materials.
     """
\ No newline at end of file
@@ -1,13 +1,39 @@
-def get_prompt(blueprint, assessment, media_suggestions, reference_content):
+ALIGNMENT_RATINGS = ["Strong", "Moderate", "Needs Improvement"]
+
+# Response schema for the review of one part of the lesson (Gemini JSON mode); the reviews of all
+# parts are merged into one report (utils/review_merge.py)
+DEI_CHECK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "alignment_rating": {"type": "string", "enum": ALIGNMENT_RATINGS},
+        "topics": {"type": "array", "items": {"type": "string"}},
+        "findings": {"type": "array", "items": {"type": "string"}},
+        "recommendations": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "recommendation": {"type": "string"},
+                    "rationale": {"type": "string"},
+                },
+                "required": ["recommendation", "rationale"],
+            },
+        },
+        "positive_examples": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["alignment_rating", "topics", "findings", "recommendations", "positive_examples"],
+}
+
+
+def get_prompt(lesson_overview, part, content):
+    # Review of one part of the lesson (a few blueprint sections, a group of assessment items or
+    # media entries); lesson_overview is the head of the blueprint, for context
     return f"""
-    ## Reference Materials ##
-    {reference_content}
-
     ## Context ##
     You are a DEI content review assistant trained to support the development of inclusive, accurate, and respectful Social Studies curriculum. Your review must follow Imagine Learning's DEI Content Development Guidelines as well as the Social Studies-specific DEI guidance provided in the reference materials above, which emphasize diverse representation, critical analysis, factual grounding, and awareness of historical complexity. This review is intended to support curriculum developers and reviewers—who may vary in their familiarity with DEI principles—in strengthening their materials.
 
     ## Objective ##
-    Your task is to review the provided Social Studies content (lesson blueprint, assessment items, and media suggestions) and determine how well it aligns with DEI expectations for the Social Studies space. Perform the following steps:
+    Your task is to review one part of a Social Studies lesson ({part}) and determine how well it aligns with DEI expectations for the Social Studies space. The other parts of the lesson (blueprint, assessment items, and media suggestions) are reviewed separately, and the lesson overview is there for context. Perform the following steps:
 
     >>> STEP 1: Identify the relevant DEI-related topics the content touches on (e.g., racism, nationalism, gender roles, religion, immigration, socioeconomic status, etc.).
     NOTE: Use the "DEI Content Authoring Guidelines" in the reference materials to better understand these topics. For each DEI-Topic there is a "[DEI-topic]: Overview" and "[DEI-topic]: Examples and Non-Examples" page that will help you better understand the nuances of this content. 
@@ -39,34 +65,19 @@ def get_prompt(blueprint, assessment, media_suggestions, reference_content):
     Curriculum developers, editors, instructional designers, and reviewers. They may come from varied content backgrounds and levels of DEI fluency. Keep language accessible and informative.
 
     ## Response ##
-    Return your review using this structure:
-
-    ## DEI Review Summary ##
-
-    **Overall Alignment Rating**:  [Strong ✅ | Moderate ⚠️ | Needs Improvement 🛑]
-
-    **Relevant DEI-Topics**:  
-    [List key themes from the DEI and SS guidance]
-
-    **Findings**:  
-    - [List key strengths or concerns in the content]
-    - [Note any areas of bias, exclusion, or misleading framing]
-
-    **Recommendations**:  
-    - [Proposed edits or additions with rationale]
-    - [Suggestions for enhancing voice/perspective diversity]
-
-    **Positive Examples**:  
-    - [Optional: highlight inclusive framing, representation, or language]
-
-    ### Content to Review:
-    
-    #### Lesson Blueprint:
-    {blueprint}
-    
-    #### Assessment Items:
-    {assessment}
-    
-    #### Media Suggestions:
-    {media_suggestions}
-    """
\ No newline at end of file
+    Respond with a JSON object with these fields:
+
+    - "alignment_rating": how well this part aligns with the DEI guidance ("Strong", "Moderate" or "Needs Improvement")
+    - "topics": the relevant DEI-topics this part touches on (STEP 1), as short names
+    - "findings": key strengths or concerns, including any areas of bias, exclusion, omitted context, or misleading framing (STEPS 2 and 3)
+    - "recommendations": one object per proposed edit, reframing, or addition (STEP 4), with:
+      - "recommendation": the edit, quoting the text it changes where applicable
+      - "rationale": a brief rationale grounded in the DEI and Social Studies guidelines (STEP 5)
+    - "positive_examples": inclusive framing, representation, or language worth keeping (STEP 6; may be empty)
+
+    ### Lesson Overview:
+    {lesson_overview}
+
+    ### Content to Review ({part}):
+    {content}
+    """
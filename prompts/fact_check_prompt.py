@@ -1,50 +1,65 @@
-def get_prompt(blueprint, assessment, media_suggestions):
+ACCURACY_RATINGS = ["Highly Accurate", "Generally Accurate with Minor Issues", "Contains Significant Inaccuracies"]
+IMPORTANCE_LEVELS = ["Low", "Medium", "High"]
+
+# Response schema for the review of one part of the lesson (Gemini JSON mode); the reviews of all
+# parts are merged into one report (utils/review_merge.py)
+FACT_CHECK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "accuracy_rating": {"type": "string", "enum": ACCURACY_RATINGS},
+        "summary": {"type": "string"},
+        "issues": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "original_text": {"type": "string"},
+                    "report": {"type": "string"},
+                    "corrected_text": {"type": "string"},
+                    "importance": {"type": "string", "enum": IMPORTANCE_LEVELS},
+                },
+                "required": ["original_text", "report", "corrected_text", "importance"],
+            },
+        },
+        "verification_needs": {"type": "array", "items": {"type": "string"}},
+        "recommendations": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["accuracy_rating", "summary", "issues", "verification_needs", "recommendations"],
+}
+
+
+def get_prompt(lesson_overview, part, content):
+    # Review of one part of the lesson (a few blueprint sections, a group of assessment items or
+    # media entries); lesson_overview is the head of the blueprint, for context
     return f"""
     ## Context ##
-    You are an expert educational content reviewer specializing in fact-checking social studies materials. Your task is to carefully examine the provided lesson content for factual accuracy.
+    You are an expert educational content reviewer specializing in fact-checking social studies materials. Your task is to carefully examine one part of a lesson's content for factual accuracy. The other parts of the lesson are reviewed separately.
 
     ## Objective ##
-    Review the provided lesson blueprint, assessments, and media suggestions to identify and report on any potential factual inaccuracies, misleading information, or content that requires verification.
+    Review the provided part of the lesson ({part}) to identify and report on any potential factual inaccuracies, misleading information, or content that requires verification. Only report on the content to review; the lesson overview is there for context.
 
     ## Style ##
     Thorough, objective, and constructive. Focus on specific factual issues rather than stylistic concerns.
 
     ## Response ##
-    Provide a structured fact-check report with the following sections:
-
-    1. **Overall Accuracy Assessment**
-       - Brief summary of the content's factual reliability (1-2 paragraphs)
-       - Overall accuracy rating (Highly Accurate, Generally Accurate with Minor Issues, Contains Significant Inaccuracies)
-
-    2. **Specific Factual Issues** (if any)
-       - For each potential factual issue, provide:
-         
-         "\\"[original text]\\""
-         
-         Fact-checking Report: [description of the issue with citations to reliable sources]
-         
-         "\\"[corrected version]\\""
-         
-         Note: The corrected version should contain the complete paragraph or item being revised, not just the corrected portion.
-         
-         Importance level: [Low, Medium, High]
-
-    3. **Verification Needs**
-       - Identify any claims or information that should be verified before finalizing
-       - Suggest reliable sources for verification
-
-    4. **Additional Recommendations**
-       - Suggest any additions or modifications that would improve factual accuracy
-       - Note any areas where additional context would prevent misunderstanding
-
-    ### Content to Review:
-    
-    #### Lesson Blueprint:
-    {blueprint}
-    
-    #### Assessment Items:
-    {assessment}
-    
-    #### Media Suggestions:
-    {media_suggestions}
-    """
\ No newline at end of file
+    Respond with a JSON object with these fields:
+
+    - "accuracy_rating": the factual reliability of this part ("Highly Accurate", "Generally Accurate with Minor Issues" or "Contains Significant Inaccuracies")
+    - "summary": a brief summary of this part's factual reliability (1-3 sentences)
+    - "issues": one object per potential factual issue (an empty list if there are none), with:
+      - "original_text": the original text, quoted exactly
+      - "report": a description of the issue with citations to reliable sources
+      - "corrected_text": the corrected version. It should contain the complete paragraph or item being revised, not just the corrected portion.
+      - "importance": "Low", "Medium" or "High"
+    - "verification_needs": claims or information that should be verified before finalizing, with reliable sources for verification
+    - "recommendations": additions or modifications that would improve factual accuracy, and areas where additional context would prevent misunderstanding
+
+    ### Lesson Overview:
+    {lesson_overview}
+
+    ### Content to Review ({part}):
+    {content}
+
+    ### Additional Context
+    While conducting the fact check, please be aware of the DEI guidelines provided in the reference materials.
+    """
@@ -1,8 +1,5 @@
-def get_prompt(reference_content, lesson_info, additional_resources, lesson_title):
+def get_prompt(lesson_info, additional_resources, lesson_title):
     return f"""
-    ### Reference Materials
-    {reference_content}
-
     ### Context
     You are an AI instructional designer creating detailed lesson blueprints for middle and high school social studies lessons.
 
@@ -97,4 +94,7 @@ def get_prompt(reference_content, lesson_info, additional_resources, lesson_titl
 
     **Additional Notes**  
     - Recommendations for extension activities, multimedia resources, or formative assessment practices.
+
+    ### Additional DEI Considerations
+    Please ensure your lesson blueprint incorporates the DEI guidelines provided in the reference materials.
     """
\ No newline at end of file
@@ -37,4 +37,7 @@ def get_prompt(blueprint, assessment):
 
     ### Provided Assessment Items:
     {assessment}
+
+    ### Additional DEI Considerations
+    Please ensure your media suggestions follow the DEI guidelines provided in the reference materials.
     """
\ No newline at end of file
@@ -0,0 +1,15 @@
+def get_prompt(dei_reference_content, blueprint_reference_content=None):
+    # Shared, stable prefix for every pipeline stage; keep per-lesson text out of it so it can be cached
+    blueprint_section = ""
+    if blueprint_reference_content:
+        blueprint_section = f"""
+    #### CCAG-EdgeEX Lesson Blueprinting-270325-194434
+    {blueprint_reference_content}
+    """
+    return f"""
+    ### Reference Materials
+    The following reference materials apply to every task in this conversation.
+    {blueprint_section}
+    #### DEI Guidelines
+    {dei_reference_content}
+    """
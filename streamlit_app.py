@@ -1,22 +1,30 @@
 import streamlit as st
 import os
-import fitz as pymupdf
-from docx import Document
 from dotenv import load_dotenv
-import google.generativeai as genai
-from io import BytesIO
-from docx.shared import Pt
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-import re
-import zipfile  # Add this import at the top of your file
-import threading  # Add this import for threading
-
-# Import the prompt function from the prompts directory
-from prompts.lesson_blueprint_prompt import get_prompt
-from prompts.assessment_items_prompt import get_prompt as get_assessment_prompt
-from prompts.media_suggestions_prompt import get_prompt as get_media_prompt
-from prompts.fact_check_prompt import get_prompt as get_fact_check_prompt
-from prompts.dei_check_prompt import get_prompt as get_dei_check_prompt
+
+from utils.assessment_items import items_from_markdown
+from utils.documents import DOCUMENT_FILENAMES, ZIP_FILENAME, create_word_doc, create_zip_with_all_docs, reports_content
+from utils.generation import (
+    STAGE_OUTPUTS,
+    USE_CONTEXT_CACHE,
+    build_generation_pipeline,
+    configure_gemini,
+    get_context_cache_manager,
+    reusable_outputs,
+    stages_invalidated_by,
+    warm_references,
+)
+from utils.jobs import COMPLETED, FAILED, FINISHED_STATUSES, INTERRUPTED, job_runner, job_store
+from utils.pipeline import SUCCEEDED
+from utils.readability import item_readability_problems, lesson_grade, objective_readability_problems
+from utils.reference_cache import reference_cache
+from utils.render_cache import render_cache
+from utils.response_cache import response_cache
+from utils.style_lint import lint_items
+from utils.telemetry import telemetry, waterfall_lines
+
+# How often a running generation job is polled and its streamed output redrawn
+JOB_POLL_SECONDS = 0.5
 
 
 # Load environment variables
@@ -27,13 +35,10 @@ if not genai_api_key:
     st.error("GEMINI_API_KEY not found. Please check your .env file.")
     st.stop()
 
-genai.configure(api_key=genai_api_key)
-# Model instances
-blueprint_model = genai.GenerativeModel("gemini-1.5-flash")
-assessment_model = genai.GenerativeModel("gemini-1.5-flash")
-media_model = genai.GenerativeModel("gemini-1.5-flash")  
-fact_check_model = genai.GenerativeModel("gemini-1.5-flash")  
-dei_check_model = genai.GenerativeModel("gemini-1.5-flash") 
+# The Gemini client library is imported and configured when the first model is built
+configure_gemini(genai_api_key)
+# Reference materials load on a background thread while the page renders
+warm_references()
 
 
 # Initialize session state variables if they don't exist
@@ -49,6 +54,28 @@ if 'dei_check_output' not in st.session_state:
     st.session_state.dei_check_output = None
 if 'has_generated' not in st.session_state:
     st.session_state.has_generated = False
+if 'prompt_token_report' not in st.session_state:
+    st.session_state.prompt_token_report = {}
+if 'stage_timing_report' not in st.session_state:
+    st.session_state.stage_timing_report = {}
+if 'telemetry_run_id' not in st.session_state:
+    st.session_state.telemetry_run_id = None
+# Stage -> (hash of the stage's inputs, output), used to reuse outputs whose inputs haven't changed
+if 'stage_records' not in st.session_state:
+    st.session_state.stage_records = {}
+if 'regenerate_stage' not in st.session_state:
+    st.session_state.regenerate_stage = None
+# Generation job this session shows, and the last one whose results were loaded. Generation runs in a
+# background job; the ?job= URL parameter lets a refreshed or reopened page reattach to it.
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = st.query_params.get('job')
+    st.session_state.loaded_job_id = None
+    attached_job = job_store.get(st.session_state.job_id) if st.session_state.job_id else None
+    if attached_job is not None:
+        # Restore the inputs too, so regenerating a stage reuses the rest of the attached job
+        st.session_state.lesson_title = attached_job['inputs']['lesson_title']
+        st.session_state.lesson_info = attached_job['inputs']['lesson_info']
+        st.session_state.additional_resources = attached_job['inputs']['additional_resources']
 
 # Add reset function
 def reset_outputs():
@@ -58,392 +85,241 @@ def reset_outputs():
     st.session_state.fact_check_output = None
     st.session_state.dei_check_output = None
     st.session_state.has_generated = False
+    st.session_state.prompt_token_report = {}
+    st.session_state.stage_timing_report = {}
+    st.session_state.telemetry_run_id = None
+    st.session_state.stage_records = {}
+    st.session_state.regenerate_stage = None
+    st.session_state.job_id = None
+    st.session_state.loaded_job_id = None
+    st.query_params.clear()
+
+# Regenerate one stage (and everything that depends on it) on the next run, keeping the rest
+def request_regeneration(stage):
+    st.session_state.regenerate_stage = stage
+
+def attach_job(job_id):
+    st.session_state.job_id = job_id
+    st.session_state.loaded_job_id = None
+    st.query_params['job'] = job_id
+
+def load_job_results(job):
+    # Copy a finished job's outputs and reports into session state
+    for stage, record in job['stages'].items():
+        if record['output'] is not None:
+            setattr(st.session_state, STAGE_OUTPUTS[stage][0], record['output'])
+    st.session_state.stage_records = {
+        stage: (record['input_hash'], record['output']) for stage, record in job['stages'].items()
+        if record['status'] == SUCCEEDED and record['input_hash']
+    }
+    report = job['report'] or {}
+    st.session_state.stage_timing_report = report.get('stage_timing', {})
+    st.session_state.prompt_token_report = report.get('token_usage', {})
+    st.session_state.telemetry_run_id = report.get('telemetry_run_id')
+    st.session_state.has_generated = True
+    st.session_state.loaded_job_id = job['id']
+
+
+def regenerate_button(stage):
+    # Per-tab action that reruns just this stage and the stages that depend on it
+    dependents = stages_invalidated_by(stage)
+    help_text = "Also regenerates: " + ", ".join(dependents) if dependents else "Nothing else depends on this output"
+    st.button(
+        "🔄 Regenerate", key=f"regenerate_{stage}_btn", on_click=request_regeneration, args=(stage,), help=help_text
+    )
 
 
-# Helper functions
-def extract_text_from_pdf(pdf_path):
-    try:
-        doc = pymupdf.open(pdf_path)
-        text = ''
-        for page in doc:
-            text += page.get_text()
-        return text
-    except Exception as e:
-        return f"Error reading PDF ({pdf_path}): {str(e)}"
-
-def extract_text_from_docx(docx_path):
-    try:
-        doc = Document(docx_path)
-        return "\n".join([para.text for para in doc.paragraphs])
-    except Exception as e:
-        return f"Error reading DOCX ({docx_path}): {str(e)}"
-
-def load_reference_materials(folder_path):
-    reference_texts = []
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
-        if filename.lower().endswith('.pdf'):
-            text = extract_text_from_pdf(file_path)
-        elif filename.lower().endswith(('.txt', '.md')):
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read()
-        elif filename.lower().endswith('.docx'):
-            text = extract_text_from_docx(file_path)
-        else:
-            continue
-        reference_texts.append(f"Document: {filename}\n{text}\n\n")
-    return "\n".join(reference_texts)
-
-# Updated function to load specific reference materials (PDF and DOCX)
-def load_dei_reference_materials(folder_path):
-    dei_reference_texts = []
-    target_files = ["Subject Specific Guidelines-Social Studies", "DEI Content Authoring Guidelines"]
-    
-    for filename in os.listdir(folder_path):
-        # Check if the filename contains any of the target file names
-        if any(target_file in filename for target_file in target_files):
-            file_path = os.path.join(folder_path, filename)
-            
-            # Process based on file extension
-            if filename.lower().endswith('.pdf'):
-                text = extract_text_from_pdf(file_path)
-            elif filename.lower().endswith('.docx'):
-                text = extract_text_from_docx(file_path)
-            else:
-                continue
-                
-            dei_reference_texts.append(f"Document: {filename}\n{text}\n\n")
-    
-    return "\n".join(dei_reference_texts)
-
-# Function to load specific blueprint reference material
-def load_blueprint_reference(folder_path):
-    target_file = "CCAG-EdgeEX Lesson Blueprinting-270325-194434"
-    
-    for filename in os.listdir(folder_path):
-        if target_file in filename:
-            file_path = os.path.join(folder_path, filename)
-            if filename.lower().endswith('.pdf'):
-                return extract_text_from_pdf(file_path)
-            elif filename.lower().endswith('.docx'):
-                return extract_text_from_docx(file_path)
-    
-    # If file not found, return an empty string or a message
-    return "Blueprint reference file not found."
-
-
-# Load reference materials
-reference_materials_folder = 'reference_materials'
-reference_content = load_reference_materials(reference_materials_folder)
-
-# Load DEI-specific reference materials
-dei_reference_content = load_dei_reference_materials(reference_materials_folder)
-
-# Load blueprint-specific reference material
-blueprint_reference_content = load_blueprint_reference(reference_materials_folder)
-
 # Streamlit page setup
 st.set_page_config(page_title="Lesson Blueprint Generator", layout="wide")
 st.title("Lesson Blueprint, Assessment, and Media Suggestion Generator")
 
 # Input fields
 lesson_title = st.text_input("Lesson Title", key="lesson_title")
-lesson_info = st.text_area("Lesson Information", height=200)
-additional_resources = st.text_area("Additional Resources", height=100)
+lesson_info = st.text_area("Lesson Information", height=200, key="lesson_info")
+additional_resources = st.text_area("Additional Resources", height=100, key="additional_resources")
 
 
-# Instruction prompt for Lesson Blueprint Generation
-def create_lesson_blueprint(lesson_title, lesson_info, additional_resources, blueprint_reference_content):
-    # Get the prompt from the imported function, using the specific blueprint reference
-    prompt = get_prompt(blueprint_reference_content, lesson_info, additional_resources, lesson_title)
-    
-    # Add DEI reference materials to consider
-    prompt += f"""
-    
-    ### Additional DEI Considerations
-    Please ensure your lesson blueprint incorporates these DEI guidelines:
-    {dei_reference_content}
-    """
-    
-    try:
-        response = blueprint_model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return f"Error generating content: {str(e)}"
-
-# Instruction prompt for Assessment Items Generation
-def create_assessment_items(blueprint):
-    prompt = get_assessment_prompt(blueprint)
-    
-    # Add DEI reference materials to consider
-    prompt += f"""
-    
-    ### Additional DEI Considerations
-    Please ensure your assessment items follow these DEI guidelines:
-    {dei_reference_content}
-    """
-    
-    try:
-        response = assessment_model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return f"Error generating assessment items: {str(e)}"
-
-# Instruction prompt for Media Suggestions Generation
-def create_media_suggestions(blueprint, assessment):
-    prompt = get_media_prompt(blueprint, assessment)
-    
-    # Add DEI reference materials to consider
-    prompt += f"""
-    
-    ### Additional DEI Considerations
-    Please ensure your media suggestions follow these DEI guidelines:
-    {dei_reference_content}
-    """
-    
-    try:
-        response = media_model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return f"Error generating media suggestions: {str(e)}"
-    
-# Functions for fact checking and DEI checking
-def create_fact_check(blueprint, assessment, media_suggestions):
-    prompt = get_fact_check_prompt(blueprint, assessment, media_suggestions)
-    
-    # Add DEI reference materials for context
-    prompt += f"""
-    
-    ### Additional Context
-    While conducting the fact check, please be aware of these DEI guidelines:
-    {dei_reference_content}
-    """
-    
-    try:
-        response = fact_check_model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return f"Error generating fact check: {str(e)}"
-
-def create_dei_check(blueprint, assessment, media_suggestions):
-    prompt = get_dei_check_prompt(blueprint, assessment, media_suggestions, dei_reference_content)
-    try:
-        response = dei_check_model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return f"Error generating DEI check: {str(e)}"
-
-# Function to create a Word document
-def create_word_doc(title, content):
-    doc = Document()
-    # Add title with formatting
-    title_heading = doc.add_heading(title, level=1)
-    title_heading.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-    
-    # Split content into paragraphs
-    paragraphs = content.split('\n')
-    
-    # Flag to track if we're inside a table
-    in_table = False
-    table_rows = []
-    
-    i = 0
-    while i < len(paragraphs):
-        para = paragraphs[i]
-        if not para.strip():
-            i += 1
-            continue
-        
-        # Check for table start (line contains | and the next line has dashes and |)
-        if '|' in para and i + 1 < len(paragraphs) and set(paragraphs[i+1].replace('|', '')).issubset({'-', ' '}):
-            in_table = True
-            table_rows = []
-            
-            # Add header row
-            header_cells = [cell.strip() for cell in para.split('|')[1:-1]] if para.strip().startswith('|') else [cell.strip() for cell in para.split('|')]
-            table_rows.append(header_cells)
-            
-            # Skip the separator row
-            i += 2  # Move past header and separator lines
-            
-            # Process table rows
-            while i < len(paragraphs) and '|' in paragraphs[i]:
-                row = paragraphs[i]
-                row_cells = [cell.strip() for cell in row.split('|')[1:-1]] if row.strip().startswith('|') else [cell.strip() for cell in row.split('|')]
-                table_rows.append(row_cells)
-                i += 1
-            
-            # Create the Word table
-            if table_rows:
-                max_cols = max(len(row) for row in table_rows)
-                word_table = doc.add_table(rows=len(table_rows), cols=max_cols)
-                word_table.style = 'Table Grid'
-                
-                # Fill the table
-                for row_idx, row_data in enumerate(table_rows):
-                    for col_idx, cell_text in enumerate(row_data):
-                        if col_idx < max_cols:  # Ensure we don't exceed column count
-                            cell = word_table.cell(row_idx, col_idx)
-                            cell.text = cell_text
-                            
-                            # Make header row bold
-                            if row_idx == 0:
-                                for paragraph in cell.paragraphs:
-                                    for run in paragraph.runs:
-                                        run.bold = True
-                
-                # Add space after table
-                doc.add_paragraph()
-            
-            in_table = False
-            continue
-            
-        # Check if paragraph is a header (markdown style)
-        header_match = re.match(r'^#+\s+(.+)$', para)
-        if header_match:
-            header_text = header_match.group(1)
-            level = min(len(re.match(r'^#+', para).group(0)), 6)
-            doc.add_heading(header_text, level=level)
-            i += 1
-            continue
-            
-        # Check if paragraph is a list item
-        if para.strip().startswith('- ') or para.strip().startswith('* '):
-            doc.add_paragraph(para.strip()[2:], style='List Bullet')
-            i += 1
-            continue
-            
-        # Handle bolded text with markdown ** or __
-        bold_pattern = r'\*\*(.*?)\*\*|__(.*?)__'
-        if re.search(bold_pattern, para):
-            p = doc.add_paragraph()
-            parts = re.split(bold_pattern, para)
-            for j, part in enumerate(parts):
-                if part:  # Skip empty parts
-                    if j % 3 == 1 or j % 3 == 2:  # Every third part matches the bold pattern
-                        p.add_run(part).bold = True
-                    else:
-                        p.add_run(part)
-            i += 1
-            continue
-            
-        # Regular paragraph
-        doc.add_paragraph(para)
-        i += 1
-    
-    # Save to buffer
-    buffer = BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-# Modify this function to accept existing document buffers instead of recreating them
-def create_zip_with_all_docs(blueprint_doc, assessment_doc, media_doc, reports_doc):
-    # Create a ZIP file in memory
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'a', zipfile.ZIP_DEFLATED) as zip_file:
-        # Add each document to the zip file
-        zip_file.writestr("Lesson_Blueprint.docx", blueprint_doc.getvalue())
-        zip_file.writestr("Assessment_Items.docx", assessment_doc.getvalue())
-        zip_file.writestr("Media_Suggestions.docx", media_doc.getvalue())
-        zip_file.writestr("DEI_Fact_Check_Reports.docx", reports_doc.getvalue())
-    
-    zip_buffer.seek(0)
-    return zip_buffer
+# Load a finished job's results before anything that reports on them is drawn
+if st.session_state.job_id and st.session_state.job_id != st.session_state.loaded_job_id:
+    current_job = job_store.get(st.session_state.job_id)
+    if current_job is not None and current_job['status'] == COMPLETED:
+        load_job_results(current_job)
+
 
 # Add sidebar buttons for generation and reset
 st.sidebar.title("Controls")
 generate_button = st.sidebar.button("Generate Content", use_container_width=True, key="generate_btn")
 reset_button = st.sidebar.button("Reset Tool", on_click=reset_outputs, use_container_width=True, key="reset_btn")
+force_regenerate = st.sidebar.checkbox("Force regenerate (skip response cache)", key="force_regenerate")
+
+# LLM response cache readout
+response_cache_stats = response_cache.stats()
+st.sidebar.caption(
+    f"Response cache: {response_cache_stats['hits']} hits · {response_cache_stats['misses']} misses · "
+    f"{response_cache_stats['entries']} entries"
+)
+
+# Reference text cache readout and invalidation
+with st.sidebar.expander("Reference Cache"):
+    cache_stats = reference_cache.stats()
+    st.write(
+        f"Hits: {cache_stats['hits']} · Disk hits: {cache_stats['disk_hits']} · "
+        f"Misses: {cache_stats['misses']}"
+    )
+    st.write(f"Entries: {cache_stats['entries']} · Held: {cache_stats['bytes'] / 1024:.0f} KB")
+    if st.button("Clear Reference Cache", use_container_width=True, key="clear_reference_cache_btn"):
+        reference_cache.invalidate()
+        st.rerun()
+
+# Token usage from the last generation: input with full guidelines inline vs what was actually sent,
+# output tokens, and anything trimmed to fit the stage budgets
+if st.session_state.prompt_token_report:
+    with st.sidebar.expander("Token Usage"):
+        for stage, usage in st.session_state.prompt_token_report.items():
+            line = f"{stage}: ~{usage['full_input']:,} → ~{usage['input']:,} in · ~{usage['output']:,} out"
+            if usage['trimmed']:
+                line += f" · {usage['trimmed']:,} trimmed"
+            if usage['over_budget']:
+                line += f" · ⚠️ {usage['over_budget']:,} over budget"
+            st.write(line)
+        if USE_CONTEXT_CACHE:
+            context_cache_stats = get_context_cache_manager().stats()
+            st.write(
+                f"Context cache: {context_cache_stats['live']} live · {context_cache_stats['created']} created · "
+                f"{context_cache_stats['reused']} reused · {context_cache_stats['failed']} failed"
+            )
+
+# Per-stage status, queue wait, duration and time to first visible token in the last generation
+if st.session_state.stage_timing_report:
+    with st.sidebar.expander("Stage Timing"):
+        for stage, (status, queue_wait, duration, first_token) in st.session_state.stage_timing_report.items():
+            if duration is None:
+                st.write(f"{stage}: {status}")
+                continue
+            first_token_text = f"{first_token:.2f}s" if first_token is not None else "none"
+            st.write(
+                f"{stage}: {duration:.2f}s (queued {queue_wait:.2f}s, first token {first_token_text})"
+            )
+
+if st.session_state.telemetry_run_id:
+    with st.sidebar.expander("Performance"):
+        # Waterfall of the last run: stages, LLM calls and document rendering on one timeline
+        spans = telemetry.spans_for(st.session_state.telemetry_run_id)
+        # Only renders that miss the render cache are recorded; the first of each belongs to the run
+        first_renders = {}
+        for span in spans:
+            if span.name.startswith('render.'):
+                first_renders.setdefault((span.name, span.attributes.get('title')), span)
+        spans = [span for span in spans if not span.name.startswith('render.')] + list(first_renders.values())
+        if spans:
+            st.code("\n".join(waterfall_lines(spans)), language=None)
+            llm_spans = [span for span in spans if span.name.startswith('llm.')]
+            retries = sum(span.attributes.get('retries', 0) for span in llm_spans)
+            hits = sum(span.attributes.get('cache') == 'hit' for span in llm_spans)
+            st.caption(f"{len(llm_spans)} LLM calls · {hits} cache hits · {retries} retries")
+        render_stats = render_cache.stats()
+        st.caption(
+            f"Rendered documents: {render_stats['hits']} reused · {render_stats['misses']} rendered · "
+            f"{render_stats['bytes'] / 1024:.0f} KB held"
+        )
+        if telemetry.directory:
+            st.caption(f"Spans and metrics are exported to {telemetry.directory}/")
+
+# Background generation jobs: the one this page shows, and reattaching to another by ID
+with st.sidebar.expander("Jobs"):
+    if st.session_state.job_id:
+        current_job = job_store.get(st.session_state.job_id)
+        st.write(f"Current job: `{st.session_state.job_id}` ({current_job['status'] if current_job else 'not found'})")
+    for recent_id, recent_status, recent_title, _ in job_store.recent(limit=5):
+        st.caption(f"`{recent_id}` · {recent_status} · {recent_title}")
+    reattach_id = st.text_input("Job ID", key="reattach_job_id")
+    if st.button("Open Job", use_container_width=True, key="open_job_btn") and reattach_id.strip():
+        attach_job(reattach_id.strip())
+        st.rerun()
 
 # Add a separator between controls and download options
 st.sidebar.markdown("---")
 
 # Update your content generation workflow
-if generate_button:
+regenerate_stage = st.session_state.regenerate_stage
+st.session_state.regenerate_stage = None
+if generate_button or regenerate_stage:
     if not lesson_info.strip() or not lesson_title.strip():
         st.warning("Please enter both lesson title and information to generate content.")
     else:
-        # Generate primary content
-        with st.spinner("Generating lesson blueprint..."):
-            st.session_state.blueprint_output = create_lesson_blueprint(
-                lesson_title,
-                lesson_info, 
-                additional_resources, 
-                blueprint_reference_content
-            )
-        
-        with st.spinner("Generating assessment items..."):
-            st.session_state.assessment_output = create_assessment_items(st.session_state.blueprint_output)
-        
-        with st.spinner("Generating media suggestions..."):
-            st.session_state.media_output = create_media_suggestions(st.session_state.blueprint_output, st.session_state.assessment_output)
-        
-        # Replace the threading section with this fixed implementation
-        # Show a single spinner while both checks run
-        with st.spinner("Running fact check and DEI check in parallel..."):
-            # Store local variables for the threads to work with
-            blueprint_content = st.session_state.blueprint_output
-            assessment_content = st.session_state.assessment_output
-            media_content = st.session_state.media_output
-            
-            # Use lists to store results (mutable objects that can be modified by threads)
-            fact_check_result = [None]
-            dei_check_result = [None]
-
-            # Define thread functions that don't access session state
-            def run_fact_check():
-                fact_check_result[0] = create_fact_check(
-                    blueprint_content,  # Use local variables instead of session_state
-                    assessment_content, 
-                    media_content
-                )
-
-            def run_dei_check():
-                dei_check_result[0] = create_dei_check(
-                    blueprint_content,  # Use local variables instead of session_state
-                    assessment_content, 
-                    media_content
-                )
-
-            # Create and start both threads
-            fact_check_thread = threading.Thread(target=run_fact_check)
-            dei_check_thread = threading.Thread(target=run_dei_check)
-            fact_check_thread.start()
-            dei_check_thread.start()
-
-            # Wait for both to complete
-            fact_check_thread.join()
-            dei_check_thread.join()
-
-            # Now that threads are done, save results to session state in main thread
-            st.session_state.fact_check_output = fact_check_result[0]
-            st.session_state.dei_check_output = dei_check_result[0]
-        
-        # Set flag that content has been generated
-        st.session_state.has_generated = True
-        
-        # Use the current rerun method
+        pipeline_inputs = {
+            'lesson_title': lesson_title,
+            'lesson_info': lesson_info,
+            'additional_resources': additional_resources,
+        }
+        # Stages whose inputs are unchanged since they were generated are reused, unless forced
+        reused = {} if force_regenerate else reusable_outputs(
+            build_generation_pipeline(), pipeline_inputs, st.session_state.stage_records,
+            regenerate=[regenerate_stage] if regenerate_stage else (),
+        )
+        # The job runs in the background; this script run returns right away and polls it below
+        attach_job(job_runner.submit(
+            pipeline_inputs, completed=reused, bypass_cache=force_regenerate,
+            bypass_stages=[regenerate_stage] if regenerate_stage else (),
+        ))
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress(job_id):
+    # Live view of a running job: every stage streams into its own tab. Reruns on its own
+    # every JOB_POLL_SECONDS and triggers a full rerun once the job has finished.
+    job = job_store.get(job_id)
+    if job['status'] in FINISHED_STATUSES:
         st.rerun()
+    st.markdown("---")
+    st.header("Generating Content")
+    live = job_runner.live_progress(job_id) or {}
+    st.caption(f"Job {job_id} · " + " · ".join(
+        f"{stage}: {live[stage][0] if stage in live else record['status']}" for stage, record in job['stages'].items()
+    ))
+    live_tabs = st.tabs(["Lesson Blueprint", "Assessment Items", "Media Suggestions", "Fact Check", "DEI Check"])
+    for tab, (stage, record) in zip(live_tabs, job['stages'].items()):
+        text = live[stage][1] if stage in live and live[stage][1] else record['output']
+        if text:
+            tab.markdown(text)
+
+job_id = st.session_state.job_id
+if job_id and job_id != st.session_state.loaded_job_id:
+    job = job_store.get(job_id)
+    if job is None:
+        st.warning(f"Generation job {job_id} was not found.")
+        st.session_state.job_id = None
+    elif job['status'] == COMPLETED:
+        # Finished between the check at the top of the script and now
+        st.rerun()
+    elif job['status'] in (FAILED, INTERRUPTED):
+        finished = [stage for stage, record in job['stages'].items() if record['status'] == SUCCEEDED]
+        progress = f"({len(finished)} of {len(STAGE_OUTPUTS)} stages done)"
+        if job['status'] == FAILED:
+            st.error(f"Generation job {job_id} failed {progress}: {(job['report'] or {}).get('error')}")
+        else:
+            st.warning(f"Generation job {job_id} was interrupted before it finished {progress}.")
+        if st.button("Resume Generation", key="resume_job_btn"):
+            attach_job(job_runner.resume(job_id))
+            st.rerun()
+    else:
+        job_progress(job_id)
 
 # Display outputs if they exist
 if st.session_state.has_generated:
     # Create document files
-    blueprint_doc = create_word_doc("Lesson Blueprint", st.session_state.blueprint_output)
-    assessment_doc = create_word_doc("Assessment Items", st.session_state.assessment_output)
-    media_doc = create_word_doc("Media Suggestions", st.session_state.media_output)
+    run_id = st.session_state.telemetry_run_id
+    blueprint_doc = create_word_doc("Lesson Blueprint", st.session_state.blueprint_output, run_id)
+    assessment_doc = create_word_doc("Assessment Items", st.session_state.assessment_output, run_id)
+    media_doc = create_word_doc("Media Suggestions", st.session_state.media_output, run_id)
     reports_doc = create_word_doc(
         "DEI and Fact-check Reports", 
-        f"## Fact Check Report\n\n{st.session_state.fact_check_output}\n\n## DEI Check Report\n\n{st.session_state.dei_check_output}"
-    )
-    
-    # Create zip file with all documents
-    all_docs_zip = create_zip_with_all_docs(
-        blueprint_doc,
-        assessment_doc,
-        media_doc,
-        reports_doc
+        reports_content(st.session_state.fact_check_output, st.session_state.dei_check_output),
+        run_id
     )
+
+    # The ZIP is only built when "Download All" is clicked; Streamlit runs this on its own thread
+    def all_docs_zip():
+        return create_zip_with_all_docs(blueprint_doc, assessment_doc, media_doc, reports_doc, run_id)
     
     # 1. SIDEBAR DOWNLOAD OPTIONS
     st.sidebar.markdown("### Download Options")
@@ -463,7 +339,7 @@ if st.session_state.has_generated:
     st.sidebar.download_button(
         label="💾 Download All Materials",
         data=all_docs_zip,
-        file_name="All_Lesson_Materials.zip",
+        file_name=ZIP_FILENAME,
         mime="application/zip",
         key="all_docs_download",
         use_container_width=True
@@ -484,7 +360,7 @@ if st.session_state.has_generated:
     st.sidebar.download_button(
         label="Lesson Blueprint",
         data=blueprint_doc,
-        file_name="Lesson_Blueprint.docx",
+        file_name=DOCUMENT_FILENAMES['blueprint'],
         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
         key="blueprint_download",
         use_container_width=True
@@ -493,7 +369,7 @@ if st.session_state.has_generated:
     st.sidebar.download_button(
         label="Assessment Items",
         data=assessment_doc,
-        file_name="Assessment_Items.docx",
+        file_name=DOCUMENT_FILENAMES['assessment'],
         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
         key="assessment_download",
         use_container_width=True
@@ -502,7 +378,7 @@ if st.session_state.has_generated:
     st.sidebar.download_button(
         label="Media Suggestions",
         data=media_doc,
-        file_name="Media_Suggestions.docx",
+        file_name=DOCUMENT_FILENAMES['media'],
         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
         key="media_download",
         use_container_width=True
@@ -511,7 +387,7 @@ if st.session_state.has_generated:
     st.sidebar.download_button(
         label="DEI & Fact Check Reports",
         data=reports_doc,
-        file_name="DEI_Fact_Check_Reports.docx",
+        file_name=DOCUMENT_FILENAMES['reports'],
         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
         key="reports_download",
         use_container_width=True
@@ -531,20 +407,45 @@ if st.session_state.has_generated:
     ])
     
     # Display content in each tab
+    # Grade level named in the lesson inputs; sets the reading band the outputs are checked against
+    grade = lesson_grade(
+        st.session_state.lesson_title, st.session_state.lesson_info, st.session_state.blueprint_output
+    )
+
     with blueprint_tab:
+        regenerate_button('blueprint')
         st.markdown("## Lesson Blueprint")
+        objective_report = objective_readability_problems(st.session_state.blueprint_output, grade)
+        if objective_report:
+            with st.expander(f"Readability Check: {len(objective_report)} student-friendly objective(s) flagged"):
+                for objective, problem in objective_report:
+                    st.markdown(f"**{objective}** {problem}")
         st.write(st.session_state.blueprint_output)
     
     with assessment_tab:
+        regenerate_button('assessment')
         st.markdown("## Assessment Items")
+        # Style rules and reading level are checked locally on every rerun; flagged items can be fixed by regenerating
+        assessment_items = items_from_markdown(st.session_state.assessment_output)
+        style_report = {number: [str(violation) for violation in violations]
+                        for number, violations in lint_items(assessment_items).items()}
+        for number, messages in item_readability_problems(assessment_items, grade).items():
+            style_report.setdefault(number, []).extend(messages)
+        if style_report:
+            with st.expander(f"Style Check: {len(style_report)} item(s) flagged"):
+                for number, messages in sorted(style_report.items()):
+                    st.markdown(f"**Item {number}:** " + "; ".join(messages))
         st.write(st.session_state.assessment_output)
     
     with media_tab:
+        regenerate_button('media')
         st.markdown("## Media Suggestions")
         st.write(st.session_state.media_output)
     
     with fact_check_tab:
+        regenerate_button('fact_check')
         st.write(st.session_state.fact_check_output)
     
     with dei_check_tab:
+        regenerate_button('dei_check')
         st.write(st.session_state.dei_check_output)
@@ -0,0 +1 @@
+# Empty file to make the directory a proper Python package
\ No newline at end of file
@@ -0,0 +1,224 @@
+import json
+import re
+
+from prompts.assessment_items_prompt import ASSESSMENT_ITEMS
+from utils.assessment_merge import split_items
+
+# "Objective 3 DOK High" inside an item's identification
+OBJECTIVE_DOK_PATTERN = re.compile(r"Objective (\d+) DOK (\w+)")
+# Labels the model sometimes leaves in front of a choice ("A. ", "(B) ")
+CHOICE_LABEL_PATTERN = re.compile(r"^\(?[A-Ea-e][.)]\s+")
+# A response wrapped in a markdown code fence despite JSON mode
+CODE_FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.S)
+# Lines of an item's markdown (with bold markers removed)
+MARKDOWN_CHOICE_PATTERN = re.compile(r"^([A-E])[.)]\s+(.*)$")
+MARKDOWN_CORRECT_PATTERN = re.compile(r"^Correct Answers?:\s*(.*)$", re.I)
+MARKDOWN_FEEDBACK_PATTERN = re.compile(r"^Feedback:\s*(.*)$", re.I)
+MARKDOWN_ANSWER_LETTER_PATTERN = re.compile(r"\b[A-E]\b")
+
+CHOICE_LABELS = "ABCDE"
+MULTIPLE_CHOICE = 'multiple_choice'
+MULTIPLE_SELECT = 'multiple_select'
+# Item type -> (number of answer choices, allowed numbers of correct answers)
+ITEM_TYPE_RULES = {
+    MULTIPLE_CHOICE: (4, (1,)),
+    MULTIPLE_SELECT: (5, (2, 3)),
+}
+
+
+class AssessmentItemError(ValueError):
+    pass
+
+
+class AssessmentItem:
+    """One generated assessment item, as parsed from the model's JSON response."""
+
+    __slots__ = ('number', 'objective', 'dok', 'item_type', 'header', 'stem', 'choices', 'correct', 'feedback')
+
+    def __init__(self, number, objective, dok, item_type, header, stem, choices, correct, feedback=''):
+        self.number = number
+        self.objective = objective
+        self.dok = dok
+        self.item_type = item_type
+        self.header = header
+        self.stem = stem
+        # Tuples, so records can be shared between threads and runs without copying
+        self.choices = tuple(choices)
+        self.correct = tuple(correct)
+        self.feedback = feedback
+
+    @property
+    def identification(self):
+        return ASSESSMENT_ITEMS[self.number - 1][0]
+
+    def as_dict(self):
+        return {
+            'item_number': self.number,
+            'objective': self.objective,
+            'dok': self.dok,
+            'item_type': self.item_type,
+            'header': self.header,
+            'stem': self.stem,
+            'choices': list(self.choices),
+            'correct_answers': list(self.correct),
+            'feedback': self.feedback,
+        }
+
+
+def expected_objective_dok(number):
+    # (objective, DOK) named in the item's identification, e.g. (3, 'High')
+    match = OBJECTIVE_DOK_PATTERN.search(ASSESSMENT_ITEMS[number - 1][0])
+    return int(match.group(1)), match.group(2)
+
+def _text(value):
+    if not isinstance(value, str):
+        raise AssessmentItemError(f"expected a string, got {type(value).__name__}")
+    return value.strip()
+
+def item_from_dict(entry):
+    # Raises AssessmentItemError when the entry doesn't have the fields and types of ITEM_SCHEMA
+    if not isinstance(entry, dict):
+        raise AssessmentItemError("item is not an object")
+    try:
+        choices = entry['choices']
+        correct = entry['correct_answers']
+        if not isinstance(choices, list) or not isinstance(correct, list):
+            raise AssessmentItemError("choices and correct_answers must be lists")
+        return AssessmentItem(
+            number=int(entry['item_number']),
+            objective=int(entry['objective']),
+            dok=_text(str(entry['dok'])).removeprefix('DOK').strip(),
+            item_type=_text(entry['item_type']).lower(),
+            header=_text(entry['header']),
+            stem=_text(entry['stem']),
+            choices=[CHOICE_LABEL_PATTERN.sub('', _text(choice)) for choice in choices],
+            correct=[_text(letter).rstrip('.').upper() for letter in correct],
+            feedback=_text(entry.get('feedback') or ''),
+        )
+    except AssessmentItemError:
+        raise
+    except KeyError as e:
+        raise AssessmentItemError(f"missing field {e.args[0]!r}") from None
+    except (TypeError, ValueError) as e:
+        raise AssessmentItemError(str(e)) from None
+
+def validate_item(item):
+    # Problems with the item against its entry in ASSESSMENT_ITEMS and the item format rules; empty if valid
+    problems = []
+    objective, dok = expected_objective_dok(item.number)
+    if item.objective != objective:
+        problems.append(f"objective is {item.objective}, expected {objective}")
+    if item.dok.lower() != dok.lower():
+        problems.append(f"DOK is {item.dok!r}, expected {dok!r}")
+    if not item.header:
+        problems.append("header is empty")
+    if not item.stem:
+        problems.append("stem is empty")
+    if any(not choice for choice in item.choices):
+        problems.append("an answer choice is empty")
+
+    rules = ITEM_TYPE_RULES.get(item.item_type)
+    if rules is None:
+        problems.append(f"unknown item_type {item.item_type!r}")
+    else:
+        # The number of answer choices is a style rule (utils/style_lint.py)
+        correct_counts = rules[1]
+        if len(set(item.correct)) != len(item.correct) or len(item.correct) not in correct_counts:
+            allowed = " or ".join(map(str, correct_counts))
+            problems.append(f"{item.item_type} has {len(item.correct)} correct answers, expected {allowed}")
+    labels = CHOICE_LABELS[:len(item.choices)]
+    unknown = [letter for letter in item.correct if len(letter) != 1 or letter not in labels]
+    if unknown:
+        problems.append(f"correct answer(s) {', '.join(unknown)} are not answer choice letters")
+
+    if ASSESSMENT_ITEMS[item.number - 1][1] and not item.feedback:
+        problems.append("feedback is missing")
+    return problems
+
+def parse_items(text, expected):
+    # Parse a JSON item array into item number -> AssessmentItem for the numbers in expected.
+    # Returns (items, problems): problems maps item number -> list of problems for items that failed
+    # validation (those that could be parsed are still in items). Unparseable or unexpected entries
+    # and repeats of a number are dropped; expected numbers missing from both are missing.
+    fenced = CODE_FENCE_PATTERN.match(text)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}, {}
+    if isinstance(data, dict):
+        data = data.get('items', [data])
+    if not isinstance(data, list):
+        return {}, {}
+
+    items = {}
+    problems = {}
+    for entry in data:
+        try:
+            item = item_from_dict(entry)
+        except AssessmentItemError as e:
+            number = entry.get('item_number') if isinstance(entry, dict) else None
+            if isinstance(number, int) and number in expected and number not in items:
+                problems.setdefault(number, []).append(str(e))
+            continue
+        if item.number not in expected or item.number in items:
+            continue
+        items[item.number] = item
+        item_problems = validate_item(item)
+        if item_problems:
+            problems[item.number] = item_problems
+        else:
+            problems.pop(item.number, None)
+    return items, problems
+
+def format_item(item):
+    # Markdown for one item, in the format the merged assessment document uses
+    lines = [f"**Item {item.number}: {item.identification}**", f"- {item.header}", "", item.stem, ""]
+    lines.extend(f"{label}. {choice}" for label, choice in zip(CHOICE_LABELS, item.choices))
+    label = "Correct Answer" if len(item.correct) == 1 else "Correct Answers"
+    lines.extend(["", f"{label}: {', '.join(item.correct)}"])
+    if item.feedback:
+        lines.extend(["", f"Feedback: {item.feedback}"])
+    return "\n".join(lines)
+
+def item_from_markdown(number, text):
+    # Best-effort record for one item's markdown as written by format_item (or by the model in
+    # that format), so merged assessment text can be checked without regenerating it
+    objective, dok = expected_objective_dok(number)
+    header = ''
+    stem_lines = []
+    choices = []
+    correct = []
+    feedback_lines = None
+    for line in text.split('\n')[1:]:
+        if '**' in line:
+            line = line.replace('**', '')
+        line = line.strip()
+        if not line:
+            continue
+        if feedback_lines is not None:
+            feedback_lines.append(line)
+            continue
+        # Cheap first-character checks decide which (if any) pattern can match the line
+        first = line[0]
+        if first in 'Cc' and (correct_match := MARKDOWN_CORRECT_PATTERN.match(line)):
+            correct = MARKDOWN_ANSWER_LETTER_PATTERN.findall(correct_match.group(1))
+        elif first in 'Ff' and (feedback_match := MARKDOWN_FEEDBACK_PATTERN.match(line)):
+            feedback_lines = [feedback_match.group(1)] if feedback_match.group(1) else []
+        elif first in CHOICE_LABELS and not correct and (choice := MARKDOWN_CHOICE_PATTERN.match(line)):
+            choices.append(choice.group(2))
+        elif not header and not stem_lines and line.startswith(('- ', '* ')):
+            header = line[2:].strip()
+        elif not choices:
+            stem_lines.append(line)
+    item_type = MULTIPLE_SELECT if len(choices) == 5 or len(correct) > 1 else MULTIPLE_CHOICE
+    return AssessmentItem(
+        number, objective, dok, item_type, header, " ".join(stem_lines), choices, correct,
+        " ".join(feedback_lines or []),
+    )
+
+def items_from_markdown(text):
+    # Item number -> AssessmentItem for every numbered item in merged assessment markdown
+    items, _ = split_items(text, expected=set(range(1, len(ASSESSMENT_ITEMS) + 1)))
+    return {number: item_from_markdown(number, item_text) for number, item_text in items.items()}
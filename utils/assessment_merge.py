@@ -0,0 +1,55 @@
+import re
+
+from prompts.assessment_items_prompt import ASSESSMENT_ITEMS, ASSESSMENT_SECTIONS
+
+# Start of an item: "**Item 12: Objective 1 DOK 2 SSA Item 2 ...**" (optionally as a markdown heading)
+ITEM_START_PATTERN = re.compile(r"^[ \t]*(?:#+[ \t]*)?\*{0,2}[ \t]*Item[ \t]+(\d+)[ \t]*[:.)-]", re.M | re.I)
+# Separator lines the model puts between items
+TRAILING_RULE_PATTERN = re.compile(r"(?:\n[ \t]*(?:-{3,}|\*{3,}|_{3,})[ \t]*)+$")
+
+
+class AssessmentMergeError(ValueError):
+    pass
+
+
+def split_items(text, expected=None):
+    # Map item number -> item markdown. Only the first copy of a number is kept, and numbers
+    # outside expected (when given) are ignored. Returns (items, duplicate numbers).
+    matches = list(ITEM_START_PATTERN.finditer(text))
+    items = {}
+    duplicates = []
+    for index, match in enumerate(matches):
+        number = int(match.group(1))
+        if expected is not None and number not in expected:
+            continue
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        if number in items:
+            duplicates.append(number)
+            continue
+        item = text[match.start():end].strip()
+        # The pattern is anchored at the end but still tried at every newline, so only run it when needed
+        if item.endswith(('-', '*', '_')):
+            item = TRAILING_RULE_PATTERN.sub("", item).strip()
+        items[number] = item
+    return items, duplicates
+
+
+def missing_items(items, expected=None):
+    expected = expected if expected is not None else range(1, len(ASSESSMENT_ITEMS) + 1)
+    return [number for number in expected if number not in items]
+
+
+def merge_items(items):
+    # Assemble all items in canonical order under their section headings.
+    # Every numbered item must be present exactly once.
+    missing = missing_items(items)
+    if missing:
+        raise AssessmentMergeError(f"Assessment is missing item(s): {', '.join(map(str, missing))}")
+    unexpected = sorted(set(items) - set(range(1, len(ASSESSMENT_ITEMS) + 1)))
+    if unexpected:
+        raise AssessmentMergeError(f"Assessment has unknown item(s): {', '.join(map(str, unexpected))}")
+
+    sections = []
+    for title, numbers in ASSESSMENT_SECTIONS:
+        sections.append(f"## {title}\n\n" + "\n\n".join(items[number] for number in numbers))
+    return "\n\n".join(sections)
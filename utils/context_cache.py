@@ -0,0 +1,189 @@
+import datetime
+import hashlib
+import threading
+import time
+
+# Default lifetime of a cached prefix, and how close to expiry a handle gets refreshed
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_REFRESH_MARGIN_SECONDS = 300
+# After a failed create (unsupported model, prefix below the minimum size, quota...) wait before retrying
+DEFAULT_RETRY_AFTER_SECONDS = 600
+
+
+class CachedPrefix:
+    __slots__ = ('key', 'model_name', 'payload', 'expires_at')
+
+    def __init__(self, key, model_name, payload, expires_at):
+        self.key = key
+        self.model_name = model_name
+        self.payload = payload
+        self.expires_at = expires_at
+
+
+class ContextCacheManager:
+    """Creates, reuses, refreshes and expires cached-content handles for a static prompt prefix.
+
+    The backend does the actual work (Gemini in the app, an in-memory fake offline);
+    the manager only tracks handle lifetimes, keyed by model name + prefix hash.
+    """
+
+    def __init__(self, backend, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 refresh_margin_seconds=DEFAULT_REFRESH_MARGIN_SECONDS,
+                 retry_after_seconds=DEFAULT_RETRY_AFTER_SECONDS, clock=time.time):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.clock = clock
+        self._handles = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+        self.counts = {'created': 0, 'reused': 0, 'refreshed': 0, 'expired': 0, 'failed': 0}
+        self.last_error = None
+
+    @staticmethod
+    def _key(model_name, prefix_text):
+        return hashlib.sha256(f"{model_name}\n{prefix_text}".encode('utf-8')).hexdigest()
+
+    def get(self, model_name, prefix_text):
+        # Return a live handle for the prefix, or None when caching is unavailable
+        key = self._key(model_name, prefix_text)
+        now = self.clock()
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None and handle.expires_at <= now:
+                # The backend has already dropped it; forget our copy and create a new one
+                del self._handles[key]
+                self.counts['expired'] += 1
+                handle = None
+
+            if handle is not None:
+                if handle.expires_at - now <= self.refresh_margin_seconds:
+                    try:
+                        self.backend.refresh(handle.payload, self.ttl_seconds)
+                        handle.expires_at = now + self.ttl_seconds
+                        self.counts['refreshed'] += 1
+                    except Exception as e:
+                        # Keep using the handle until it actually expires
+                        self.last_error = str(e)
+                else:
+                    self.counts['reused'] += 1
+                return handle
+
+            failed_at = self._failures.get(key)
+            if failed_at is not None and now - failed_at < self.retry_after_seconds:
+                return None
+
+            try:
+                payload = self.backend.create(model_name, prefix_text, self.ttl_seconds)
+            except Exception as e:
+                self._failures[key] = now
+                self.counts['failed'] += 1
+                self.last_error = str(e)
+                return None
+
+            self._failures.pop(key, None)
+            handle = self._handles[key] = CachedPrefix(key, model_name, payload, now + self.ttl_seconds)
+            self.counts['created'] += 1
+            return handle
+
+    def model_for(self, model_name, prefix_text):
+        # A model bound to the cached prefix, so only the per-call suffix is sent
+        handle = self.get(model_name, prefix_text)
+        if handle is None:
+            return None
+        return self.backend.model_for(handle.payload)
+
+    def expire(self, model_name=None, prefix_text=None):
+        # Delete one handle, or every handle when no prefix is given
+        with self._lock:
+            if prefix_text is None:
+                keys = list(self._handles)
+            else:
+                keys = [self._key(model_name, prefix_text)]
+            for key in keys:
+                handle = self._handles.pop(key, None)
+                if handle is None:
+                    continue
+                try:
+                    self.backend.delete(handle.payload)
+                except Exception as e:
+                    self.last_error = str(e)
+                self.counts['expired'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts, live=len(self._handles))
+
+
+class GeminiContextCacheBackend:
+    """Backend using Gemini's cached-content API (google.generativeai.caching)."""
+
+    def create(self, model_name, prefix_text, ttl_seconds):
+        from google.generativeai import caching
+        return caching.CachedContent.create(
+            model=model_name,
+            display_name="lesson-reference-prefix",
+            contents=[prefix_text],
+            ttl=datetime.timedelta(seconds=ttl_seconds),
+        )
+
+    def refresh(self, payload, ttl_seconds):
+        payload.update(ttl=datetime.timedelta(seconds=ttl_seconds))
+
+    def delete(self, payload):
+        payload.delete()
+
+    def model_for(self, payload):
+        import google.generativeai as genai
+        return genai.GenerativeModel.from_cached_content(cached_content=payload)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeCachedModel:
+    def __init__(self, backend, name):
+        self.backend = backend
+        self.name = name
+
+    def generate_content(self, contents, **kwargs):
+        entry = self.backend.entries.get(self.name)
+        if entry is None or entry['expires_at'] <= self.backend.clock():
+            raise RuntimeError(f"Cached content {self.name} not found or expired")
+        return FakeResponse(
+            f"[{self.name}] prefix of {len(entry['text'])} chars, suffix of {len(str(contents))} chars"
+        )
+
+
+class FakeContextCacheBackend:
+    """In-memory stand-in for the Gemini cache so the lifecycle can be exercised offline."""
+
+    def __init__(self, clock=time.time, min_prefix_chars=0):
+        self.clock = clock
+        self.min_prefix_chars = min_prefix_chars
+        self.entries = {}
+        self.calls = {'create': 0, 'refresh': 0, 'delete': 0}
+
+    def create(self, model_name, prefix_text, ttl_seconds):
+        self.calls['create'] += 1
+        if len(prefix_text) < self.min_prefix_chars:
+            raise ValueError("Cached content is below the minimum size")
+        name = f"cachedContents/fake-{self.calls['create']}"
+        self.entries[name] = {'model': model_name, 'text': prefix_text, 'expires_at': self.clock() + ttl_seconds}
+        return name
+
+    def refresh(self, payload, ttl_seconds):
+        self.calls['refresh'] += 1
+        if payload not in self.entries:
+            raise KeyError(payload)
+        self.entries[payload]['expires_at'] = self.clock() + ttl_seconds
+
+    def delete(self, payload):
+        self.calls['delete'] += 1
+        self.entries.pop(payload, None)
+
+    def model_for(self, payload):
+        return FakeCachedModel(self, payload)
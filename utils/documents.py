@@ -0,0 +1,94 @@
+import os
+import shutil
+from io import BytesIO
+
+from utils.render_cache import render_cache
+from utils.telemetry import telemetry
+
+# File names of the generated documents, in download order
+DOCUMENT_FILENAMES = {
+    'blueprint': "Lesson_Blueprint.docx",
+    'assessment': "Assessment_Items.docx",
+    'media': "Media_Suggestions.docx",
+    'reports': "DEI_Fact_Check_Reports.docx",
+}
+ZIP_FILENAME = "All_Lesson_Materials.zip"
+# Part of the render cache key; bump whenever rendering changes so cached documents are rebuilt
+RENDERER_VERSION = 3
+# Read size when streaming file members into a ZIP
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+
+def reports_content(fact_check_output, dei_check_output):
+    # Markdown for the combined fact check and DEI check document
+    return f"## Fact Check Report\n\n{fact_check_output}\n\n## DEI Check Report\n\n{dei_check_output}"
+
+# Function to create a Word document; run_id attributes the render to a generation run in telemetry.
+# Identical (title, content) is rendered once and then served from the shared render cache.
+def create_word_doc(title, content, run_id=None):
+    key = render_cache.key('docx', str(RENDERER_VERSION), title, content)
+    data = _cached_render(
+        'render.word_doc', key, lambda: _render_word_doc(title, content).getvalue(), run_id,
+        title=title, content_chars=len(content),
+    )
+    return BytesIO(data)
+
+def _cached_render(span_name, key, render, run_id, **attributes):
+    # Cached bytes for key, else render() them into the cache. Documents are rebuilt from the cache
+    # on every rerun, so only actual renders are recorded as spans; hits only add to the cache counter.
+    data = render_cache.get(key)
+    if data is not None:
+        telemetry.count('lesson_cache_requests_total', span_name, 'status="hit"')
+        return data
+    with telemetry.span(span_name, run_id=run_id, cache='miss', **attributes) as span:
+        data = render()
+        render_cache.put(key, data)
+        span.set(output_bytes=len(data))
+    return data
+
+def _render_word_doc(title, content):
+    # python-docx (and zipfile below) load on the first render rather than with the app
+    from docx import Document
+    from utils.markdown_docx import render_markdown
+
+    doc = Document()
+    render_markdown(doc, title, content)
+    # Save to buffer
+    buffer = BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+# Accepts existing document buffers instead of recreating them. Call it only when the archive is
+# actually wanted (e.g. from a deferred download callback); identical documents reuse the cached ZIP.
+def create_zip_with_all_docs(blueprint_doc, assessment_doc, media_doc, reports_doc, run_id=None):
+    # Our buffers wrap bytes from the render cache, so getvalue() hands back those bytes without copying
+    members = {
+        DOCUMENT_FILENAMES['blueprint']: blueprint_doc.getvalue(),
+        DOCUMENT_FILENAMES['assessment']: assessment_doc.getvalue(),
+        DOCUMENT_FILENAMES['media']: media_doc.getvalue(),
+        DOCUMENT_FILENAMES['reports']: reports_doc.getvalue(),
+    }
+    key = render_cache.key('zip', str(RENDERER_VERSION), *members.values())
+    return BytesIO(_cached_render('render.zip', key, lambda: _build_zip(members), run_id))
+
+def _build_zip(members):
+    zip_buffer = BytesIO()
+    write_zip(zip_buffer, members)
+    return zip_buffer.getvalue()
+
+def write_zip(target, members):
+    # Write a ZIP to target (a path or writable binary file). members maps archive names to bytes,
+    # a readable binary file, or a path on disk; files are streamed in chunks rather than loaded.
+    # .docx files are ZIP containers already, so members are stored, not compressed a second time.
+    import zipfile
+
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_STORED) as zip_file:
+        for filename, source in members.items():
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                zip_file.writestr(filename, source)
+            elif isinstance(source, (str, os.PathLike)):
+                zip_file.write(source, filename)
+            else:
+                with zip_file.open(filename, 'w') as member:
+                    shutil.copyfileobj(source, member, ZIP_CHUNK_SIZE)
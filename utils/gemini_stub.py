@@ -0,0 +1,134 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+
+from google.api_core import exceptions as api_exceptions
+
+from utils.assessment_items import OBJECTIVE_DOK_PATTERN
+from utils.reference_retrieval import estimate_tokens
+
+# Item lines of the assessment prompt's "Required Assessment Items" list
+ITEM_LINE_PATTERN = re.compile(r"^\s*(\d+)\. (.+?)(?: - needs Feedback)?\s*$", re.M)
+# Text of every stub item; it passes the style rules and reads within the grade 8 band
+STUB_HEADER = "Identifying Key Ideas"
+STUB_STEM = "Which statement best explains how the government policy described in idea {number} changed daily life for families in the region?"
+STUB_CHOICES = (
+    "Families moved to new land and started farms far from their former homes.",
+    "Families received payments that fully covered the value of their property.",
+    "Families lost homes and businesses when they were forced to relocate.",
+    "Families gained new political representation in the national government.",
+)
+STUB_FEEDBACK = "Review how the policy affected where families lived and worked."
+
+
+def stub_instance(schema, text="Stub text"):
+    # Smallest value of a response schema: the first enum value, one entry per array
+    kind = schema.get('type')
+    if kind == 'object':
+        return {name: stub_instance(field, text) for name, field in schema.get('properties', {}).items()}
+    if kind == 'array':
+        return [stub_instance(schema.get('items', {}), text)]
+    if kind == 'string':
+        return schema['enum'][0] if schema.get('enum') else text
+    if kind in ('integer', 'number'):
+        return 1
+    if kind == 'boolean':
+        return False
+    return None
+
+
+class StubQuota:
+    """Sliding one-minute window of requests and tokens, enforced like the real API (429 when exceeded)."""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, fail_first=0, clock=time.monotonic):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # Number of initial calls rejected regardless of load
+        self.fail_first = fail_first
+        self.clock = clock
+        self._calls = deque()
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+
+    def check(self, tokens):
+        with self._lock:
+            now = self.clock()
+            while self._calls and self._calls[0][0] <= now - 60:
+                self._calls.popleft()
+            over_requests = self.requests_per_minute is not None and len(self._calls) + 1 > self.requests_per_minute
+            used_tokens = sum(call_tokens for _, call_tokens in self._calls)
+            over_tokens = self.tokens_per_minute is not None and used_tokens + tokens > self.tokens_per_minute
+            if self.fail_first > 0 or over_requests or over_tokens:
+                self.fail_first = max(self.fail_first - 1, 0)
+                self.rejected += 1
+                raise api_exceptions.ResourceExhausted("Resource has been exhausted (e.g. check quota).")
+            self._calls.append((now, tokens))
+            self.accepted += 1
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGenerativeModel:
+    """Offline stand-in for genai.GenerativeModel with deterministic output.
+
+    Answers assessment prompts with one well-formed item per requested item number (as JSON
+    when the request asks for a JSON response), other JSON requests with a minimal instance of
+    their response schema and everything else with filler markdown, after a fixed latency.
+    An optional StubQuota simulates rate-limit errors.
+    """
+
+    def __init__(self, model_name="stub", latency=0.0, output_words=200, quota=None):
+        self.model_name = model_name
+        self.latency = latency
+        self.output_words = output_words
+        self.quota = quota
+
+    def _text_for(self, prompt, json_response=False, schema=None):
+        if "### Required Assessment Items" in prompt:
+            item_list = prompt.split("### Required Assessment Items", 1)[1].split("###", 1)[0]
+            if json_response:
+                return json.dumps([
+                    {
+                        "item_number": int(number),
+                        "objective": int(OBJECTIVE_DOK_PATTERN.search(name).group(1)),
+                        "dok": OBJECTIVE_DOK_PATTERN.search(name).group(2),
+                        "item_type": "multiple_choice",
+                        "header": STUB_HEADER,
+                        "stem": STUB_STEM.format(number=number),
+                        "choices": list(STUB_CHOICES),
+                        "correct_answers": ["C"],
+                        "feedback": STUB_FEEDBACK,
+                    }
+                    for number, name in ITEM_LINE_PATTERN.findall(item_list)
+                ])
+            choices = "\n".join(f"{label}. {choice}" for label, choice in zip("ABCD", STUB_CHOICES))
+            return "\n\n".join(
+                f"**Item {number}: {name}**\n- {STUB_HEADER}\n\n{STUB_STEM.format(number=number)}\n\n"
+                f"{choices}\n\nCorrect Answer: C\n\nFeedback: {STUB_FEEDBACK}"
+                for number, name in ITEM_LINE_PATTERN.findall(item_list)
+            )
+        if json_response and schema is not None:
+            return json.dumps(stub_instance(schema, f"Stub text for a prompt with {len(prompt)} characters."))
+        words = " ".join(f"word{index % 50}" for index in range(self.output_words))
+        return f"# Stub Output\n\n**Summary** of a prompt with {len(prompt)} characters.\n\n- {words}\n"
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        prompt = str(contents)
+        if self.quota is not None:
+            self.quota.check(estimate_tokens(prompt))
+        if self.latency:
+            time.sleep(self.latency)
+        generation_config = kwargs.get('generation_config') or {}
+        text = self._text_for(
+            prompt, generation_config.get('response_mime_type') == 'application/json',
+            generation_config.get('response_schema'),
+        )
+        if stream:
+            return iter([StubResponse(piece) for piece in re.findall(r"\S+\s*", text)])
+        return StubResponse(text)
@@ -0,0 +1,484 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Import the prompt function from the prompts directory
+from prompts.lesson_blueprint_prompt import get_prompt
+from prompts.assessment_items_prompt import ITEM_SCHEMA, get_item_shards, get_prompt as get_assessment_prompt
+from prompts.media_suggestions_prompt import get_prompt as get_media_prompt
+from prompts.fact_check_prompt import FACT_CHECK_SCHEMA, get_prompt as get_fact_check_prompt
+from prompts.dei_check_prompt import DEI_CHECK_SCHEMA, get_prompt as get_dei_check_prompt
+from prompts.reference_prefix import get_prompt as get_reference_prefix
+from utils.assessment_items import format_item, parse_items
+from utils.assessment_merge import merge_items, missing_items
+from utils.context_cache import ContextCacheManager, GeminiContextCacheBackend
+from utils.pipeline import SUCCEEDED, FAILED, Pipeline, Stage
+from utils.rate_limit import Deadline, RateLimitedModel, rate_limiter, retry_budget
+from utils.readability import item_readability_problems, lesson_grade
+from utils.reference_corpus import ReferenceCorpus
+from utils.reference_retrieval import build_query, estimate_tokens, get_reference_index
+from utils.response_cache import CachedModel, response_cache
+from utils.review_merge import merge_dei_checks, merge_fact_checks, parse_review, review_parts
+from utils.style_lint import lint_items
+from utils.telemetry import telemetry
+from utils.token_budget import STAGE_INPUT_BUDGETS, TokenUsage, fit_sections, response_token_counts
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-1.5-flash"
+# "stub" runs the pipeline offline against StubGenerativeModel
+GEMINI_BACKEND = os.getenv("GEMINI_BACKEND", "gemini")
+# Context caching needs an explicit model version
+CONTEXT_CACHE_MODEL = "models/gemini-1.5-flash-002"
+USE_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "1") != "0" and GEMINI_BACKEND != "stub"
+REFERENCE_TOP_K = 8
+# Downstream stages use the head of the blueprint (title, question, objectives) as the retrieval query
+LESSON_CONTEXT_CHARS = 2000
+# Upper bound on concurrently running stages
+PIPELINE_MAX_WORKERS = 4
+# Upper bound on concurrent assessment shard requests
+ASSESSMENT_SHARD_WORKERS = 6
+# Assessment items come back as schema-constrained JSON (one object per item)
+ASSESSMENT_GENERATION_CONFIG = {'response_mime_type': 'application/json', 'response_schema': ITEM_SCHEMA}
+# Upper bound on concurrent review requests of each check (fact check, DEI check)
+REVIEW_PART_WORKERS = 6
+# Each part's fact check and DEI review come back as JSON and are merged into one report
+FACT_CHECK_GENERATION_CONFIG = {'response_mime_type': 'application/json', 'response_schema': FACT_CHECK_SCHEMA}
+DEI_CHECK_GENERATION_CONFIG = {'response_mime_type': 'application/json', 'response_schema': DEI_CHECK_SCHEMA}
+
+
+# Load reference materials once; each file is extracted a single time and shared by every view
+reference_materials_folder = 'reference_materials'
+reference_corpus = ReferenceCorpus(reference_materials_folder)
+
+
+class References:
+    """The reference material every stage's prompt is built from, derived once from the corpus."""
+
+    def __init__(self, corpus):
+        # DEI-specific and blueprint-specific reference materials
+        self.dei_content = corpus.dei_set
+        self.blueprint_guide = corpus.blueprint_guide
+        # Static prefix shared by all five stages; cached server-side when Gemini context caching is available
+        self.static_prefix = get_reference_prefix(self.dei_content, self.blueprint_guide)
+        # Without a cache, prompts get the relevant excerpts from a local passage index instead of whole documents
+        self.dei_index = get_reference_index(corpus.dei_documents)
+
+
+# Built on first use (or by warm_references() in the background) rather than at import, so the
+# app can render before the reference files are read
+_references = None
+_references_lock = threading.Lock()
+
+def get_references():
+    global _references
+    with _references_lock:
+        if _references is None:
+            _references = References(reference_corpus)
+        return _references
+
+def warm_references():
+    # Load the references on a background thread, off the app's render path; a stage that
+    # needs them first just waits for the lock
+    if _references is None:
+        threading.Thread(target=get_references, name='reference-warmup', daemon=True).start()
+
+# google.generativeai takes most of a second to import, so it is loaded (and configured with
+# the API key passed to configure_gemini) when the first Gemini client is built
+_gemini_api_key = None
+_genai = None
+_genai_lock = threading.Lock()
+
+def configure_gemini(api_key):
+    global _gemini_api_key
+    with _genai_lock:
+        _gemini_api_key = api_key
+        if _genai is not None:
+            _genai.configure(api_key=api_key)
+
+def load_genai():
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            if _gemini_api_key:
+                genai.configure(api_key=_gemini_api_key)
+            _genai = genai
+        return _genai
+
+def rate_limited(model):
+    # Every API call goes through the process-wide rate limiter and retry policy
+    return RateLimitedModel(model, rate_limiter, retry_budget)
+
+def create_model():
+    if GEMINI_BACKEND == "stub":
+        # The stub imports google.api_core (and grpc with it) for its quota errors; only load it when used
+        from utils.gemini_stub import StubGenerativeModel
+        return CachedModel(rate_limited(StubGenerativeModel(MODEL_NAME)), response_cache)
+    return CachedModel(rate_limited(load_genai().GenerativeModel(MODEL_NAME)), response_cache)
+
+# Model instances, answered from the shared response cache when the prompt was seen before.
+# Each is built by stage_model() on first use; setting one beforehand (as the benchmarks do) replaces it.
+blueprint_model = None
+assessment_model = None
+media_model = None
+fact_check_model = None
+dei_check_model = None
+_model_lock = threading.Lock()
+
+def stage_model(stage):
+    attribute = f"{stage}_model"
+    with _model_lock:
+        if globals()[attribute] is None:
+            globals()[attribute] = create_model()
+        return globals()[attribute]
+
+# One context cache manager per process so handles are reused across reruns, sessions and batch lessons
+_context_cache_manager = None
+_context_cache_lock = threading.Lock()
+
+def get_context_cache_manager():
+    global _context_cache_manager
+    with _context_cache_lock:
+        if _context_cache_manager is None:
+            _context_cache_manager = ContextCacheManager(GeminiContextCacheBackend())
+        return _context_cache_manager
+
+
+class GenerationRun:
+    """Options and measurements for one pipeline run, shared by its stage functions."""
+
+    def __init__(self, bypass_cache=False, stream_buffers=None, deadline_seconds=None, budgets=None,
+                 bypass_stages=()):
+        self.bypass_cache = bypass_cache
+        # Stages that skip the response cache even when bypass_cache is off (e.g. one being regenerated)
+        self.bypass_stages = frozenset(bypass_stages)
+        # Shared by every call in the run, including rate-limit waits and retries
+        self.deadline = Deadline(deadline_seconds)
+        # Stage -> callable receiving streamed chunks (e.g. a StreamBuffer)
+        self.stream_buffers = stream_buffers or {}
+        # Stage -> input token budget per request
+        self.budgets = dict(STAGE_INPUT_BUDGETS, **(budgets or {}))
+        # Stage -> TokenUsage, summed over the stage's requests
+        self.token_usage = {}
+        # Groups this run's telemetry spans
+        self.run_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+
+    def on_chunk(self, stage):
+        return self.stream_buffers.get(stage)
+
+    def bypasses(self, stage):
+        return self.bypass_cache or stage in self.bypass_stages
+
+    def record_tokens(self, stage, full_input=0, input=0, output=0, trimmed=0, over_budget=0, calls=0):
+        with self._lock:
+            usage = self.token_usage.setdefault(stage, TokenUsage())
+            usage.calls += calls
+            usage.full_input += full_input
+            usage.input += input
+            usage.output += output
+            usage.trimmed += trimmed
+            usage.over_budget += over_budget
+
+    def record_stage_spans(self, results):
+        # One span per finished pipeline stage, including the time it waited for a worker
+        for name, result in results.items():
+            if result.started_at is None or result.finished_at is None:
+                continue
+            telemetry.record_interval(
+                f'stage.{name}', self.run_id, result.started_at, result.finished_at,
+                status='ok' if result.status == SUCCEEDED else 'error', queue_wait=result.queue_wait,
+            )
+        telemetry.write_prometheus()
+
+
+def get_dei_passages(stage, lesson_context):
+    return get_references().dei_index.search_text(build_query(stage, lesson_context), top_k=REFERENCE_TOP_K)
+
+def generate_with_reference(stage, model, build_prompt, sections, lesson_context, on_chunk=None, run=None,
+                            generation_config=None):
+    # Send build_prompt(**sections) after the reference prefix: from the context cache if possible, else
+    # inline retrieved passages. Sections are trimmed in TRIM_ORDER to keep the request within the stage's
+    # token budget. With on_chunk the response is streamed and on_chunk receives each partial chunk.
+    # generation_config (e.g. a JSON response schema) is sent with the request and is part of its cache key.
+    run = run or GenerationRun()
+    references = get_references()
+    backend_model = None
+    key_context = ''
+    if USE_CONTEXT_CACHE:
+        backend_model = get_context_cache_manager().model_for(CONTEXT_CACHE_MODEL, references.static_prefix)
+        if backend_model is not None:
+            backend_model = rate_limited(backend_model)
+            key_context = references.static_prefix
+
+    # The blueprint guide is only needed by the blueprint stage when it isn't cached
+    blueprint_guide = references.blueprint_guide if stage == 'blueprint' else None
+    budget_sections = dict(sections)
+    if backend_model is None:
+        budget_sections['reference_passages'] = get_dei_passages(stage, lesson_context)
+        fixed_prompt = get_reference_prefix('', blueprint_guide) + build_prompt(**{name: '' for name in sections})
+    else:
+        fixed_prompt = build_prompt(**{name: '' for name in sections})
+
+    budget = run.budgets[stage]
+    budget_sections, trimmed, over_budget = fit_sections(budget_sections, estimate_tokens(fixed_prompt), budget)
+    if trimmed:
+        logger.warning("%s prompt over its %d token budget; trimmed %d tokens", stage, budget, trimmed)
+    if over_budget:
+        logger.warning("%s prompt still %d tokens over its %d token budget after trimming", stage, over_budget, budget)
+
+    prompt = build_prompt(**{name: budget_sections[name] for name in sections})
+    if backend_model is None:
+        prompt = get_reference_prefix(budget_sections['reference_passages'], blueprint_guide) + prompt
+
+    stats = {}
+    options = {
+        'backend_model': backend_model,
+        'key_context': key_context,
+        'bypass_cache': run.bypasses(stage),
+        'deadline': run.deadline,
+        'stats': stats,
+    }
+    if generation_config is not None:
+        options['generation_config'] = generation_config
+    with telemetry.span(f'llm.{stage}', run_id=run.run_id, prompt_chars=len(prompt)) as span:
+        if on_chunk is not None:
+            response = model.stream_content(prompt, on_chunk, **options)
+        else:
+            response = model.generate_content(prompt, **options)
+        input_tokens, output_tokens = response_token_counts(response, prompt, response.text)
+        span.set(
+            response_chars=len(response.text), input_tokens=input_tokens, output_tokens=output_tokens,
+            context_cache=backend_model is not None, trimmed_tokens=trimmed, **stats
+        )
+
+    run.record_tokens(
+        stage,
+        full_input=estimate_tokens(references.static_prefix) + estimate_tokens(build_prompt(**sections)),
+        input=input_tokens,
+        output=output_tokens,
+        trimmed=trimmed,
+        over_budget=over_budget,
+        calls=1,
+    )
+    return response
+
+
+# Stage functions raise on failure; the pipeline records the error and skips dependent stages
+
+# Instruction prompt for Lesson Blueprint Generation
+def create_lesson_blueprint(lesson_title, lesson_info, additional_resources, on_chunk=None, run=None):
+    # Get the prompt from the imported function; the blueprint and DEI references go in the shared prefix
+    def build_prompt(additional_resources):
+        return get_prompt(lesson_info, additional_resources, lesson_title)
+
+    response = generate_with_reference(
+        'blueprint', stage_model('blueprint'), build_prompt, {'additional_resources': additional_resources},
+        f"{lesson_title}\n{lesson_info}", on_chunk=on_chunk, run=run
+    )
+    return response.text.strip()
+
+# Instruction prompt for Assessment Items Generation
+def create_assessment_items(blueprint, on_chunk=None, run=None, grade=None):
+    # Items are generated as JSON records in independent shards (instructional segment items, SSA items per
+    # objective, assessment items per objective/DOK) concurrently, validated against ASSESSMENT_ITEMS, and
+    # merged back in canonical item order as markdown. With a grade, items must also read within its
+    # Lexile band.
+    def generate_shard(item_numbers, corrections=None):
+        response = generate_with_reference(
+            'assessment', stage_model('assessment'),
+            lambda blueprint: get_assessment_prompt(blueprint, item_numbers, corrections),
+            {'blueprint': blueprint}, blueprint[:LESSON_CONTEXT_CHARS], run=run,
+            generation_config=ASSESSMENT_GENERATION_CONFIG,
+        )
+        items, problems = parse_items(response.text, expected=set(item_numbers))
+        # Style rule violations are found locally and count as problems, so only those items are re-requested
+        for number, violations in lint_items(items).items():
+            problems.setdefault(number, []).extend(map(str, violations))
+        for number, messages in item_readability_problems(items, grade).items():
+            problems.setdefault(number, []).extend(messages)
+        if on_chunk is not None:
+            # Valid items show up shard by shard, in completion order, while the rest are generated
+            shown = [format_item(items[number]) for number in item_numbers if number in items and number not in problems]
+            if shown:
+                on_chunk("\n\n".join(shown) + "\n\n")
+        return items, problems
+
+    items = {}
+    problems = {}
+    with ThreadPoolExecutor(max_workers=ASSESSMENT_SHARD_WORKERS) as executor:
+        for shard_items, shard_problems in executor.map(generate_shard, get_item_shards()):
+            items.update(shard_items)
+            problems.update(shard_problems)
+
+        # Ask once more for the items a shard dropped or got wrong, telling the model what was wrong with them.
+        # The retries keep the first pass's sharding, so a batch of flagged items never becomes one huge request.
+        retry = set(missing_items(items)) | set(problems)
+        retry_shards = [[number for number in shard if number in retry] for shard in get_item_shards()]
+        retry_shards = [shard for shard in retry_shards if shard]
+
+        def retry_shard(item_numbers):
+            corrections = {number: problems.get(number, ["missing from the response"]) for number in item_numbers}
+            return generate_shard(item_numbers, corrections)
+
+        for retried_items, retried_problems in executor.map(retry_shard, retry_shards):
+            for number, item in retried_items.items():
+                # A valid retry replaces the first attempt; an invalid one only fills a gap
+                if number not in retried_problems:
+                    items[number] = item
+                    problems.pop(number, None)
+                elif number not in items:
+                    items[number] = item
+                    problems[number] = retried_problems[number]
+    # Items still invalid are kept rather than failing the stage; missing ones make merge_items fail
+    kept = sorted(set(problems) & set(items))
+    if kept:
+        logger.warning("%d assessment item(s) kept with problems: %s", len(kept), ", ".join(map(str, kept)))
+    return merge_items({number: format_item(item) for number, item in items.items()})
+
+# Instruction prompt for Media Suggestions Generation
+def create_media_suggestions(blueprint, assessment, on_chunk=None, run=None):
+    response = generate_with_reference(
+        'media', stage_model('media'), get_media_prompt, {'blueprint': blueprint, 'assessment': assessment},
+        blueprint[:LESSON_CONTEXT_CHARS], on_chunk=on_chunk, run=run
+    )
+    return response.text.strip()
+    
+# Functions for fact checking and DEI checking
+def review_lesson_parts(stage, model, build_prompt, generation_config, blueprint, assessment, media_suggestions,
+                        on_chunk=None, run=None):
+    # Review each part of the lesson (groups of blueprint sections, assessment items and media entries)
+    # in its own request, concurrently. Returns (part label, review or None) in document order.
+    lesson_overview = blueprint[:LESSON_CONTEXT_CHARS]
+
+    def review(part_content):
+        part, content = part_content
+        response = generate_with_reference(
+            stage, model, lambda content: build_prompt(lesson_overview, part, content), {'content': content},
+            # Reference passages are retrieved for the part itself
+            content[:LESSON_CONTEXT_CHARS], run=run, generation_config=generation_config,
+        )
+        result = parse_review(response.text)
+        if result is None:
+            logger.warning("%s review of %s could not be parsed", stage, part)
+        if on_chunk is not None:
+            # Progress shows up part by part, in completion order, until the merged report replaces it
+            on_chunk(f"- Reviewed {part}\n" if result is not None else f"- Could not review {part}\n")
+        return part, result
+
+    with ThreadPoolExecutor(max_workers=REVIEW_PART_WORKERS) as executor:
+        return list(executor.map(review, review_parts(blueprint, assessment, media_suggestions)))
+
+def create_fact_check(blueprint, assessment, media_suggestions, on_chunk=None, run=None):
+    reviews = review_lesson_parts(
+        'fact_check', stage_model('fact_check'), get_fact_check_prompt, FACT_CHECK_GENERATION_CONFIG,
+        blueprint, assessment, media_suggestions, on_chunk=on_chunk, run=run,
+    )
+    return merge_fact_checks(reviews)
+
+def create_dei_check(blueprint, assessment, media_suggestions, on_chunk=None, run=None):
+    reviews = review_lesson_parts(
+        'dei_check', stage_model('dei_check'), get_dei_check_prompt, DEI_CHECK_GENERATION_CONFIG,
+        blueprint, assessment, media_suggestions, on_chunk=on_chunk, run=run,
+    )
+    return merge_dei_checks(reviews)
+
+
+# Stage name -> (session state key, message prefix shown when the stage fails)
+STAGE_OUTPUTS = {
+    'blueprint': ('blueprint_output', "Error generating content"),
+    'assessment': ('assessment_output', "Error generating assessment items"),
+    'media': ('media_output', "Error generating media suggestions"),
+    'fact_check': ('fact_check_output', "Error generating fact check"),
+    'dei_check': ('dei_check_output', "Error generating DEI check"),
+}
+
+def build_generation_pipeline(run=None, max_workers=PIPELINE_MAX_WORKERS):
+    # Each stage declares its inputs; independent stages (fact check, DEI check) run concurrently
+    run = run or GenerationRun()
+
+    def blueprint(lesson_title, lesson_info, additional_resources):
+        return create_lesson_blueprint(
+            lesson_title, lesson_info, additional_resources, on_chunk=run.on_chunk('blueprint'), run=run
+        )
+
+    def assessment(blueprint, lesson_title, lesson_info):
+        # The lesson inputs only supply the grade level that sets the items' reading band
+        return create_assessment_items(
+            blueprint, on_chunk=run.on_chunk('assessment'), run=run,
+            grade=lesson_grade(lesson_title, lesson_info, blueprint),
+        )
+
+    def media(blueprint, assessment):
+        return create_media_suggestions(blueprint, assessment, on_chunk=run.on_chunk('media'), run=run)
+
+    def fact_check(blueprint, assessment, media):
+        return create_fact_check(blueprint, assessment, media, on_chunk=run.on_chunk('fact_check'), run=run)
+
+    def dei_check(blueprint, assessment, media):
+        return create_dei_check(blueprint, assessment, media, on_chunk=run.on_chunk('dei_check'), run=run)
+
+    return Pipeline([
+        Stage('blueprint', blueprint, ['lesson_title', 'lesson_info', 'additional_resources']),
+        Stage('assessment', assessment, ['blueprint', 'lesson_title', 'lesson_info']),
+        Stage('media', media, ['blueprint', 'assessment']),
+        Stage('fact_check', fact_check, ['blueprint', 'assessment', 'media']),
+        Stage('dei_check', dei_check, ['blueprint', 'assessment', 'media']),
+    ], max_workers=max_workers)
+
+def stages_invalidated_by(stage):
+    # Stages that must be regenerated along with stage, in pipeline order
+    return build_generation_pipeline().downstream(stage)
+
+def stage_input_hash(stage, values):
+    # Identifies what a stage's output was generated from: its name and the value of every input
+    payload = json.dumps([stage, sorted(values.items())], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def stage_input_values(pipeline, stage, inputs, outputs):
+    return {
+        name: outputs[name] if name in pipeline.stages else inputs[name]
+        for name in pipeline.stages[stage].inputs
+    }
+
+def stage_records(pipeline, inputs, results):
+    # Stage -> (input hash, output) for every stage that succeeded, to be kept with the outputs
+    outputs = {name: result.value for name, result in results.items() if result.status == SUCCEEDED}
+    return {
+        name: (stage_input_hash(name, stage_input_values(pipeline, name, inputs, outputs)), value)
+        for name, value in outputs.items()
+    }
+
+def reusable_outputs(pipeline, inputs, records, regenerate=()):
+    # Stage -> output from earlier records whose inputs are unchanged. Stages in regenerate and
+    # everything downstream of them are never reused; neither is anything whose upstream changed.
+    invalid = set(regenerate)
+    for stage in regenerate:
+        invalid.update(pipeline.downstream(stage))
+    reusable = {}
+    progressed = True
+    while progressed:
+        progressed = False
+        for name in pipeline.stages:
+            if name in reusable or name in invalid or name not in records:
+                continue
+            if not all(upstream in reusable for upstream in pipeline.upstream(name)):
+                continue
+            input_hash, value = records[name]
+            if input_hash == stage_input_hash(name, stage_input_values(pipeline, name, inputs, reusable)):
+                reusable[name] = value
+                progressed = True
+    return reusable
+
+def stage_output_text(result):
+    # Text shown for a finished stage: its output, or why it has none
+    if result.status == SUCCEEDED:
+        return result.value
+    if result.status == FAILED:
+        return f"{STAGE_OUTPUTS[result.name][1]}: {str(result.error)}"
+    return result.error
@@ -0,0 +1,315 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.generation import STAGE_OUTPUTS, GenerationRun, build_generation_pipeline, stage_output_text, stage_records
+from utils.pipeline import SUCCEEDED
+from utils.streaming import StreamBuffer
+
+DEFAULT_DB_PATH = os.getenv("GENERATION_JOBS_DB", os.path.join('.cache', 'jobs.sqlite3'))
+# Generation jobs run at the same time (each runs its own stages concurrently)
+JOB_WORKERS = int(os.getenv("GENERATION_JOB_WORKERS", "2"))
+# The process running a job touches it this often; a queued or running job whose owner process has
+# exited, or that hasn't been touched for JOB_STALE_SECONDS, was interrupted
+JOB_HEARTBEAT_SECONDS = 30
+JOB_STALE_SECONDS = 5 * JOB_HEARTBEAT_SECONDS
+
+# Job statuses
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+# The job raised before its pipeline finished; the error is in its report and its finished stages are kept
+FAILED = 'failed'
+# The process running the job stopped before it finished; its finished stages are kept
+INTERRUPTED = 'interrupted'
+FINISHED_STATUSES = (COMPLETED, FAILED, INTERRUPTED)
+
+
+def process_alive(pid):
+    # Whether a process with this ID is running on this machine (always assumed on Windows, where
+    # os.kill can't probe a process; the heartbeat still catches those jobs)
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """SQLite record of generation jobs and their per-stage status and output.
+
+    Written by the worker as each stage finishes, so a job can be reattached to by ID
+    from any session, after a page refresh, or resumed after a restart. Each job records the
+    process that runs it; other processes sharing the database leave it alone while that
+    process is alive and keeps the job's heartbeat fresh.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, clock=time.time):
+        self.db_path = db_path
+        self.clock = clock
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    inputs TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    report TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    owner_pid INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS job_stages (
+                    job_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    output TEXT,
+                    input_hash TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, stage)
+                );
+            """)
+            columns = {row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")}
+            if 'owner_pid' not in columns:
+                # Databases written before jobs recorded their owner
+                self._connection.execute("ALTER TABLE jobs ADD COLUMN owner_pid INTEGER")
+            # Jobs left queued or running by processes that have exited can never finish. Swept on
+            # first use rather than at import, so importing this module never touches the database.
+            self._mark_interrupted(self._connection)
+        return self._connection
+
+    def _abandoned(self, owner_pid, updated_at):
+        # The owner has exited, or has stopped beating (which also catches a reused process ID)
+        if owner_pid is None or self.clock() - updated_at > JOB_STALE_SECONDS:
+            return True
+        return owner_pid != os.getpid() and not process_alive(owner_pid)
+
+    def _mark_interrupted(self, connection, job_ids=None):
+        # Mark the given queued or running jobs (or all of them) interrupted if their owner is gone
+        query = "SELECT id, owner_pid, updated_at FROM jobs WHERE status IN (?, ?)"
+        params = [QUEUED, RUNNING]
+        if job_ids is not None:
+            query += f" AND id IN ({', '.join('?' * len(job_ids))})"
+            params += list(job_ids)
+        abandoned = [
+            (INTERRUPTED, self.clock(), job_id) for job_id, owner_pid, updated_at in connection.execute(query, params)
+            if self._abandoned(owner_pid, updated_at)
+        ]
+        if abandoned:
+            connection.executemany("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", abandoned)
+            connection.commit()
+
+    def create(self, inputs, options):
+        job_id = uuid.uuid4().hex[:12]
+        now = self.clock()
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT INTO jobs (id, status, inputs, options, created_at, updated_at, owner_pid) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(inputs), json.dumps(options), now, now, os.getpid()),
+            )
+            connection.executemany(
+                "INSERT INTO job_stages (job_id, stage, status, updated_at) VALUES (?, ?, 'pending', ?)",
+                [(job_id, stage, now) for stage in STAGE_OUTPUTS],
+            )
+            connection.commit()
+        return job_id
+
+    def set_status(self, job_id, status, report=None):
+        with self._lock:
+            connection = self._connect()
+            if report is None:
+                connection.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (status, self.clock(), job_id)
+                )
+            else:
+                connection.execute(
+                    "UPDATE jobs SET status = ?, report = ?, updated_at = ? WHERE id = ?",
+                    (status, json.dumps(report), self.clock(), job_id),
+                )
+            connection.commit()
+
+    def set_stage(self, job_id, stage, status, output=None, input_hash=None):
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "UPDATE job_stages SET status = ?, output = COALESCE(?, output), "
+                "input_hash = COALESCE(?, input_hash), updated_at = ? WHERE job_id = ? AND stage = ?",
+                (status, output, input_hash, self.clock(), job_id, stage),
+            )
+            connection.commit()
+
+    def heartbeat(self, job_ids):
+        # Mark jobs this process is running as still alive
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                [(self.clock(), job_id, QUEUED, RUNNING) for job_id in job_ids],
+            )
+            connection.commit()
+
+    def get(self, job_id):
+        # Job dict with 'stages': stage -> {'status', 'output', 'input_hash'}, or None if unknown
+        with self._lock:
+            connection = self._connect()
+            # A job whose owner has exited since the sweep is reported as interrupted
+            self._mark_interrupted(connection, (job_id,))
+            row = connection.execute(
+                "SELECT id, status, inputs, options, report, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            stage_rows = connection.execute(
+                "SELECT stage, status, output, input_hash FROM job_stages WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        stages = {stage: {'status': status, 'output': output, 'input_hash': input_hash}
+                  for stage, status, output, input_hash in stage_rows}
+        return {
+            'id': row[0],
+            'status': row[1],
+            'inputs': json.loads(row[2]),
+            'options': json.loads(row[3]),
+            'report': json.loads(row[4]) if row[4] else None,
+            'created_at': row[5],
+            'updated_at': row[6],
+            # In STAGE_OUTPUTS order
+            'stages': {stage: stages[stage] for stage in STAGE_OUTPUTS if stage in stages},
+        }
+
+    def recent(self, limit=10):
+        # (job id, status, lesson title, created_at), newest first
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, status, inputs, created_at FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [(job_id, status, json.loads(inputs).get('lesson_title', ''), created_at)
+                for job_id, status, inputs, created_at in rows]
+
+
+
+class JobRunner:
+    """Runs generation jobs on a background thread pool, recording progress in a JobStore.
+
+    The Streamlit script submits a job and returns immediately; any session can then poll
+    the store (and, in this process, the live stream buffers) by job ID.
+    """
+
+    def __init__(self, store, max_workers=JOB_WORKERS):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='generation-job')
+        # Job ID -> (PipelineRun or None until started, stage -> StreamBuffer), for jobs running in this process
+        self._live = {}
+        self._lock = threading.Lock()
+        self._heartbeat = None
+
+    def submit(self, inputs, completed=None, bypass_cache=False, bypass_stages=()):
+        # completed: stage -> output reused instead of regenerated
+        completed = dict(completed or {})
+        options = {'bypass_cache': bypass_cache, 'bypass_stages': list(bypass_stages), 'reused': sorted(completed)}
+        job_id = self.store.create(inputs, options)
+        stream_buffers = {stage: StreamBuffer() for stage in STAGE_OUTPUTS}
+        with self._lock:
+            self._live[job_id] = (None, stream_buffers)
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._beat, name='generation-job-heartbeat', daemon=True)
+                self._heartbeat.start()
+        self._executor.submit(self._run, job_id, inputs, completed, options, stream_buffers)
+        return job_id
+
+    def _beat(self):
+        # Keep the heartbeat of this process's jobs fresh so other processes don't take them as interrupted
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            with self._lock:
+                job_ids = list(self._live)
+            if job_ids:
+                self.store.heartbeat(job_ids)
+
+    def resume(self, job_id):
+        # Start a new job for a failed or interrupted one, reusing the stages it finished
+        job = self.store.get(job_id)
+        completed = {
+            stage: record['output'] for stage, record in job['stages'].items() if record['status'] == SUCCEEDED
+        }
+        return self.submit(
+            job['inputs'], completed, job['options']['bypass_cache'], job['options']['bypass_stages']
+        )
+
+    def live_progress(self, job_id):
+        # stage -> (status, text streamed so far) for a job running in this process, else None
+        with self._lock:
+            live = self._live.get(job_id)
+        if live is None:
+            return None
+        pipeline_run, stream_buffers = live
+        return {
+            stage: (pipeline_run.results[stage].status if pipeline_run else 'pending', stream_buffers[stage].text)
+            for stage in STAGE_OUTPUTS
+        }
+
+    def _run(self, job_id, inputs, completed, options, stream_buffers):
+        run = GenerationRun(
+            bypass_cache=options['bypass_cache'], stream_buffers=stream_buffers,
+            bypass_stages=options['bypass_stages'],
+        )
+        pipeline = build_generation_pipeline(run)
+        self.store.set_status(job_id, RUNNING)
+        for stage, output in completed.items():
+            self.store.set_stage(job_id, stage, SUCCEEDED, output=output)
+
+        def on_stage_succeeded(stage, value):
+            self.store.set_stage(job_id, stage, SUCCEEDED, output=value)
+
+        status, report = COMPLETED, {}
+        try:
+            pipeline_run = pipeline.start(inputs, completed=completed, on_stage_succeeded=on_stage_succeeded)
+            with self._lock:
+                self._live[job_id] = (pipeline_run, stream_buffers)
+            pipeline_run.wait()
+            results = pipeline_run.results
+            records = stage_records(pipeline, inputs, results)
+            for stage, result in results.items():
+                input_hash = records[stage][0] if stage in records else None
+                self.store.set_stage(job_id, stage, result.status, output=stage_output_text(result), input_hash=input_hash)
+            run.record_stage_spans(results)
+            report = {
+                'telemetry_run_id': run.run_id,
+                'token_usage': {stage: usage.as_dict() for stage, usage in run.token_usage.items()},
+                'stage_timing': {
+                    stage: (
+                        'reused' if stage in completed else result.status,
+                        result.queue_wait, result.duration, stream_buffers[stage].time_since(result.started_at),
+                    )
+                    for stage, result in results.items()
+                },
+            }
+        except Exception as e:
+            status, report = FAILED, {'error': str(e)}
+        finally:
+            self.store.set_status(job_id, status, report)
+            with self._lock:
+                self._live.pop(job_id, None)
+
+
+# Process-wide instances; module state survives Streamlit reruns and is shared by all sessions
+job_store = JobStore()
+job_runner = JobRunner(job_store)
@@ -0,0 +1,222 @@
+import re
+
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+
+# Block-level patterns, compiled once and matched against each line a single time
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+BULLET_PATTERN = re.compile(r'^([ \t]*)[-*+]\s+(.*)$')
+NUMBERED_PATTERN = re.compile(r'^([ \t]*)(\d+)[.)]\s+(.*)$')
+TABLE_SEPARATOR_PATTERN = re.compile(r'^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$')
+RULE_PATTERN = re.compile(r'^\s*(?:-{3,}|\*{3,}|_{3,})\s*$')
+
+# Inline emphasis: ***bold italic***, **bold** / __bold__, *italic* / _italic_ (underscores only at word edges)
+INLINE_PATTERN = re.compile(
+    r'\*\*\*(?P<bold_italic>.+?)\*\*\*'
+    r'|\*\*(?P<bold>.+?)\*\*'
+    r'|__(?P<bold_underscore>.+?)__'
+    r'|\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*'
+    r'|(?<!\w)_(?P<italic_underscore>[^_\s](?:[^_]*[^_\s])?)_(?!\w)'
+)
+
+# Deepest list level with its own Word style ("List Bullet 3", "List Number 3")
+MAX_LIST_LEVEL = 2
+
+# Token kinds
+HEADING = 'heading'
+BULLET = 'bullet'
+NUMBERED = 'numbered'
+TABLE = 'table'
+PARAGRAPH = 'paragraph'
+RULE = 'rule'
+
+
+def split_row(line):
+    # Cells of a markdown table row, with the optional outer pipes removed
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|'):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split('|')]
+
+def indent_width(whitespace):
+    return len(whitespace.expandtabs(4))
+
+def tokenize(content):
+    # Yields (kind, level, payload) block tokens in one pass over the lines:
+    # headings (level = 1-6, payload = text), bullet and numbered items (level = nesting depth,
+    # payload = text or (number, text)), tables (payload = rows of cells), rules and paragraphs.
+    lines = content.split('\n')
+    list_indents = []
+    i = 0
+    count = len(lines)
+    while i < count:
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            i += 1
+            continue
+
+        if '|' in line and i + 1 < count and '|' in lines[i + 1] and TABLE_SEPARATOR_PATTERN.match(lines[i + 1]):
+            rows = [split_row(line)]
+            i += 2
+            while i < count and '|' in lines[i] and lines[i].strip():
+                rows.append(split_row(lines[i]))
+                i += 1
+            list_indents = []
+            yield TABLE, 0, rows
+            continue
+
+        list_match = BULLET_PATTERN.match(line)
+        numbered_match = None if list_match else NUMBERED_PATTERN.match(line)
+        if (list_match or numbered_match) and not RULE_PATTERN.match(line):
+            indent = indent_width((list_match or numbered_match).group(1))
+            # Nesting follows relative indentation, so 2- and 4-space styles both work
+            while list_indents and indent < list_indents[-1]:
+                list_indents.pop()
+            if not list_indents or indent > list_indents[-1]:
+                list_indents.append(indent)
+            level = min(len(list_indents) - 1, MAX_LIST_LEVEL)
+            if list_match:
+                yield BULLET, level, list_match.group(2)
+            else:
+                yield NUMBERED, level, (int(numbered_match.group(2)), numbered_match.group(3))
+            i += 1
+            continue
+
+        list_indents = []
+        heading_match = HEADING_PATTERN.match(stripped)
+        if heading_match:
+            yield HEADING, len(heading_match.group(1)), heading_match.group(2)
+        elif RULE_PATTERN.match(stripped):
+            yield RULE, 0, None
+        else:
+            yield PARAGRAPH, 0, line
+        i += 1
+
+
+def add_run(paragraph, text):
+    # Run.text translates tabs and line breaks one character at a time; lines from tokenize()
+    # have no line breaks, so text without tabs is written as a single <w:t> directly
+    if '\t' in text:
+        return paragraph.add_run(text)
+    run = paragraph.add_run()
+    run._r.add_t(text)
+    return run
+
+def add_inline_runs(paragraph, text):
+    # Adds text to the paragraph as runs, applying bold/italic emphasis
+    position = 0
+    for match in INLINE_PATTERN.finditer(text):
+        if match.start() > position:
+            add_run(paragraph, text[position:match.start()])
+        kind = match.lastgroup
+        run = add_run(paragraph, match.group(kind))
+        if kind in ('bold_italic', 'bold', 'bold_underscore'):
+            run.bold = True
+        if kind in ('bold_italic', 'italic', 'italic_underscore'):
+            run.italic = True
+        position = match.end()
+    if position < len(text):
+        add_run(paragraph, text[position:])
+
+
+class DocxWriter:
+    """Emits python-docx objects for markdown tokens.
+
+    Styles are resolved to style ids once per document and assigned directly; assigning
+    them by name makes python-docx scan every style in the template for each paragraph.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._style_ids = {}
+        # List level -> numbering id of the numbered list currently open at that level
+        self._numbering = {}
+
+    def style_id(self, name):
+        style_id = self._style_ids.get(name)
+        if style_id is None:
+            style_id = self._style_ids[name] = self.doc.styles[name].style_id
+        return style_id
+
+    def paragraph(self, style_name=None, text=None):
+        paragraph = self.doc.add_paragraph()
+        if style_name is not None:
+            paragraph._p.style = self.style_id(style_name)
+        if text:
+            add_inline_runs(paragraph, text)
+        return paragraph
+
+    def title(self, text):
+        paragraph = self.doc.add_paragraph()
+        paragraph._p.style = self.style_id('Heading 1')
+        add_run(paragraph, text)
+        paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+
+    def heading(self, level, text):
+        self.paragraph(f'Heading {level}', text)
+
+    def bullet(self, level, text):
+        self._numbering = {list_level: num_id for list_level, num_id in self._numbering.items() if list_level < level}
+        self.paragraph('List Bullet' if level == 0 else f'List Bullet {level + 1}', text)
+
+    def numbered(self, level, number, text):
+        # Each numbered list restarts at its first item's number rather than continuing the previous list
+        style_name = 'List Number' if level == 0 else f'List Number {level + 1}'
+        self._numbering = {list_level: num_id for list_level, num_id in self._numbering.items() if list_level <= level}
+        num_id = self._numbering.get(level)
+        if num_id is None:
+            num_id = self._numbering[level] = self._restarted_numbering(style_name, number)
+        paragraph = self.paragraph(style_name, text)
+        paragraph._p.get_or_add_pPr().get_or_add_numPr().get_or_add_numId().val = num_id
+
+    def _restarted_numbering(self, style_name, start):
+        style_num_pr = self.doc.styles[style_name].element.pPr.numPr
+        numbering = self.doc.part.numbering_part.element
+        abstract_num_id = numbering.num_having_numId(style_num_pr.numId.val).abstractNumId.val
+        num = numbering.add_num(abstract_num_id)
+        ilvl = style_num_pr.ilvl.val if style_num_pr.ilvl is not None else 0
+        num.add_lvlOverride(ilvl=ilvl).add_startOverride(start)
+        return num.numId
+
+    def table(self, rows):
+        column_count = max(len(row) for row in rows)
+        word_table = self.doc.add_table(rows=len(rows), cols=column_count)
+        word_table._tbl.tblStyle_val = self.style_id('Table Grid')
+        for row_index, (row, cells) in enumerate(zip(word_table.rows, rows)):
+            for cell, text in zip(row.cells, cells):
+                paragraph = cell.paragraphs[0]
+                add_inline_runs(paragraph, text)
+                # Make header row bold
+                if row_index == 0:
+                    for run in paragraph.runs:
+                        run.bold = True
+        # Add space after table
+        self.doc.add_paragraph()
+
+    def write(self, tokens):
+        for kind, level, payload in tokens:
+            if kind == BULLET:
+                self.bullet(level, payload)
+                continue
+            if kind == NUMBERED:
+                self.numbered(level, *payload)
+                continue
+            self._numbering = {}
+            if kind == HEADING:
+                self.heading(level, payload)
+            elif kind == TABLE:
+                self.table(payload)
+            elif kind == RULE:
+                self.doc.add_paragraph()
+            else:
+                self.paragraph(text=payload)
+
+
+def render_markdown(doc, title, content):
+    # Writes a centred title and the markdown content into a python-docx Document
+    writer = DocxWriter(doc)
+    writer.title(title)
+    writer.write(tokenize(content))
+    return doc
@@ -0,0 +1,52 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Pages in each task sent to the extraction pool
+PAGES_PER_SHARD = 16
+# PDFs with fewer pages are read in-process; below this, handing pages to the pool costs more than it saves
+PARALLEL_MIN_PAGES = 48
+# Worker processes for page extraction; with fewer than two, PDFs are always read in-process
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0")) or min(os.cpu_count() or 1, 8)
+
+
+def page_ranges(page_count, pages_per_shard=PAGES_PER_SHARD):
+    # (start, stop) page ranges covering a document, in order
+    return [(start, min(start + pages_per_shard, page_count)) for start in range(0, page_count, pages_per_shard)]
+
+def read_pages(pdf_path, start, stop):
+    # Text of pages [start, stop) of a PDF. Runs in a pool worker, which opens the file itself.
+    import fitz as pymupdf
+
+    with pymupdf.open(pdf_path) as doc:
+        return "".join(doc[index].get_text() for index in range(start, stop))
+
+
+# One pool per process, started on the first large PDF and shared by every document being read,
+# so shards of several documents run side by side
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_extraction_pool():
+    global _pool
+    if EXTRACTION_WORKERS < 2:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the app and the job runner have threads running
+            _pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def read_pdf_text(pdf_path, pool=None, pages_per_shard=PAGES_PER_SHARD, min_pages=PARALLEL_MIN_PAGES):
+    # Text of every page of a PDF, joined once. Large PDFs are split into page ranges that the
+    # extraction pool (or the given pool) reads in parallel; the rest are read in-process.
+    import fitz as pymupdf
+
+    pool = pool if pool is not None else get_extraction_pool()
+    with pymupdf.open(pdf_path) as doc:
+        if pool is None or doc.page_count < min_pages:
+            return "".join(page.get_text() for page in doc)
+        ranges = page_ranges(doc.page_count, pages_per_shard)
+    shards = [pool.submit(read_pages, pdf_path, start, stop) for start, stop in ranges]
+    return "".join(shard.result() for shard in shards)
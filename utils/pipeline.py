@@ -0,0 +1,184 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Stage result statuses
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class Stage:
+    """One pipeline step: func is called with keyword arguments named after its inputs.
+
+    An input is either a value passed to Pipeline.start or the output of another stage.
+    """
+
+    def __init__(self, name, func, inputs=()):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+
+
+class StageResult:
+    __slots__ = ('name', 'status', 'value', 'error', 'ready_at', 'started_at', 'finished_at')
+
+    def __init__(self, name):
+        self.name = name
+        self.status = PENDING
+        self.value = None
+        self.error = None
+        self.ready_at = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def queue_wait(self):
+        # Seconds between the stage's inputs being ready and a worker picking it up
+        if self.ready_at is None or self.started_at is None:
+            return None
+        return self.started_at - self.ready_at
+
+    @property
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class Pipeline:
+    """Runs stages as a DAG on a bounded thread pool.
+
+    A stage starts as soon as all of its upstream stages succeed, so independent
+    stages run concurrently. If a stage raises, it is marked failed and everything
+    downstream of it is skipped rather than run on a bad input.
+    """
+
+    def __init__(self, stages, max_workers=4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers
+        for stage in stages:
+            for name in stage.inputs:
+                if name in self.stages and self._depends_on(name, stage.name):
+                    raise ValueError(f"Pipeline has a cycle through stage '{stage.name}'")
+
+    def _depends_on(self, name, target, seen=None):
+        seen = seen if seen is not None else set()
+        if name == target:
+            return True
+        if name in seen:
+            return False
+        seen.add(name)
+        return any(
+            self._depends_on(upstream, target, seen)
+            for upstream in self.stages[name].inputs if upstream in self.stages
+        )
+
+    def upstream(self, name):
+        return [upstream for upstream in self.stages[name].inputs if upstream in self.stages]
+
+    def downstream(self, name):
+        # Every stage that consumes name's output, directly or through other stages
+        return [other for other in self.stages if other != name and self._depends_on(other, name)]
+
+    def start(self, inputs, completed=None, on_stage_succeeded=None):
+        # completed: stage name -> output from an earlier run (e.g. a checkpoint); those stages are not rerun.
+        # on_stage_succeeded(name, value) is called from the worker thread before dependents start.
+        missing = [
+            name for stage in self.stages.values() for name in stage.inputs
+            if name not in self.stages and name not in inputs
+        ]
+        if missing:
+            raise ValueError(f"Missing pipeline inputs: {', '.join(sorted(set(missing)))}")
+        return PipelineRun(self, inputs, completed, on_stage_succeeded)
+
+    def run(self, inputs, completed=None, on_stage_succeeded=None):
+        pipeline_run = self.start(inputs, completed, on_stage_succeeded)
+        pipeline_run.wait()
+        return pipeline_run.results
+
+
+class PipelineRun:
+    def __init__(self, pipeline, inputs, completed=None, on_stage_succeeded=None):
+        self.pipeline = pipeline
+        self.inputs = dict(inputs)
+        self.on_stage_succeeded = on_stage_succeeded
+        self.results = {name: StageResult(name) for name in pipeline.stages}
+        for name, value in (completed or {}).items():
+            if name in self.results:
+                self.results[name].status = SUCCEEDED
+                self.results[name].value = value
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=pipeline.max_workers, thread_name_prefix='pipeline')
+        with self._lock:
+            self._schedule_ready()
+            self._check_finished()
+
+    def _schedule_ready(self):
+        # Called with the lock held: submit pending stages whose upstream all succeeded, skip the rest
+        progressed = True
+        while progressed:
+            progressed = False
+            for name, result in self.results.items():
+                if result.status != PENDING:
+                    continue
+                upstream = [self.results[dep] for dep in self.pipeline.upstream(name)]
+                failed = [dep for dep in upstream if dep.status in (FAILED, SKIPPED)]
+                if failed:
+                    result.status = SKIPPED
+                    result.error = f"Skipped because upstream stage '{failed[0].name}' did not complete"
+                    progressed = True
+                elif all(dep.status == SUCCEEDED for dep in upstream):
+                    result.status = RUNNING
+                    result.ready_at = time.perf_counter()
+                    self._executor.submit(self._run_stage, name)
+
+    def _run_stage(self, name):
+        stage = self.pipeline.stages[name]
+        result = self.results[name]
+        result.started_at = time.perf_counter()
+        try:
+            kwargs = {
+                input_name: self.results[input_name].value if input_name in self.results else self.inputs[input_name]
+                for input_name in stage.inputs
+            }
+            value = stage.func(**kwargs)
+            status, error = SUCCEEDED, None
+        except Exception as e:
+            value, status, error = None, FAILED, e
+        if status == SUCCEEDED and self.on_stage_succeeded is not None:
+            try:
+                self.on_stage_succeeded(name, value)
+            except Exception as e:
+                # A stage whose output can't be recorded counts as failed
+                value, status, error = None, FAILED, e
+        with self._lock:
+            result.finished_at = time.perf_counter()
+            result.value = value
+            result.error = error
+            result.status = status
+            self._schedule_ready()
+            self._check_finished()
+
+    def _check_finished(self):
+        if all(result.status in (SUCCEEDED, FAILED, SKIPPED) for result in self.results.values()):
+            self.finished_at = time.perf_counter()
+            self._executor.shutdown(wait=False)
+            self._finished.set()
+
+    def wait(self, timeout=None):
+        # True once every stage has finished, failed or been skipped
+        return self._finished.wait(timeout)
+
+    def done(self):
+        return self._finished.is_set()
+
+    @property
+    def duration(self):
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
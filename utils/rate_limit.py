@@ -0,0 +1,187 @@
+import os
+import random
+import threading
+import time
+
+from utils.reference_retrieval import estimate_tokens
+
+# HTTP status codes worth retrying: quota (429) and transient server errors
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Output tokens assumed per request when reserving tokens-per-minute capacity
+DEFAULT_EXPECTED_OUTPUT_TOKENS = 2000
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    """Absolute point in time a whole operation must finish by; None means no limit."""
+
+    def __init__(self, seconds=None, clock=time.monotonic):
+        self.clock = clock
+        self.expires_at = None if seconds is None else clock() + seconds
+
+    def remaining(self):
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - self.clock(), 0.0)
+
+    def check(self, wait=0.0):
+        # Raise if the deadline would pass before a wait of `wait` seconds completes
+        remaining = self.remaining()
+        if remaining is not None and remaining < wait:
+            raise DeadlineExceeded(f"Deadline exceeded ({remaining:.1f}s left, needed {wait:.1f}s)")
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.clock = clock
+        self._level = float(capacity)
+        self._updated_at = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self._level = min(self.capacity, self._level + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def wait_time(self, amount):
+        # Seconds until `amount` is available (call with the owner's lock held)
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._level >= amount:
+            return 0.0
+        return (amount - self._level) / self.refill_per_second
+
+    def take(self, amount):
+        self._refill()
+        self._level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Process-wide requests-per-minute and tokens-per-minute limiter shared by all model instances."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0, clock)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, clock)
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def acquire(self, estimated_tokens, deadline=None):
+        # Block until one request and estimated_tokens are available; returns the seconds waited
+        waited = 0.0
+        while True:
+            with self._lock:
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(estimated_tokens)
+                    self.waited_seconds += waited
+                    return waited
+            if deadline is not None:
+                deadline.check(wait)
+            self.sleep(wait)
+            waited += wait
+
+
+class RetryBudget:
+    """Caps retries at a fraction of successful requests so an outage doesn't multiply traffic."""
+
+    def __init__(self, ratio=0.2, capacity=20):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._lock = threading.Lock()
+
+    def record_success(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_spend(self):
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+def is_retryable(error):
+    # google.api_core exceptions carry the HTTP status in .code
+    return getattr(error, 'code', None) in RETRYABLE_STATUS_CODES
+
+
+class RateLimitedModel:
+    """Sits between a GenerativeModel and the API: waits for rate-limit capacity before each call
+    and retries quota/transient errors with jittered exponential backoff, within the retry budget
+    and the caller's deadline.
+    """
+
+    def __init__(self, model, limiter, retry_budget, max_attempts=5, base_delay=1.0, max_delay=30.0,
+                 expected_output_tokens=DEFAULT_EXPECTED_OUTPUT_TOKENS, sleep=time.sleep):
+        self.model = model
+        self.model_name = getattr(model, 'model_name', 'model')
+        self.limiter = limiter
+        self.retry_budget = retry_budget
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.expected_output_tokens = expected_output_tokens
+        self.sleep = sleep
+
+    def _backoff(self, attempt):
+        # Full jitter: uniform in [0, min(max_delay, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _call(self, contents, deadline, stats, kwargs):
+        estimated = estimate_tokens(str(contents)) + self.expected_output_tokens
+        stats = stats if stats is not None else {}
+        stats.setdefault('retries', 0)
+        stats.setdefault('rate_limit_wait', 0.0)
+        attempt = 0
+        while True:
+            stats['rate_limit_wait'] += self.limiter.acquire(estimated, deadline)
+            call_kwargs = dict(kwargs)
+            remaining = deadline.remaining() if deadline is not None else None
+            if remaining is not None:
+                call_kwargs['request_options'] = {**call_kwargs.get('request_options', {}), 'timeout': remaining}
+            try:
+                response = self.model.generate_content(contents, **call_kwargs)
+                if call_kwargs.get('stream'):
+                    # Errors usually surface on the first chunk; pull it inside the retry loop
+                    response = _prefetched(iter(response))
+                self.retry_budget.record_success()
+                return response
+            except Exception as e:
+                attempt += 1
+                if not is_retryable(e) or attempt >= self.max_attempts or not self.retry_budget.try_spend():
+                    raise
+                delay = self._backoff(attempt)
+                if deadline is not None:
+                    deadline.check(delay)
+                stats['retries'] += 1
+                stats['backoff_wait'] = stats.get('backoff_wait', 0.0) + delay
+                self.sleep(delay)
+
+    def generate_content(self, contents, deadline=None, stats=None, **kwargs):
+        # stats, if given, accumulates 'retries', 'rate_limit_wait' and 'backoff_wait' (seconds)
+        return self._call(contents, deadline, stats, kwargs)
+
+
+def _prefetched(chunks):
+    first = next(chunks, None)
+    def generator():
+        if first is not None:
+            yield first
+        yield from chunks
+    return generator()
+
+
+# Process-wide limiter and retry budget; quotas come from the environment
+rate_limiter = RateLimiter(
+    requests_per_minute=float(os.getenv("GEMINI_RPM", "1000")),
+    tokens_per_minute=float(os.getenv("GEMINI_TPM", "4000000")),
+)
+retry_budget = RetryBudget()
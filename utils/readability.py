@@ -0,0 +1,173 @@
+import re
+
+import numpy as np
+
+# Flesch-Kincaid grade level -> Lexile estimate, calibrated so text written at grade g lands in the
+# assessment prompt's band for grade g. It gates regeneration; it is not a MetaMetrics Lexile measure.
+LEXILE_PER_GRADE = 105
+LEXILE_OFFSET = -55
+# Grade -> (low, high) Lexile band, from the assessment prompt's style guidelines
+LEXILE_BANDS = {6: (500, 650), 7: (650, 800), 9: (800, 1000), 10: (900, 1100)}
+# Estimates this far outside the band are flagged; a single short item scores noisily
+LEXILE_TOLERANCE = 100
+
+GRADE_PATTERN = re.compile(r"\b(?:grade\s*(\d{1,2})|(\d{1,2})(?:st|nd|rd|th)[\s-]*grade)\b", re.I)
+# "**Student-friendly objective:** I can ..." / "Student-friendly: Explain ..." lines of a blueprint
+STUDENT_FRIENDLY_PATTERN = re.compile(r"^[\s*>-]*student[- ]friendly[^:\n]*:[\s*]*(.+?)\s*$", re.I | re.M)
+
+# Byte classes for the vectorized counts (text is lowercased and reduced to ASCII first), as bit flags
+# so a single table lookup classifies every byte
+WORD, VOWEL, SENTENCE_END, AFTER_SENTENCE, SYLLABIC_ED, SYLLABIC_ES = (1 << bit for bit in range(6))
+BYTE_CLASSES = np.zeros(256, dtype=np.uint8)
+for flag, members in (
+    (WORD, b"abcdefghijklmnopqrstuvwxyz0123456789"),
+    (VOWEL, b"aeiouy"),
+    (SENTENCE_END, b".?!"),
+    # What may follow sentence-ending punctuation ("3.5" and "U.S.A" are not sentence ends)
+    (AFTER_SENTENCE, b" \t\n\"')]*_"),
+    # Consonants before a final "ed" / "es" that keep it a syllable ("wanted", "passes")
+    (SYLLABIC_ED, b"td"),
+    (SYLLABIC_ES, b"sxzcgh"),
+):
+    BYTE_CLASSES[np.frombuffer(members, dtype=np.uint8)] |= flag
+
+APOSTROPHE, E, L, D, S = (ord(char) for char in "'elds")
+
+
+def _counts_between(positions, starts):
+    # Number of sorted positions falling in each span that begins at one of the sorted starts
+    # (each span runs to the next start; the last runs to the end)
+    boundaries = np.searchsorted(positions, starts)
+    return np.diff(np.append(boundaries, len(positions)))
+
+def text_statistics(texts):
+    # (sentences, words, syllables) as arrays with one entry per text. The whole batch is counted with
+    # a few array operations over its concatenated bytes rather than word by word. Syllables are vowel
+    # groups, less a silent final "e" (but not "-le"), "-ed" or "-es"; every word has at least one.
+    encoded = [text.lower().encode('ascii', 'ignore') for text in texts]
+    if not encoded:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    # Each text is followed by a newline, so every text's span ends a word and a sentence
+    text_ends = np.cumsum(np.fromiter((len(text) + 1 for text in encoded), dtype=np.int64, count=len(encoded))) - 1
+    text_starts = np.concatenate(([0], text_ends[:-1] + 1))
+    data = np.frombuffer(b"\n".join(encoded) + b"\n", dtype=np.uint8)
+    classes = BYTE_CLASSES[data]
+
+    word = (classes & WORD).astype(bool)
+    # Apostrophes inside words ("cherokee's") don't split them
+    inner_apostrophe = data[1:-1] == APOSTROPHE
+    word[1:-1] |= inner_apostrophe & word[:-2] & word[2:]
+    boundary = np.empty_like(word)
+    boundary[0] = word[0]
+    np.not_equal(word[1:], word[:-1], out=boundary[1:])
+    # Alternating starts and (exclusive) ends of runs of word bytes
+    edges = np.flatnonzero(boundary)
+    word_starts = edges[0::2]
+    word_ends = edges[1::2] - 1
+
+    vowel = (classes & VOWEL).astype(bool)
+    vowel_groups = vowel.copy()
+    vowel_groups[1:] &= ~vowel[:-1]
+    # Vowel groups per word as a difference of one running count
+    running = np.cumsum(vowel_groups.view(np.int8), dtype=np.int32)
+    syllables = running[word_ends] - running[word_starts] + vowel_groups[word_starts]
+
+    # Silent endings, judged at each word's last letters
+    last = data[word_ends]
+    before_last = data[word_ends - 1]
+    before_that_class = classes[word_ends - 2]
+    silent_e = (last == E) & vowel_groups[word_ends] & (before_last != L)
+    silent_suffix = (before_last == E) & vowel_groups[word_ends - 1] & (
+        ((last == D) & ~(before_that_class & SYLLABIC_ED).astype(bool))
+        | ((last == S) & ~(before_that_class & SYLLABIC_ES).astype(bool))
+    )
+    silent = (silent_e | silent_suffix) & (word_ends - word_starts >= 2) & (syllables > 1)
+    syllables = np.maximum(syllables - silent, 1)
+
+    # Per-text totals, from the (much shorter) arrays of word starts and sentence ends
+    words = _counts_between(word_starts, text_starts)
+    word_syllables = np.concatenate(([0], np.cumsum(syllables, dtype=np.int64)))
+    first_words = np.searchsorted(word_starts, text_starts)
+    syllable_counts = np.diff(np.append(word_syllables[first_words], word_syllables[-1]))
+
+    sentence_end = (classes[:-1] & SENTENCE_END).astype(bool)
+    sentence_end &= ~(classes[1:] & SENTENCE_END).astype(bool) & (classes[1:] & AFTER_SENTENCE).astype(bool)
+    # Every text ends in a newline, so its last byte is never a sentence end and can be dropped
+    sentences = _counts_between(np.flatnonzero(sentence_end), text_starts)
+    # Text without end punctuation (an answer choice, a header) is still one sentence
+    sentences = np.maximum(sentences, words > 0)
+    return sentences, words, syllable_counts
+
+def estimate_lexiles(groups):
+    # Lexile estimate for each group of texts (e.g. one item's stem, choices and feedback), scored
+    # together in one batch; NaN for a group with no words
+    texts = [text for group in groups for text in group]
+    group_of_text = np.repeat(np.arange(len(groups)), [len(group) for group in groups])
+    sentences, words, syllables = text_statistics(texts)
+    group_sentences = np.bincount(group_of_text, weights=sentences, minlength=len(groups))
+    group_words = np.bincount(group_of_text, weights=words, minlength=len(groups))
+    group_syllables = np.bincount(group_of_text, weights=syllables, minlength=len(groups))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        grade = 0.39 * group_words / group_sentences + 11.8 * group_syllables / group_words - 15.59
+    return np.where(group_words > 0, LEXILE_PER_GRADE * grade + LEXILE_OFFSET, np.nan)
+
+def lesson_grade(*texts):
+    # First grade level mentioned ("Grade 8", "7th grade") in the given texts, else None
+    for text in texts:
+        match = GRADE_PATTERN.search(text or '')
+        if match:
+            return int(match.group(1) or match.group(2))
+    return None
+
+def lexile_band(grade):
+    # (low, high) band for the grade; grades between listed ones get the midpoint of their neighbours.
+    # None outside the listed grades.
+    if grade is None or grade in LEXILE_BANDS:
+        return LEXILE_BANDS.get(grade)
+    below = [listed for listed in LEXILE_BANDS if listed < grade]
+    above = [listed for listed in LEXILE_BANDS if listed > grade]
+    if not below or not above:
+        return None
+    low_band, high_band = LEXILE_BANDS[max(below)], LEXILE_BANDS[min(above)]
+    return (low_band[0] + high_band[0]) // 2, (low_band[1] + high_band[1]) // 2
+
+def band_problem(lexile, grade, band, tolerance=LEXILE_TOLERANCE):
+    # Message for an estimate outside the band (plus tolerance), else None
+    low, high = band
+    if lexile > high + tolerance:
+        return f"reads at about {lexile:.0f}L, above the {low}-{high}L band for grade {grade}; use shorter sentences and simpler words"
+    if lexile < low - tolerance:
+        return f"reads at about {lexile:.0f}L, below the {low}-{high}L band for grade {grade}; use fuller sentences and grade-level vocabulary"
+    return None
+
+def item_readability_problems(items, grade, tolerance=LEXILE_TOLERANCE):
+    # Item number -> [message] for the items (number -> AssessmentItem) whose student-facing text
+    # (stem, choices and feedback) reads outside the grade's band; all items are scored in one batch
+    band = lexile_band(grade)
+    if band is None or not items:
+        return {}
+    numbers = list(items)
+    lexiles = estimate_lexiles([[items[number].stem, *items[number].choices, items[number].feedback] for number in numbers])
+    problems = {}
+    for number, lexile in zip(numbers, lexiles):
+        problem = None if np.isnan(lexile) else band_problem(lexile, grade, band, tolerance)
+        if problem:
+            problems[number] = [f"readability: {problem}"]
+    return problems
+
+def student_friendly_objectives(blueprint):
+    return [objective.strip('*"') for objective in STUDENT_FRIENDLY_PATTERN.findall(blueprint)]
+
+def objective_readability_problems(blueprint, grade, tolerance=LEXILE_TOLERANCE):
+    # (objective, message) for each student-friendly objective in the blueprint outside the grade's band
+    band = lexile_band(grade)
+    objectives = student_friendly_objectives(blueprint)
+    if band is None or not objectives:
+        return []
+    problems = []
+    for objective, lexile in zip(objectives, estimate_lexiles([[objective] for objective in objectives])):
+        problem = None if np.isnan(lexile) else band_problem(lexile, grade, band, tolerance)
+        if problem:
+            problems.append((objective, problem))
+    return problems
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+
+# Directory for the on-disk layer of the reference text cache
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'reference_text')
+
+
+class ReferenceTextCache:
+    """Two-level cache (process memory + disk) for extracted reference text.
+
+    Entries are keyed by the file's absolute path, size and modification time,
+    so replacing or editing a reference file invalidates its entry automatically.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, file_path):
+        stat = os.stat(file_path)
+        identity = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as file:
+                return json.load(file)['text']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key, file_path, text):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._disk_path(key) + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'source': os.path.abspath(file_path), 'text': text}, file)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError:
+            # The disk layer is best effort; the in-process layer still works
+            pass
+
+    def get_text(self, file_path, extractor, stats=None):
+        # Return the cached text for file_path, calling extractor(file_path) on a miss.
+        # Exceptions raised by the extractor propagate and nothing is cached.
+        # stats, if given, receives 'cache': 'memory', 'disk' or 'miss'.
+        stats = stats if stats is not None else {}
+        key = self._key(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                stats['cache'] = 'memory'
+                return entry[1]
+
+        text = self._read_disk(key)
+        if text is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._entries[key] = (os.path.abspath(file_path), text)
+            stats['cache'] = 'disk'
+            return text
+
+        stats['cache'] = 'miss'
+        text = extractor(file_path)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (os.path.abspath(file_path), text)
+        self._write_disk(key, file_path, text)
+        return text
+
+    def invalidate(self, file_path=None):
+        # Drop the entries for one file (any version of it), or everything when no path is given
+        with self._lock:
+            if file_path is None:
+                keys = list(self._entries)
+            else:
+                source = os.path.abspath(file_path)
+                keys = [key for key, entry in self._entries.items() if entry[0] == source]
+            for key in keys:
+                del self._entries[key]
+
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-len('.json')]
+            if file_path is not None and key not in keys:
+                # Disk entries may outlive the process; match them by their recorded source
+                try:
+                    with open(self._disk_path(key), 'r', encoding='utf-8') as file:
+                        if json.load(file).get('source') != os.path.abspath(file_path):
+                            continue
+                except (OSError, ValueError):
+                    continue
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': sum(len(entry[1].encode('utf-8')) for entry in self._entries.values()),
+            }
+
+
+# Process-wide instance; module state survives Streamlit reruns and is shared by all sessions
+reference_cache = ReferenceTextCache()
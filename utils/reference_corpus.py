@@ -0,0 +1,124 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+
+from utils.pdf_extraction import read_pdf_text
+from utils.reference_cache import reference_cache
+from utils.reference_digest import DIGEST_EXTENSIONS, DIGEST_FOLDER, load_digest, read_manifest
+from utils.telemetry import telemetry
+
+# File name fragments that select each named view of the corpus
+BLUEPRINT_GUIDE_FILE = "CCAG-EdgeEX Lesson Blueprinting-270325-194434"
+DEI_FILES = ["Subject Specific Guidelines-Social Studies", "DEI Content Authoring Guidelines"]
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt', '.md')
+# Files loaded at once; large PDFs also split their pages across the extraction pool (utils/pdf_extraction.py)
+REFERENCE_LOAD_WORKERS = 4
+
+
+# python-docx is only imported when a file has to be extracted (most are served from their digest
+# or the reference cache); PDFs are read by utils/pdf_extraction.py
+def read_docx_text(docx_path):
+    from docx import Document
+
+    doc = Document(docx_path)
+    return "\n".join([para.text for para in doc.paragraphs])
+
+def read_plain_text(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+# Extraction goes through the shared reference cache so reruns don't re-parse the files
+def extract_text_from_pdf(pdf_path, stats=None):
+    try:
+        return reference_cache.get_text(pdf_path, read_pdf_text, stats)
+    except Exception as e:
+        return f"Error reading PDF ({pdf_path}): {str(e)}"
+
+def extract_text_from_docx(docx_path, stats=None):
+    try:
+        return reference_cache.get_text(docx_path, read_docx_text, stats)
+    except Exception as e:
+        return f"Error reading DOCX ({docx_path}): {str(e)}"
+
+def extract_text(file_path, stats=None):
+    lower_path = file_path.lower()
+    if lower_path.endswith('.pdf'):
+        return extract_text_from_pdf(file_path, stats)
+    if lower_path.endswith('.docx'):
+        return extract_text_from_docx(file_path, stats)
+    return reference_cache.get_text(file_path, read_plain_text, stats)
+
+
+class ReferenceCorpus:
+    """All reference documents in a folder, each extracted exactly once.
+
+    The folder is listed once; the named views below are assembled lazily from
+    that single extraction, so their cost does not depend on how many stages use them.
+    PDF/DOCX files with an up-to-date digest (build_digests.py) use the digest instead.
+    """
+
+    def __init__(self, folder_path, digest_folder=DIGEST_FOLDER):
+        self.folder_path = folder_path
+        self.digest_folder = digest_folder
+
+    @cached_property
+    def filenames(self):
+        return sorted(
+            filename for filename in os.listdir(self.folder_path)
+            if filename.lower().endswith(SUPPORTED_EXTENSIONS)
+        )
+
+    def _load(self, filename, manifest):
+        with telemetry.span('reference.extract', run_id='startup', file=filename) as span:
+            stats = {}
+            path = os.path.join(self.folder_path, filename)
+            text = None
+            if manifest is not None and filename.lower().endswith(DIGEST_EXTENSIONS):
+                text = load_digest(path, self.digest_folder, manifest)
+            if text is not None:
+                stats['source'] = 'digest'
+            else:
+                text = extract_text(path, stats)
+                stats['source'] = 'extracted'
+            span.set(chars=len(text), **stats)
+        return text
+
+    @cached_property
+    def documents(self):
+        # filename -> extracted text; the files are loaded concurrently
+        manifest = read_manifest(self.digest_folder) if self.digest_folder else None
+        with telemetry.span('reference.load', run_id='startup', files=len(self.filenames)) as load_span:
+            with ThreadPoolExecutor(max_workers=REFERENCE_LOAD_WORKERS) as executor:
+                texts = executor.map(lambda filename: self._load(filename, manifest), self.filenames)
+                documents = dict(zip(self.filenames, texts))
+            load_span.set(chars=sum(len(text) for text in documents.values()))
+        return documents
+
+    def _format(self, filenames):
+        return "\n".join(f"Document: {filename}\n{self.documents[filename]}\n\n" for filename in filenames)
+
+    @cached_property
+    def full_set(self):
+        return self._format(self.filenames)
+
+    @cached_property
+    def dei_documents(self):
+        # Only the PDF/DOCX guidelines belong to the DEI set
+        return {
+            filename: self.documents[filename] for filename in self.filenames
+            if any(target_file in filename for target_file in DEI_FILES)
+            and filename.lower().endswith(('.pdf', '.docx'))
+        }
+
+    @cached_property
+    def dei_set(self):
+        return self._format(self.dei_documents)
+
+    @cached_property
+    def blueprint_guide(self):
+        for filename in self.filenames:
+            if BLUEPRINT_GUIDE_FILE in filename and filename.lower().endswith(('.pdf', '.docx')):
+                return self.documents[filename]
+        # If file not found, return a message
+        return "Blueprint reference file not found."
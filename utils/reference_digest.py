@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Bump when the normalization changes; digests built by another version are ignored until rebuilt
+DIGEST_VERSION = 1
+DIGEST_FOLDER = 'reference_digests'
+MANIFEST_FILENAME = 'manifest.json'
+# Only the layout-heavy formats are digested; .txt and .md files are used as they are
+DIGEST_EXTENSIONS = ('.pdf', '.docx')
+
+# A PDF line in a font this much larger than the body text starts a section
+HEADING_SIZE_RATIO = 1.4
+# Paragraphs this close to the top or bottom of a page may be a running header or footer...
+EDGE_PARAGRAPHS = 3
+# ...and are one when they repeat there on at least this share of the pages (and at least 3 pages)
+REPEATED_EDGE_SHARE = 0.5
+PAGE_NUMBER_PATTERN = re.compile(r"^(?:page\s*)?\d+(?:\s*(?:of|/)\s*\d+)?$", re.I)
+# Bullet glyphs PDFs and Word lists use at the start of a line
+BULLET_PATTERN = re.compile(r"^[•▪◦●○■□➢✓o§-][ \t]+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Sections dropped from digests: they only repeat the other section titles
+CONTENTS_TITLES = frozenset(['contents', 'table of contents'])
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _clean(text):
+    text = WHITESPACE_PATTERN.sub(' ', text).strip()
+    bullet = BULLET_PATTERN.match(text)
+    return f"- {text[bullet.end():]}" if bullet else text
+
+def read_pdf_pages(pdf_path):
+    # Pages as lists of (paragraph, is_heading). PyMuPDF's text blocks are the paragraphs; their
+    # wrapped lines are joined, and lines in a heading-sized font are split off as headings.
+    # PyMuPDF and python-docx are only needed to build digests, not to load them.
+    import fitz as pymupdf
+
+    doc = pymupdf.open(pdf_path)
+    pages = [page.get_text('dict')['blocks'] for page in doc]
+    sizes = Counter()
+    for blocks in pages:
+        for block in blocks:
+            for line in block.get('lines', []):
+                for span in line['spans']:
+                    sizes[round(span['size'])] += len(span['text'].strip())
+    heading_size = (sizes.most_common(1)[0][0] if sizes else 0) * HEADING_SIZE_RATIO
+
+    paragraphs = []
+    for blocks in pages:
+        page = []
+        for block in blocks:
+            run = []
+            run_heading = False
+            for line in block.get('lines', []):
+                text = "".join(span['text'] for span in line['spans']).strip()
+                if not text:
+                    continue
+                heading = max(span['size'] for span in line['spans'] if span['text'].strip()) >= heading_size
+                if run and heading != run_heading:
+                    page.append((_join_lines(run), run_heading))
+                    run = []
+                run.append(text)
+                run_heading = heading
+            if run:
+                page.append((_join_lines(run), run_heading))
+        paragraphs.append(page)
+    return paragraphs
+
+def _join_lines(lines):
+    # Wrapped lines of one paragraph; a line broken after a hyphen ("customer-" / "facing") is rejoined
+    text = lines[0]
+    for line in lines[1:]:
+        text += line if text.endswith('-') and line[:1].islower() else f" {line}"
+    return _clean(text)
+
+def read_docx_pages(docx_path):
+    # The whole document as one page of (paragraph, is_heading); headings are the Title and Heading styles
+    from docx import Document
+
+    paragraphs = []
+    for para in Document(docx_path).paragraphs:
+        text = _clean(para.text)
+        if not text:
+            continue
+        style = para.style.name if para.style is not None else ''
+        if style.startswith('List') and not text.startswith('- '):
+            text = f"- {text}"
+        paragraphs.append((text, style == 'Title' or style.startswith('Heading')))
+    return [paragraphs]
+
+def repeated_edges(pages):
+    # Paragraphs repeated at the top or bottom of most pages: running headers and footers
+    counts = Counter()
+    for page in pages:
+        edges = page[:EDGE_PARAGRAPHS] + page[-EDGE_PARAGRAPHS:]
+        counts.update({text for text, _ in edges})
+    minimum = max(3, len(pages) * REPEATED_EDGE_SHARE)
+    return {text for text, count in counts.items() if count >= minimum}
+
+def normalize_pages(pages):
+    # (title, text) sections from (paragraph, is_heading) pages: running headers, footers and page
+    # numbers are dropped, and every heading starts a section. Paragraphs are one line each; one that
+    # continues mid-sentence (PDFs often give each wrapped line its own block) joins the one before.
+    repeated = repeated_edges(pages)
+    sections = [[None, []]]
+    for page in pages:
+        last = len(page) - 1
+        for index, (text, heading) in enumerate(page):
+            at_edge = index < EDGE_PARAGRAPHS or index > last - EDGE_PARAGRAPHS
+            if at_edge and (text in repeated or PAGE_NUMBER_PATTERN.match(text)):
+                continue
+            lines = sections[-1][1]
+            if heading:
+                sections.append([text, []])
+            elif lines and text[:1].islower() and not lines[-1].endswith(('.', '!', '?', ':')):
+                lines[-1] = lines[-1][:-1] + text if lines[-1].endswith('-') else f"{lines[-1]} {text}"
+            else:
+                lines.append(text)
+    return [
+        (title, "\n".join(lines)) for title, lines in sections
+        if (title or lines) and (title or '').lower() not in CONTENTS_TITLES
+    ]
+
+def build_digest(file_path):
+    # Digest record for one reference file
+    if file_path.lower().endswith('.pdf'):
+        pages = read_pdf_pages(file_path)
+    else:
+        pages = read_docx_pages(file_path)
+    sections = normalize_pages(pages)
+    return {
+        'version': DIGEST_VERSION,
+        'source': os.path.basename(file_path),
+        'source_sha256': file_sha256(file_path),
+        'sections': [{'title': title, 'text': text} for title, text in sections],
+    }
+
+def digest_text(digest):
+    # The text a digest stands in for: its sections as markdown, one line per paragraph
+    return "\n\n".join(
+        f"## {section['title']}\n{section['text']}".rstrip() if section['title'] else section['text']
+        for section in digest['sections']
+    )
+
+def digest_filename(source_filename):
+    return f"{os.path.splitext(source_filename)[0]}.json"
+
+def build_digests(source_folder, digest_folder=DIGEST_FOLDER):
+    # Write a digest for every PDF/DOCX file in source_folder, and the manifest tying each digest to
+    # the hash of its source. Returns the manifest.
+    os.makedirs(digest_folder, exist_ok=True)
+    documents = {}
+    for filename in sorted(os.listdir(source_folder)):
+        if not filename.lower().endswith(DIGEST_EXTENSIONS):
+            continue
+        digest = build_digest(os.path.join(source_folder, filename))
+        payload = json.dumps(digest, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        with open(os.path.join(digest_folder, digest_filename(filename)), 'wb') as file:
+            file.write(payload)
+        documents[filename] = {
+            'digest': digest_filename(filename),
+            'source_sha256': digest['source_sha256'],
+            'digest_sha256': hashlib.sha256(payload).hexdigest(),
+            'sections': len(digest['sections']),
+            'chars': len(digest_text(digest)),
+        }
+    manifest = {'version': DIGEST_VERSION, 'documents': documents}
+    with open(os.path.join(digest_folder, MANIFEST_FILENAME), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+        file.write("\n")
+    return manifest
+
+def read_manifest(digest_folder=DIGEST_FOLDER):
+    try:
+        with open(os.path.join(digest_folder, MANIFEST_FILENAME), 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and manifest.get('version') == DIGEST_VERSION else None
+
+def stale_digests(source_folder, digest_folder=DIGEST_FOLDER):
+    # PDF/DOCX files in source_folder whose digest is missing, from another version or of other content
+    manifest = read_manifest(digest_folder) or {'documents': {}}
+    stale = []
+    for filename in sorted(os.listdir(source_folder)):
+        if not filename.lower().endswith(DIGEST_EXTENSIONS):
+            continue
+        entry = manifest['documents'].get(filename)
+        if entry is None or entry.get('source_sha256') != file_sha256(os.path.join(source_folder, filename)):
+            stale.append(filename)
+    return stale
+
+def load_digest(source_path, digest_folder=DIGEST_FOLDER, manifest=None):
+    # Digest text for a reference file, or None when there is no digest for this version of the file
+    manifest = manifest if manifest is not None else read_manifest(digest_folder)
+    entry = (manifest or {}).get('documents', {}).get(os.path.basename(source_path))
+    if entry is None:
+        return None
+    if entry.get('source_sha256') != file_sha256(source_path):
+        logger.warning("Digest of %s is out of date; run build_digests.py", os.path.basename(source_path))
+        return None
+    try:
+        with open(os.path.join(digest_folder, entry['digest']), 'rb') as file:
+            payload = file.read()
+    except OSError:
+        return None
+    if hashlib.sha256(payload).hexdigest() != entry.get('digest_sha256'):
+        logger.warning("Digest of %s doesn't match its manifest; run build_digests.py", os.path.basename(source_path))
+        return None
+    return digest_text(json.loads(payload))
@@ -0,0 +1,120 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+
+# Chunking parameters, in words
+CHUNK_WORDS = 180
+CHUNK_OVERLAP = 40
+
+# Default number of passages injected into a prompt
+DEFAULT_TOP_K = 8
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could do does for from had has have how i if in into is it its
+may more most must no not of on or our should so such than that the their them then there these they
+this those to was we were what when where which who why will with would you your
+""".split())
+
+# Extra query terms describing what each pipeline stage needs from the guidelines
+STAGE_QUERIES = {
+    'blueprint': "lesson framing perspectives voices historical context language representation",
+    'assessment': "assessment questions answer choices language stereotypes bias examples non-examples",
+    'media': "images visuals photographs depiction representation diverse people portrayal",
+    'fact_check': "historical accuracy context sources interpretation fact myth",
+    'dei_check': "overview examples non-examples topic guidance language perspectives marginalized",
+}
+
+
+def tokenize(text):
+    return [word for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+def estimate_tokens(text):
+    # Rough offline estimate (~4 characters per token for English prose)
+    return (len(text) + 3) // 4
+
+def chunk_text(text, chunk_words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    words = text.split()
+    if not words:
+        return []
+    step = max(chunk_words - overlap, 1)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+class ReferenceIndex:
+    """BM25 index over fixed-size passages of the reference documents (fully local)."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        # documents: filename -> text
+        self.k1 = k1
+        self.b = b
+        self.passages = []
+        self._term_counts = []
+        for filename, text in documents.items():
+            for chunk in chunk_text(text):
+                self.passages.append((filename, chunk))
+                self._term_counts.append(Counter(tokenize(chunk)))
+
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        document_frequency = Counter()
+        for counts in self._term_counts:
+            document_frequency.update(counts.keys())
+        total = len(self._term_counts)
+        self._idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+    def search(self, query, top_k=DEFAULT_TOP_K):
+        # Return the indexes of the top_k passages by BM25 score, best first
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        scores = []
+        for index, counts in enumerate(self._term_counts):
+            length_norm = self.k1 * (1 - self.b + self.b * self._lengths[index] / (self._avg_length or 1))
+            score = 0.0
+            for term in terms:
+                freq = counts.get(term)
+                if freq:
+                    score += self._idf[term] * freq * (self.k1 + 1) / (freq + length_norm)
+            if score > 0:
+                scores.append((score, index))
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return [index for _, index in scores[:top_k]]
+
+    def search_text(self, query, top_k=DEFAULT_TOP_K):
+        # Format the best passages in document order so excerpts from one file stay together
+        selected = sorted(self.search(query, top_k))
+        return "\n\n".join(
+            f"Document: {self.passages[index][0]} (excerpt)\n{self.passages[index][1]}"
+            for index in selected
+        )
+
+
+def build_query(stage, lesson_context):
+    return f"{lesson_context}\n{STAGE_QUERIES.get(stage, '')}"
+
+
+# Indexes are built once per distinct document set and shared across reruns and sessions
+_index_cache = {}
+_index_lock = threading.Lock()
+
+def get_reference_index(documents):
+    digest = hashlib.sha256()
+    for filename in sorted(documents):
+        digest.update(filename.encode('utf-8'))
+        digest.update(documents[filename].encode('utf-8'))
+    key = digest.hexdigest()
+    with _index_lock:
+        index = _index_cache.get(key)
+        if index is None:
+            index = _index_cache[key] = ReferenceIndex(documents)
+        return index
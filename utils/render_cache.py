@@ -0,0 +1,64 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Upper bound on memory held by rendered documents (least recently used are evicted first)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class RenderCache:
+    """In-memory LRU cache of rendered artifacts (DOCX and ZIP bytes) keyed by content hash.
+
+    Identical content renders once per process, however many reruns or sessions ask for it.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts):
+        # Hash of the parts (str or bytes-like), length-prefixed so part boundaries can't collide
+        digest = hashlib.sha256()
+        for part in parts:
+            data = part.encode('utf-8') if isinstance(part, str) else part
+            digest.update(len(data).to_bytes(8, 'big'))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self._bytes}
+
+
+# Process-wide instance; module state survives Streamlit reruns and is shared by all sessions
+render_cache = RenderCache()
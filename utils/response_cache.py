@@ -0,0 +1,204 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.path.join('.cache', 'responses.sqlite3')
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+class CachedResponse:
+    # Mimics the part of a Gemini response the app uses
+    def __init__(self, text):
+        self.text = text
+
+
+class ResponseCache:
+    """SQLite-backed cache of LLM responses keyed by model name + prompt hash.
+
+    Entries expire after ttl_seconds; when the cache grows past max_entries or
+    max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS, clock=time.time):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._connection = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._connection.commit()
+        return self._connection
+
+    @staticmethod
+    def make_key(model_name, prompt):
+        return hashlib.sha256(f"{model_name}\n{prompt}".encode('utf-8')).hexdigest()
+
+    def get(self, model_name, prompt):
+        key = self.make_key(model_name, prompt)
+        now = self.clock()
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] + self.ttl_seconds <= now:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                connection.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            connection.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, model_name, prompt, response):
+        key = self.make_key(model_name, prompt)
+        now = self.clock()
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, response, len(response.encode('utf-8')), now, now),
+            )
+            self._evict(connection, now)
+            connection.commit()
+
+    def _evict(self, connection, now):
+        connection.execute("DELETE FROM responses WHERE created_at + ? <= ?", (self.ttl_seconds, now))
+        count, total = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk entries from least recently used, dropping until both limits hold
+        drop = []
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            drop.append((key,))
+            count -= 1
+            total -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", drop)
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+
+    def stats(self):
+        with self._lock:
+            count, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {'hits': self.hits, 'misses': self.misses, 'entries': count, 'bytes': total}
+
+
+class CachedModel:
+    """Wraps a GenerativeModel so identical prompts are answered from the response cache.
+
+    Set bypass_cache to skip lookups ("force regenerate"); fresh responses are still stored.
+    """
+
+    def __init__(self, model, cache, model_name=None, bypass_cache=False):
+        self.model = model
+        self.cache = cache
+        self.model_name = model_name or getattr(model, 'model_name', 'model')
+        self.bypass_cache = bypass_cache
+
+    def _cache_prompt(self, contents, key_context, kwargs):
+        cache_prompt = f"{key_context}{contents}"
+        if kwargs:
+            cache_prompt = f"{sorted(kwargs.items())!r}\n{cache_prompt}"
+        return cache_prompt
+
+    def _lookup(self, cache_prompt, bypass_cache, stats):
+        # Cached text for the prompt, or None; stats (if given) records 'hit', 'miss' or 'bypass'
+        if self.bypass_cache if bypass_cache is None else bypass_cache:
+            status, text = 'bypass', None
+        else:
+            text = self.cache.get(self.model_name, cache_prompt)
+            status = 'miss' if text is None else 'hit'
+        if stats is not None:
+            stats['cache'] = status
+        return text
+
+    def generate_content(self, contents, backend_model=None, key_context='', bypass_cache=None, deadline=None,
+                         stats=None, **kwargs):
+        # backend_model answers misses instead of the wrapped model (e.g. one bound to a context cache);
+        # key_context is text it already holds that must still be part of the cache key.
+        # bypass_cache overrides the instance setting for this call; deadline and stats are passed through
+        # on a miss.
+        cache_prompt = self._cache_prompt(contents, key_context, kwargs)
+        text = self._lookup(cache_prompt, bypass_cache, stats)
+        if text is not None:
+            return CachedResponse(text)
+
+        if deadline is not None:
+            kwargs['deadline'] = deadline
+        if stats is not None:
+            kwargs['stats'] = stats
+        response = (backend_model or self.model).generate_content(contents, **kwargs)
+        self.cache.put(self.model_name, cache_prompt, response.text)
+        return response
+
+    def stream_content(self, contents, on_chunk, backend_model=None, key_context='', bypass_cache=None,
+                       deadline=None, stats=None, **kwargs):
+        # Streamed variant of generate_content: on_chunk(text) gets each partial chunk as it arrives.
+        # A cache hit is delivered as a single chunk. Returns a response holding the full text.
+        cache_prompt = self._cache_prompt(contents, key_context, kwargs)
+        text = self._lookup(cache_prompt, bypass_cache, stats)
+        if text is not None:
+            on_chunk(text)
+            return CachedResponse(text)
+
+        if deadline is not None:
+            kwargs['deadline'] = deadline
+        if stats is not None:
+            kwargs['stats'] = stats
+        parts = []
+        for chunk in (backend_model or self.model).generate_content(contents, stream=True, **kwargs):
+            try:
+                piece = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. the final finish-reason chunk)
+                continue
+            if piece:
+                parts.append(piece)
+                on_chunk(piece)
+
+        text = "".join(parts)
+        if text:
+            self.cache.put(self.model_name, cache_prompt, text)
+        return CachedResponse(text)
+
+
+# Process-wide instance shared by all sessions
+response_cache = ResponseCache()
@@ -0,0 +1,210 @@
+import json
+import re
+
+from prompts.dei_check_prompt import ALIGNMENT_RATINGS
+from prompts.fact_check_prompt import ACCURACY_RATINGS, IMPORTANCE_LEVELS
+from utils.assessment_items import CODE_FENCE_PATTERN
+from utils.assessment_merge import split_items
+
+# Start of a section of the blueprint or of a media entry: a markdown heading or a line that is
+# only bold text ("**Warm-Up**", "**Section 1: Identifying Alabama's Physical Regions**")
+SECTION_START_PATTERN = re.compile(r"^[ \t]*(?:#{1,6}[ \t]+(.+?)|\*\*([^*\n]+?)\*\*:?)[ \t]*$", re.M)
+# Upper bound on the characters of content in one review request (about 3,000 tokens, so the shared
+# reference prefix doesn't dwarf it); a larger section is split between paragraphs
+REVIEW_PART_CHARS = 12000
+
+ALIGNMENT_MARKS = {"Strong": "✅", "Moderate": "⚠️", "Needs Improvement": "🛑"}
+
+
+class ReviewMergeError(ValueError):
+    pass
+
+
+def _split_long(title, text, max_chars):
+    # A section longer than max_chars as consecutive pieces of whole paragraphs
+    pieces = []
+    current = ""
+    for paragraph in text.split("\n\n"):
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            pieces.append((title, current))
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current.strip():
+        pieces.append((title, current))
+    return pieces
+
+def split_sections(text, max_chars=REVIEW_PART_CHARS):
+    # (title, text) for each section of markdown, in order; text before the first section has no title
+    matches = list(SECTION_START_PATTERN.finditer(text))
+    bounds = [(None, 0)] + [(match.group(1) or match.group(2), match.start()) for match in matches]
+    sections = []
+    for index, (title, start) in enumerate(bounds):
+        end = bounds[index + 1][1] if index + 1 < len(bounds) else len(text)
+        section = text[start:end].strip()
+        if not section:
+            continue
+        title = title.strip(' *#:') if title else None
+        if len(section) > max_chars:
+            sections.extend(_split_long(title, section, max_chars))
+        else:
+            sections.append((title, section))
+    return sections
+
+def pack_sections(sections, max_chars=REVIEW_PART_CHARS):
+    # Consecutive sections grouped into lists of at most max_chars characters (a longer section is alone)
+    groups = []
+    size = 0
+    for section in sections:
+        if groups and size + len(section[1]) <= max_chars:
+            groups[-1].append(section)
+            size += len(section[1]) + 2
+        else:
+            groups.append([section])
+            size = len(section[1])
+    return groups
+
+def _part_label(document, titles):
+    # A blueprint titled "Lesson Blueprint: ..." doesn't repeat the document name
+    titles = [str(title).removeprefix(f"{document}:").strip() for title in titles if title is not None] or ["opening"]
+    if document == "Assessment Items":
+        return f"Assessment Items {titles[0]}" + (f"-{titles[-1]}" if len(titles) > 1 else "")
+    return f"{document}: {titles[0]}" + (f" to {titles[-1]}" if len(titles) > 1 else "")
+
+def review_parts(blueprint, assessment, media_suggestions, max_chars=REVIEW_PART_CHARS):
+    # (part label, content) for each part of the lesson reviewed on its own: groups of blueprint
+    # sections, groups of assessment items and groups of media entries, in document order
+    items, _ = split_items(assessment or "")
+    if items:
+        assessment_sections = [(number, items[number]) for number in sorted(items)]
+    else:
+        assessment_sections = split_sections(assessment or "", max_chars)
+    parts = []
+    for document, sections in (
+        ("Lesson Blueprint", split_sections(blueprint or "", max_chars)),
+        ("Assessment Items", assessment_sections),
+        ("Media Suggestions", split_sections(media_suggestions or "", max_chars)),
+    ):
+        for group in pack_sections(sections, max_chars):
+            parts.append((
+                _part_label(document, [title for title, _ in group]),
+                "\n\n".join(text for _, text in group),
+            ))
+    return parts
+
+def parse_review(text):
+    # The review object in a part's JSON response, or None if there isn't one
+    fenced = CODE_FENCE_PATTERN.match(text)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        review = json.loads(text)
+    except ValueError:
+        return None
+    return review if isinstance(review, dict) else None
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else ""
+
+def _strings(values):
+    return [_text(value) for value in values if _text(value)] if isinstance(values, list) else []
+
+def _objects(values):
+    return [value for value in values if isinstance(value, dict)] if isinstance(values, list) else []
+
+def _choice(value, choices):
+    # The choice value names (ignoring case and trailing marks), or None
+    value = _text(value).rstrip(" .✅⚠️🛑").lower()
+    return next((choice for choice in choices if choice.lower() == value), None)
+
+def _unique(entries, key=str.lower):
+    # Entries without repeats (by key), in order of first appearance
+    seen = set()
+    unique = []
+    for entry in entries:
+        if key(entry) not in seen:
+            seen.add(key(entry))
+            unique.append(entry)
+    return unique
+
+def _bullets(lines, empty):
+    return "\n".join(f"- {line}" for line in lines) if lines else empty
+
+def _reviewed(reviews):
+    reviewed = [(part, review) for part, review in reviews if review is not None]
+    if not reviewed:
+        raise ReviewMergeError("No part of the lesson could be reviewed")
+    return reviewed, [part for part, review in reviews if review is None]
+
+def merge_fact_checks(reviews):
+    # One fact-check report from the (part label, review or None) of every part, in document order.
+    # The overall rating is the worst part's, and issues are listed by importance.
+    reviewed, unreviewed = _reviewed(reviews)
+    ratings = [_choice(review.get('accuracy_rating'), ACCURACY_RATINGS) for _, review in reviewed]
+    rated = [rating for rating in ratings if rating]
+    overall = max(rated, key=ACCURACY_RATINGS.index) if rated else "Not rated"
+    summaries = [
+        f"**{part}** ({rating or 'not rated'}): {_text(review.get('summary')) or 'No summary.'}"
+        for (part, review), rating in zip(reviewed, ratings)
+    ]
+
+    issues = []
+    for part, review in reviewed:
+        for issue in _objects(review.get('issues')):
+            importance = _choice(issue.get('importance'), IMPORTANCE_LEVELS) or "Medium"
+            entry = (part, _text(issue.get('original_text')), _text(issue.get('report')), _text(issue.get('corrected_text')), importance)
+            if entry[1] or entry[2]:
+                issues.append(entry)
+    issues = _unique(issues, key=lambda entry: (entry[1].lower(), entry[3].lower()))
+    # Stable, so issues of equal importance stay in document order
+    issues.sort(key=lambda entry: -IMPORTANCE_LEVELS.index(entry[4]))
+    issue_text = "\n\n".join(
+        f"**{number}. {part}**\n\n\"{original}\"\n\nFact-checking Report: {report}\n\n\"{corrected}\"\n\nImportance level: {importance}"
+        for number, (part, original, report, corrected, importance) in enumerate(issues, 1)
+    )
+
+    verification = _unique([need for _, review in reviewed for need in _strings(review.get('verification_needs'))])
+    verification += [f"{part} could not be reviewed automatically; check it by hand." for part in unreviewed]
+    recommendations = _unique([entry for _, review in reviewed for entry in _strings(review.get('recommendations'))])
+    return "\n\n".join([
+        "### Overall Accuracy Assessment",
+        f"**Overall accuracy rating**: {overall}",
+        _bullets(summaries, ""),
+        "### Specific Factual Issues",
+        issue_text or "No factual issues were found.",
+        "### Verification Needs",
+        _bullets(verification, "None."),
+        "### Additional Recommendations",
+        _bullets(recommendations, "None."),
+    ])
+
+def merge_dei_checks(reviews):
+    # One DEI review from the (part label, review or None) of every part, in document order.
+    # The overall rating is the weakest part's; topics are combined and findings are attributed to parts.
+    reviewed, unreviewed = _reviewed(reviews)
+    ratings = [_choice(review.get('alignment_rating'), ALIGNMENT_RATINGS) for _, review in reviewed]
+    rated = [rating for rating in ratings if rating]
+    overall = max(rated, key=ALIGNMENT_RATINGS.index) if rated else None
+    topics = _unique([topic for _, review in reviewed for topic in _strings(review.get('topics'))])
+    findings = [f"*{part}*: {finding}" for part, review in reviewed for finding in _strings(review.get('findings'))]
+    recommendations = []
+    for part, review in reviewed:
+        for entry in _objects(review.get('recommendations')):
+            recommendation, rationale = _text(entry.get('recommendation')), _text(entry.get('rationale'))
+            if recommendation:
+                recommendations.append(f"*{part}*: {recommendation}" + (f" Rationale: {rationale}" if rationale else ""))
+    positives = [f"*{part}*: {example}" for part, review in reviewed for example in _strings(review.get('positive_examples'))]
+    by_part = [f"{part}: {rating} {ALIGNMENT_MARKS[rating]}" for (part, _), rating in zip(reviewed, ratings) if rating]
+
+    sections = [
+        "### DEI Review Summary",
+        f"**Overall Alignment Rating**: {f'{overall} {ALIGNMENT_MARKS[overall]}' if overall else 'Not rated'}",
+        "**Alignment by Part**:\n" + _bullets(by_part, "- Not rated"),
+        f"**Relevant DEI-Topics**: {', '.join(topics) if topics else 'None identified'}",
+        "**Findings**:\n" + _bullets(findings, "- None"),
+        "**Recommendations**:\n" + _bullets(recommendations, "- None"),
+        "**Positive Examples**:\n" + _bullets(positives, "- None"),
+    ]
+    if unreviewed:
+        sections.append("**Not Reviewed** (check these by hand):\n" + _bullets(unreviewed, ""))
+    return "\n\n".join(sections)
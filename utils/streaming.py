@@ -0,0 +1,41 @@
+import threading
+import time
+
+
+class StreamBuffer:
+    """Collects the streamed text of one stage and when its first token arrived.
+
+    Can be filled from a worker thread while the script thread renders it.
+    """
+
+    def __init__(self, on_update=None):
+        self.on_update = on_update
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.done = False
+        self._parts = []
+        self._lock = threading.Lock()
+
+    def __call__(self, piece):
+        with self._lock:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self._parts.append(piece)
+        if self.on_update is not None:
+            self.on_update(self.text)
+
+    @property
+    def text(self):
+        with self._lock:
+            return "".join(self._parts)
+
+    @property
+    def time_to_first_token(self):
+        # Seconds from creating the buffer to the first visible text, or None if nothing arrived
+        return self.time_since(self.started_at)
+
+    def time_since(self, started_at):
+        # Seconds from a perf_counter() timestamp (e.g. when the stage started) to the first visible text
+        if self.first_token_at is None or started_at is None:
+            return None
+        return self.first_token_at - started_at
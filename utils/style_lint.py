@@ -0,0 +1,169 @@
+import re
+from bisect import bisect_right
+
+from utils.assessment_items import CHOICE_LABELS, ITEM_TYPE_RULES
+
+# Mechanical rules from the assessment prompt's Item Format and Style Guidelines, checked locally.
+# All of an item's text is scanned in one pass of a combined pattern; the named group that matched
+# is the rule, and a match only counts in the fields its rule applies to.
+ITEM_PATTERN = re.compile(
+    r"(?P<negative_stem>\b(?:NOT|EXCEPT)\b|\b(?i:except|false)\b)"
+    r"|(?P<which_of_the_following>\b(?i:which of the following)\b)"
+    r"|(?P<all_none_of_the_above>\b(?i:(?:all|none) of the above)\b)"
+    r"|(?P<us_abbreviation>\bU\.S\.(?:A\.)?)"
+)
+# Substrings of the lowercased text, one of which is in every ITEM_PATTERN match except "NOT"; most
+# items have none, so the pattern only runs on the few that might break a rule
+ITEM_PATTERN_HINTS = ('except', 'false', 'which of the following', 'of the above', 'u.s.')
+# Rule -> field kinds it applies to (every field when absent)
+RULE_FIELDS = {
+    'negative_stem': ('stem',),
+    'which_of_the_following': ('stem',),
+    'all_none_of_the_above': ('choice',),
+}
+# What follows the comma in "A, B and C": a short list item and a final and/or with no comma before it.
+# Matched at each ", " rather than searched for, which is much faster on comma-light text.
+LIST_TAIL_PATTERN = re.compile(r"(?P<item>(?:[\w'-]+ ){0,2}[\w'-]+) (?:and|or) [\w'-]")
+# Words that make the text after a comma a clause or an aside rather than a list item
+# ("The river, which flows south and east, ...", "Many people, including farmers and traders, ...")
+CLAUSE_WORDS = frozenset("""
+    also although are as because but especially even for has have if including is like not since so such
+    than that then though unless until was were when where whereas which while who whom whose yet
+""".split())
+# Ends the final item of a list; a comma here means the "list" was an aside closed by that comma
+# ("John Ross, the Cherokee chief and a lawyer, fought removal.")
+LIST_END_PATTERN = re.compile(r"[,.;:?!\n]")
+# Sentence openers that end in a comma without starting a list ("In 1830, Congress and ...")
+INTRODUCTORY_WORDS = frozenset("""
+    after although as at because before by during finally first for however if in instead later
+    meanwhile next on since then therefore though today unlike when while yet
+""".split())
+# Words ending in -ing that aren't gerunds; the rest are caught by needing a vowel before the -ing
+# ("Thing", "Bring")
+NON_GERUNDS = frozenset("""
+    anything ceiling during evening everything morning nothing pudding something wedding
+""".split())
+# Fields are joined with newlines, so a newline also ends a sentence
+SENTENCE_END_PATTERN = re.compile(r"[.?!:;]\s|\n")
+
+RULE_MESSAGES = {
+    'choice_count': "{detail}",
+    'negative_stem': "negative question ({match!r}); ask it positively",
+    'which_of_the_following': "uses {match!r}; ask \"which statement\" directly",
+    'all_none_of_the_above': "answer choice uses {match!r}",
+    'us_abbreviation': "uses {match!r}; write US",
+    'oxford_comma': "missing Oxford comma in {match!r}",
+    'gerund_header': "{match!r} doesn't begin with a gerund",
+}
+
+
+class Violation:
+    """One style rule broken by one field of an assessment item."""
+
+    __slots__ = ('rule', 'field', 'match', 'detail')
+
+    def __init__(self, rule, field, match='', detail=''):
+        self.rule = rule
+        self.field = field
+        self.match = match
+        self.detail = detail
+
+    def __str__(self):
+        return f"{self.field}: " + RULE_MESSAGES[self.rule].format(match=self.match, detail=self.detail)
+
+    def as_dict(self):
+        return {'rule': self.rule, 'field': self.field, 'match': self.match, 'message': str(self)}
+
+
+def _is_introductory(text, comma):
+    # True for a comma that only closes an introductory phrase at the start of its sentence
+    sentence_starts = [end.end() for end in SENTENCE_END_PATTERN.finditer(text, 0, comma)]
+    sentence = text[sentence_starts[-1] if sentence_starts else 0:comma + 1]
+    words = sentence.split(None, 1)
+    return sentence.count(',') == 1 and bool(words) and words[0].strip('"\'(,').lower() in INTRODUCTORY_WORDS
+
+def _is_list_item(words):
+    return not any(word.lower() in CLAUSE_WORDS for word in words.split())
+
+def _is_aside(text, tail_end):
+    # True when the final and/or item is closed by a comma: "X, A and B, ..." is an appositive or
+    # participial aside ("The Act, passed in 1830 and signed by Jackson, forced ..."), not a list
+    end = LIST_END_PATTERN.search(text, tail_end)
+    return end is not None and end.group(0) == ','
+
+def _is_gerund(word):
+    word = word.lower()
+    return word.endswith('ing') and len(word) > 4 and word not in NON_GERUNDS and any(
+        vowel in word[:-3] for vowel in 'aeiouy'
+    )
+
+def _missing_oxford_commas(text):
+    # (start, matched text) of each "A, B and C" list in text: two comma-separated items before the
+    # final and/or, where the one after the comma reads as a list item rather than a clause or an aside
+    comma = text.find(', ')
+    while comma != -1:
+        tail = LIST_TAIL_PATTERN.match(text, comma + 2)
+        if (tail and _is_list_item(tail.group('item')) and comma > 0
+                and (text[comma - 1].isalnum() or text[comma - 1] in "'-") and not _is_aside(text, tail.end())):
+            start = comma
+            while start > 0 and (text[start - 1].isalnum() or text[start - 1] in "'-_"):
+                start -= 1
+            if not _is_introductory(text, comma):
+                yield start, text[start:tail.end() - 2]
+        comma = text.find(', ', comma + 2)
+
+def lint_item(item):
+    # Violations of the mechanical style rules by one AssessmentItem, in field order
+    violations = []
+    words = item.header.lstrip('"\'*_ ').split(None, 1)
+    first_word = words[0].strip('"\'*_,:') if words else ''
+    if not _is_gerund(first_word):
+        violations.append(Violation('gerund_header', 'header', item.header))
+    rules = ITEM_TYPE_RULES.get(item.item_type)
+    if rules is not None and len(item.choices) != rules[0]:
+        detail = f"{item.item_type} has {len(item.choices)} answer choices, expected {rules[0]}"
+        violations.append(Violation('choice_count', 'choices', detail=detail))
+
+    # (field name, field kind) for each newline-joined piece of text, with its start offset
+    fields = [('header', 'header'), ('stem', 'stem')]
+    fields += [
+        (f"choice {CHOICE_LABELS[index] if index < len(CHOICE_LABELS) else index + 1}", 'choice')
+        for index in range(len(item.choices))
+    ]
+    fields.append(('feedback', 'feedback'))
+    texts = [item.header, item.stem, *item.choices, item.feedback]
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + 1
+    text = "\n".join(text.replace('\n', ' ') for text in texts)
+
+    found = []
+    seen = set()
+    lowered = text.lower()
+    if 'NOT' in text or any(hint in lowered for hint in ITEM_PATTERN_HINTS):
+        for match in ITEM_PATTERN.finditer(text):
+            rule = match.lastgroup
+            field, kind = fields[bisect_right(starts, match.start()) - 1]
+            if kind in RULE_FIELDS.get(rule, (kind,)) and (rule, field) not in seen:
+                seen.add((rule, field))
+                found.append((match.start(), Violation(rule, field, match.group(0))))
+    if ' and ' in text or ' or ' in text:
+        for start, listed in _missing_oxford_commas(text):
+            field = fields[bisect_right(starts, start) - 1][0]
+            if ('oxford_comma', field) not in seen:
+                seen.add(('oxford_comma', field))
+                found.append((start, Violation('oxford_comma', field, listed)))
+    found.sort(key=lambda entry: entry[0])
+    violations.extend(violation for _, violation in found)
+    return violations
+
+def lint_items(items):
+    # Item number -> violations, for the items (number -> AssessmentItem) that break any rule
+    report = {}
+    for number, item in items.items():
+        violations = lint_item(item)
+        if violations:
+            report[number] = violations
+    return report
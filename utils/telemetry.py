@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Where spans (JSONL) and metrics (Prometheus text format) are written; empty disables file export
+TELEMETRY_DIR = os.getenv("TELEMETRY_DIR", ".telemetry")
+SPANS_FILENAME = "spans.jsonl"
+METRICS_FILENAME = "metrics.prom"
+# Size at which spans.jsonl is rotated to spans.jsonl.1 (replacing the previous one) and started afresh
+SPANS_MAX_BYTES = int(os.getenv("TELEMETRY_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# Span attributes summed into Prometheus counters, labelled by span name
+COUNTER_ATTRIBUTES = {
+    'retries': 'lesson_llm_retries_total',
+    'rate_limit_wait': 'lesson_rate_limit_wait_seconds_total',
+    'input_tokens': 'lesson_llm_input_tokens_total',
+    'output_tokens': 'lesson_llm_output_tokens_total',
+}
+
+
+class Span:
+    __slots__ = ('name', 'run_id', 'started_at', 'duration', 'status', 'attributes', '_start')
+
+    def __init__(self, name, run_id, attributes, started_at=None, duration=None, status='ok'):
+        self.name = name
+        self.run_id = run_id
+        self.started_at = time.time() if started_at is None else started_at
+        self.duration = duration
+        self.status = status
+        self.attributes = attributes
+        self._start = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'run_id': self.run_id,
+            'started_at': self.started_at,
+            'duration': self.duration,
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+class Telemetry:
+    """Process-wide span recorder with JSONL and Prometheus-text export.
+
+    Spans are grouped by run_id (one generation run, or "startup" for reference loading);
+    the most recent spans are kept in memory for the app's Performance panel.
+    """
+
+    def __init__(self, directory=TELEMETRY_DIR, max_spans=5000, max_file_bytes=SPANS_MAX_BYTES):
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        # Size of spans.jsonl, read from disk on the first write
+        self._file_bytes = None
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._durations = defaultdict(lambda: [0, 0.0])
+        self._counters = defaultdict(float)
+
+    @contextmanager
+    def span(self, name, run_id=None, **attributes):
+        span = Span(name, run_id, attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.attributes.setdefault('error', str(e))
+            raise
+        finally:
+            span.duration = time.perf_counter() - span._start
+            self.record(span)
+
+    def record_interval(self, name, run_id, start, end, status='ok', **attributes):
+        # Record something already timed with time.perf_counter() (e.g. a pipeline stage)
+        started_at = time.time() - (time.perf_counter() - start)
+        self.record(Span(name, run_id, attributes, started_at=started_at, duration=end - start, status=status))
+
+    def count(self, metric, span_name, extra_labels='', value=1):
+        # Add to a Prometheus counter without recording a span (e.g. a render served from the cache)
+        with self._lock:
+            self._counters[(metric, span_name, extra_labels)] += value
+
+    def _write_line(self, line):
+        # Append one span to spans.jsonl, rotating it first if it would grow past max_file_bytes
+        # (call with the lock held)
+        data = (line + "\n").encode('utf-8')
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, SPANS_FILENAME)
+            if self._file_bytes is None:
+                self._file_bytes = os.path.getsize(path) if os.path.exists(path) else 0
+            if self._file_bytes and self._file_bytes + len(data) > self.max_file_bytes:
+                os.replace(path, path + '.1')
+                self._file_bytes = 0
+            with open(path, 'ab') as file:
+                file.write(data)
+            self._file_bytes += len(data)
+        except OSError:
+            pass
+
+    def record(self, span):
+        line = json.dumps(span.as_dict(), default=str)
+        with self._lock:
+            self._spans.append(span)
+            totals = self._durations[span.name]
+            totals[0] += 1
+            totals[1] += span.duration or 0.0
+            cache_status = span.attributes.get('cache')
+            if cache_status is not None:
+                self._counters[('lesson_cache_requests_total', span.name, f'status="{cache_status}"')] += 1
+            if span.status == 'error':
+                self._counters[('lesson_span_errors_total', span.name, '')] += 1
+            for attribute, metric in COUNTER_ATTRIBUTES.items():
+                value = span.attributes.get(attribute)
+                if value:
+                    self._counters[(metric, span.name, '')] += value
+            if self.directory:
+                self._write_line(line)
+
+    def spans_for(self, run_id):
+        with self._lock:
+            return [span for span in self._spans if span.run_id == run_id]
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP lesson_span_duration_seconds Wall time of instrumented operations.",
+            "# TYPE lesson_span_duration_seconds summary",
+        ]
+        with self._lock:
+            for name, (count, total) in sorted(self._durations.items()):
+                lines.append(f'lesson_span_duration_seconds_count{{span="{name}"}} {count}')
+                lines.append(f'lesson_span_duration_seconds_sum{{span="{name}"}} {total:.6f}')
+            metrics = sorted(self._counters.items())
+        declared = set()
+        for (metric, name, extra_labels), value in metrics:
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            labels = f'span="{name}"' + (f",{extra_labels}" if extra_labels else "")
+            lines.append(f"{metric}{{{labels}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self):
+        # Rewritten in place so a node-exporter textfile collector (or anything else) can scrape it
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, METRICS_FILENAME)
+            with open(path + '.tmp', 'w', encoding='utf-8') as file:
+                file.write(self.prometheus_text())
+            os.replace(path + '.tmp', path)
+        except OSError:
+            pass
+
+
+def waterfall_lines(spans, width=32):
+    # Text waterfall: one line per span, bar offset and length proportional to time in the run
+    if not spans:
+        return []
+    spans = sorted(spans, key=lambda span: span.started_at)
+    start = spans[0].started_at
+    end = max(span.started_at + (span.duration or 0.0) for span in spans)
+    scale = width / max(end - start, 1e-9)
+    label_width = max(len(span.name) for span in spans)
+    lines = []
+    for span in spans:
+        offset = int((span.started_at - start) * scale)
+        length = max(int((span.duration or 0.0) * scale), 1)
+        bar = " " * offset + "█" * min(length, width - offset if width > offset else 1)
+        lines.append(f"{span.name:<{label_width}} |{bar:<{width}}| {span.duration or 0.0:6.2f}s")
+    return lines
+
+
+# Process-wide instance
+telemetry = Telemetry()
@@ -0,0 +1,78 @@
+from utils.reference_retrieval import estimate_tokens
+
+# Maximum input tokens per request for each stage (each assessment shard and each reviewed part of
+# the lesson is one request)
+STAGE_INPUT_BUDGETS = {
+    'blueprint': 24000,
+    'assessment': 24000,
+    'media': 48000,
+    'fact_check': 64000,
+    'dei_check': 64000,
+}
+
+# Prompt sections that may be shortened, lowest priority first. Instructions and the
+# lesson title/info are never trimmed. These are the section names the stages send (the fact
+# and DEI checks send each reviewed part as 'content'); the pipeline benchmark checks they match.
+TRIM_ORDER = ['reference_passages', 'additional_resources', 'assessment', 'content', 'blueprint']
+
+TRIM_MARKER = "\n[... {tokens} tokens trimmed to fit the prompt budget]"
+
+
+class TokenUsage:
+    __slots__ = ('calls', 'full_input', 'input', 'output', 'trimmed', 'over_budget')
+
+    def __init__(self):
+        self.calls = 0
+        # Input the stage would send with the full reference documents inline
+        self.full_input = 0
+        self.input = 0
+        self.output = 0
+        self.trimmed = 0
+        self.over_budget = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def trim_text(text, max_tokens):
+    # Keep roughly the first max_tokens tokens, cut at a line break when possible
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(max_tokens, 0) * 4
+    cut = text.rfind("\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    kept = text[:cut]
+    return kept + TRIM_MARKER.format(tokens=estimate_tokens(text) - estimate_tokens(kept))
+
+
+def fit_sections(sections, fixed_tokens, budget):
+    # Trim sections (name -> text) in TRIM_ORDER until fixed_tokens plus the sections fit the budget.
+    # Returns (sections, tokens trimmed, tokens still over budget).
+    sections = dict(sections)
+    total = fixed_tokens + sum(estimate_tokens(text) for text in sections.values())
+    trimmed = 0
+    for name in TRIM_ORDER:
+        overflow = total - budget
+        if overflow <= 0:
+            break
+        if name not in sections:
+            continue
+        size = estimate_tokens(sections[name])
+        # Leave room for the trim marker
+        keep = max(size - overflow - estimate_tokens(TRIM_MARKER) - 4, 0)
+        if keep >= size:
+            continue
+        sections[name] = trim_text(sections[name], keep)
+        new_size = estimate_tokens(sections[name])
+        trimmed += size - new_size
+        total -= size - new_size
+    return sections, trimmed, max(total - budget, 0)
+
+
+def response_token_counts(response, prompt, text):
+    # (input, output) tokens: Gemini's usage metadata when the response has it, else local estimates
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None and getattr(usage, 'prompt_token_count', 0):
+        return usage.prompt_token_count, getattr(usage, 'candidates_token_count', 0) or estimate_tokens(text)
+    return estimate_tokens(prompt), estimate_tokens(text)